@@ -88,18 +88,21 @@ class ApiClient {
   // ==================== STUDENT ROSTER ENDPOINTS ====================
 
   /// GET /api/v1/attendance/students
-  /// Get list of students (can be filtered by class)
+  /// Get one page of students (can be filtered by class)
   /// Note: Backend endpoint is /api/v1/attendance/students (verified via testing)
+  ///
+  /// The next page's cursor is in the X-Next-Cursor response header
+  /// (absent on the last page).
   Future<Response> getStudents({
     String? classId,
-    int? page,
+    String? cursor,
     int? limit,
   }) async {
     return await _dio.get(
       '/api/v1/attendance/students',
       queryParameters: {
         if (classId != null) 'class_id': classId,
-        if (page != null) 'page': page,
+        if (cursor != null) 'cursor': cursor,
         if (limit != null) 'limit': limit,
       },
     );
@@ -15,33 +15,51 @@ import '../../../../shared/data/models/student.dart';
 class StudentApiService {
   final ApiClient _apiClient;
 
+  /// Students fetched per request
+  static const int _pageSize = 500;
+
   StudentApiService(this._apiClient);
 
   /// Fetch all students from the backend
   /// 
+  /// The backend returns the roster in pages; this follows the
+  /// X-Next-Cursor header until the last page.
+  /// 
   /// Returns a list of Student objects
   /// Throws DioException if network request fails
   Future<List<Student>> getStudents({
     String? classId,
   }) async {
     try {
-      final response = await _apiClient.getStudents(classId: classId);
+      final students = <Student>[];
+      String? cursor;
+
+      do {
+        final response = await _apiClient.getStudents(
+          classId: classId,
+          cursor: cursor,
+          limit: _pageSize,
+        );
+
+        if (response.statusCode != 200) {
+          throw DioException(
+            requestOptions: response.requestOptions,
+            response: response,
+            error: 'Failed to load students: ${response.statusCode}',
+          );
+        }
 
-      if (response.statusCode == 200) {
         // Backend returns a list of student JSON objects
         final List<dynamic> studentsJson = response.data as List<dynamic>;
-        
+
         // Convert each JSON object to a Student model
-        return studentsJson
-            .map((json) => Student.fromJson(json as Map<String, dynamic>))
-            .toList();
-      }
+        students.addAll(studentsJson
+            .map((json) => Student.fromJson(json as Map<String, dynamic>)));
 
-      throw DioException(
-        requestOptions: response.requestOptions,
-        response: response,
-        error: 'Failed to load students: ${response.statusCode}',
-      );
+        cursor = response.headers.value('x-next-cursor');
+      } while (cursor != null);
+
+      return students;
     } catch (e) {
       // Re-throw for the caller to handle
       rethrow;
@@ -6,24 +6,32 @@ Create Date: 2024-11-26 10:00:00.000000
 
 This migration creates the face_templates table for storing student face embeddings
 used by the Computer Vision pipeline for face enrollment and attendance recognition.
+
+Databases created by init_db() already have the table; the migration then
+only records the baseline revision.
 """
 
-from sqlalchemy import Table, Column, Integer, String, Text, DateTime, Float, ForeignKey
-from sqlalchemy.orm import declarative_base
+from alembic import context, op
+import sqlalchemy as sa
 
-# This is a reference for manual migration if needed
-# In production, use: alembic upgrade head
+revision = "001_initial_enrollment"
+down_revision = None
+branch_labels = None
+depends_on = None
 
-Base = declarative_base()
 
-def create_face_templates_table():
-    """Create the face_templates table"""
-    return Table(
-        'face_templates',
-        Base.metadata,
-        Column('id', Integer, primary_key=True, index=True),
-        Column('student_id', String, ForeignKey('students.id'), nullable=False),
-        Column('embedding_data', Text, nullable=False),  # Pickled embedding
-        Column('created_at', DateTime, nullable=False),
-        Column('updated_at', DateTime, nullable=False),
+def upgrade():
+    if not context.is_offline_mode() and sa.inspect(op.get_bind()).has_table("face_templates"):
+        return
+    op.create_table(
+        "face_templates",
+        sa.Column("id", sa.Integer, primary_key=True, index=True),
+        sa.Column("student_id", sa.String, sa.ForeignKey("students.id"), nullable=False),
+        sa.Column("embedding_data", sa.Text, nullable=False),  # Pickled embedding
+        sa.Column("created_at", sa.DateTime, nullable=False),
+        sa.Column("updated_at", sa.DateTime, nullable=False),
     )
+
+
+def downgrade():
+    op.drop_table("face_templates")
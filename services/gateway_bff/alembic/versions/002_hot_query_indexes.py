@@ -0,0 +1,86 @@
+"""Index the hot attendance, roster, face template and consent filters
+
+Revision ID: 002_hot_query_indexes
+Revises: 001_initial_enrollment
+Create Date: 2026-10-19 09:00:00.000000
+
+Apart from primary keys none of the hot filters were indexed, so every
+report range, student history, roster, template and consent lookup was a
+sequential scan:
+
+- attendance_records.scan_time                 report and window ranges
+- attendance_records(student_id, scan_time)    one student's records in a range
+- students.class_id                            class rosters
+- face_templates.student_id                    a student's templates
+- consent_records(student_id, consent_type, granted_at)
+                                               latest consent of a type
+- classes(teacher_id) WHERE is_active          a teacher's active classes (partial)
+
+On PostgreSQL the indexes are built CONCURRENTLY, outside the migration
+transaction, so attendance writes are not blocked while they build. A build
+that failed part way leaves an INVALID index behind; it is dropped and
+rebuilt. The same indexes are declared on the models, so databases created
+by init_db() already have them and the migration skips them.
+
+explain_hot_queries.py checks that the hot queries use these indexes.
+"""
+
+from alembic import context, op
+import sqlalchemy as sa
+
+revision = "002_hot_query_indexes"
+down_revision = "001_initial_enrollment"
+branch_labels = None
+depends_on = None
+
+# (name, table, columns, partial index predicate)
+INDEXES = (
+    ("ix_attendance_records_scan_time", "attendance_records", ["scan_time"], None),
+    ("ix_attendance_records_student_id_scan_time", "attendance_records", ["student_id", "scan_time"], None),
+    ("ix_students_class_id", "students", ["class_id"], None),
+    ("ix_face_templates_student_id", "face_templates", ["student_id"], None),
+    (
+        "ix_consent_records_student_id_consent_type_granted_at", "consent_records",
+        ["student_id", "consent_type", "granted_at"], None,
+    ),
+    ("ix_classes_teacher_id_active", "classes", ["teacher_id"], "is_active"),
+)
+
+
+def _is_postgresql() -> bool:
+    return op.get_context().dialect.name == "postgresql"
+
+
+def _drop_invalid(name: str):
+    """Drop what an interrupted CREATE INDEX CONCURRENTLY left behind"""
+    invalid = op.get_bind().execute(
+        sa.text(
+            "SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+            "WHERE c.relname = :name AND NOT i.indisvalid"
+        ),
+        {"name": name},
+    ).first()
+    if invalid:
+        op.drop_index(name, postgresql_concurrently=True, if_exists=True)
+
+
+def upgrade():
+    # CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in INDEXES:
+            if _is_postgresql() and not context.is_offline_mode():
+                _drop_invalid(name)
+            predicate = sa.text(where) if where else None
+            op.create_index(
+                name, table, columns,
+                postgresql_where=predicate,
+                sqlite_where=predicate,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
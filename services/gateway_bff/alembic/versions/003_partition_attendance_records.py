@@ -0,0 +1,139 @@
+"""Partition attendance_records by month
+
+Revision ID: 003_partition_attendance_records
+Revises: 002_hot_query_indexes
+Create Date: 2026-10-19 10:00:00.000000
+
+Turns attendance_records into a table partitioned by RANGE (scan_time), one
+partition per month, see app/services/attendance_partitions.py. PostgreSQL
+only; other databases keep the plain table.
+
+The existing rows are copied into partitions covering their months (plus the
+next ATTENDANCE_PARTITION_MONTHS_AHEAD months) inside the migration
+transaction, so writes wait until it commits; run it in a maintenance window
+on large tables. A partitioned table's primary key has to include the
+partition key, so it becomes (id, scan_time) and scan_time becomes NOT NULL;
+ids keep coming from the same sequence.
+"""
+
+from datetime import datetime
+
+from alembic import context, op
+import sqlalchemy as sa
+
+from app.core.config import settings
+from app.services.attendance_partitions import add_months, create_partitions, month_start, partition_name
+
+revision = "003_partition_attendance_records"
+down_revision = "002_hot_query_indexes"
+branch_labels = None
+depends_on = None
+
+COLUMNS = "id, student_id, teacher_id, scan_time, confidence, location, status"
+
+INDEXES = (
+    ("ix_attendance_records_id", "id"),
+    ("ix_attendance_records_scan_time", "scan_time"),
+    ("ix_attendance_records_student_id_scan_time", "student_id, scan_time"),
+)
+
+
+def _skip() -> bool:
+    if op.get_context().dialect.name != "postgresql":
+        return True
+    if context.is_offline_mode():
+        return False
+    partitioned = op.get_bind().execute(sa.text(
+        "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+        "WHERE c.relname = 'attendance_records'"
+    )).first()
+    return partitioned is not None
+
+
+def _replace_table(create_sql: str, old_name: str):
+    """Rename attendance_records to old_name and create the new table in its place"""
+    op.execute(f"ALTER TABLE attendance_records RENAME TO {old_name}")
+    op.execute(f"ALTER TABLE {old_name} RENAME CONSTRAINT attendance_records_pkey TO {old_name}_pkey")
+    for name, _ in INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS {name}")
+    # The id sequence would be dropped with the old table
+    op.execute("ALTER SEQUENCE attendance_records_id_seq OWNED BY NONE")
+    op.execute(create_sql)
+    op.execute("ALTER SEQUENCE attendance_records_id_seq OWNED BY attendance_records.id")
+
+
+def upgrade():
+    if _skip():
+        return
+
+    if not context.is_offline_mode():
+        bind = op.get_bind()
+        missing = bind.execute(sa.text("SELECT count(*) FROM attendance_records WHERE scan_time IS NULL")).scalar()
+        if missing:
+            raise RuntimeError(f"{missing} attendance records have no scan_time; set it before partitioning")
+
+    _replace_table(
+        """
+        CREATE TABLE attendance_records (
+            id INTEGER NOT NULL DEFAULT nextval('attendance_records_id_seq'),
+            student_id VARCHAR NOT NULL REFERENCES students (id),
+            teacher_id VARCHAR NOT NULL,
+            scan_time TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            confidence FLOAT NOT NULL,
+            location VARCHAR,
+            status VARCHAR,
+            PRIMARY KEY (id, scan_time)
+        ) PARTITION BY RANGE (scan_time)
+        """,
+        "attendance_records_unpartitioned",
+    )
+    # Created on the parent, so every partition gets them
+    for name, columns in INDEXES:
+        op.execute(f"CREATE INDEX {name} ON attendance_records ({columns})")
+
+    current = month_start(datetime.utcnow().date())
+    last = add_months(current, settings.ATTENDANCE_PARTITION_MONTHS_AHEAD)
+    if context.is_offline_mode():
+        # Without a connection the oldest month is unknown: older rows go to the default partition
+        month = current
+        while month <= last:
+            op.execute(
+                f"CREATE TABLE {partition_name(month)} PARTITION OF attendance_records "
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+            )
+            month = add_months(month, 1)
+        op.execute("CREATE TABLE attendance_records_default PARTITION OF attendance_records DEFAULT")
+    else:
+        oldest = op.get_bind().execute(sa.text("SELECT min(scan_time) FROM attendance_records_unpartitioned")).scalar()
+        first = min(current, month_start(oldest.date())) if oldest is not None else current
+        create_partitions(op.get_bind(), first, last)
+
+    op.execute(f"INSERT INTO attendance_records ({COLUMNS}) SELECT {COLUMNS} FROM attendance_records_unpartitioned")
+    op.execute("DROP TABLE attendance_records_unpartitioned")
+    op.execute("ANALYZE attendance_records")
+
+
+def downgrade():
+    if op.get_context().dialect.name != "postgresql":
+        return
+
+    _replace_table(
+        """
+        CREATE TABLE attendance_records (
+            id INTEGER NOT NULL DEFAULT nextval('attendance_records_id_seq'),
+            student_id VARCHAR NOT NULL REFERENCES students (id),
+            teacher_id VARCHAR NOT NULL,
+            scan_time TIMESTAMP WITHOUT TIME ZONE,
+            confidence FLOAT NOT NULL,
+            location VARCHAR,
+            status VARCHAR,
+            PRIMARY KEY (id)
+        )
+        """,
+        "attendance_records_partitioned",
+    )
+    for name, columns in INDEXES:
+        op.execute(f"CREATE INDEX {name} ON attendance_records ({columns})")
+    op.execute(f"INSERT INTO attendance_records ({COLUMNS}) SELECT {COLUMNS} FROM attendance_records_partitioned")
+    # Drops every attached partition with it
+    op.execute("DROP TABLE attendance_records_partitioned")
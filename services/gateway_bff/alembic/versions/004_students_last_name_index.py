@@ -0,0 +1,31 @@
+"""Index students for keyset pagination by last name
+
+Revision ID: 004_students_last_name_index
+Revises: 003_partition_attendance_records
+Create Date: 2026-10-19 11:00:00.000000
+
+GET /attendance/students pages through the roster ordered by
+(last_name, id); this index serves each page as one range read. Built
+CONCURRENTLY on PostgreSQL, like 002_hot_query_indexes.
+"""
+
+from alembic import op
+
+revision = "004_students_last_name_index"
+down_revision = "003_partition_attendance_records"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_students_last_name_id", "students", ["last_name", "id"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_students_last_name_id", table_name="students", postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,42 @@
+"""Record deleted face templates for gallery delta bundles
+
+Revision ID: 005_face_template_tombstones
+Revises: 004_students_last_name_index
+Create Date: 2026-10-19 12:00:00.000000
+
+Creates face_template_tombstones. A Session hook adds a row for every face
+template deleted through the ORM, so the class gallery version advances on
+deletions and delta bundles list the removed template ids.
+
+Databases created by init_db() already have the table; the migration then
+only records the revision.
+"""
+
+from alembic import context, op
+import sqlalchemy as sa
+
+revision = "005_face_template_tombstones"
+down_revision = "004_students_last_name_index"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if not context.is_offline_mode() and sa.inspect(op.get_bind()).has_table("face_template_tombstones"):
+        return
+    op.create_table(
+        "face_template_tombstones",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("template_id", sa.Integer, nullable=False),
+        sa.Column("student_id", sa.String, nullable=False),
+        sa.Column("class_id", sa.String),
+        sa.Column("deleted_at", sa.DateTime, nullable=False),
+    )
+    op.create_index(
+        "ix_face_template_tombstones_class_deleted", "face_template_tombstones", ["class_id", "deleted_at"]
+    )
+
+
+def downgrade():
+    op.drop_index("ix_face_template_tombstones_class_deleted", table_name="face_template_tombstones")
+    op.drop_table("face_template_tombstones")
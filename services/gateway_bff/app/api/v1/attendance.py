@@ -1,18 +1,47 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, UploadFile, File, Form
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
-from datetime import datetime
+from datetime import date as date_type, datetime, timedelta
 import numpy as np
 import cv2
 import io
 
-from app.core.database import get_db
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, SessionLocal, get_async_db
+from app.core.deadline import Deadline, DeadlineExceeded
+from app.core.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    NDJSON_MEDIA_TYPE,
+    NEXT_CURSOR_HEADER,
+    STREAM_CHUNK_SIZE,
+    decode_cursor,
+    encode_cursor,
+    ndjson_lines,
+)
 from app.models.attendance import AttendanceRecord, Student, FaceTemplate
 from app.schemas.attendance import AttendanceScanRequest, AttendanceScanResponse, StudentResponse
+from app.services.analytics_service import AnalyticsService, school_day_start, to_school_date
 from app.services.cv_service import CVService
+from app.services.cv_scheduler import cv_scheduler
 
 router = APIRouter()
 cv_service = CVService()
+cv_executor = cv_scheduler.executor("interactive")
+
+
+def _decode_image(image_bytes: bytes) -> Optional[np.ndarray]:
+    """Decode uploaded image bytes to a BGR array"""
+    nparr = np.frombuffer(image_bytes, np.uint8)
+    return cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+
+
+def _match_student(embedding: np.ndarray):
+    """Match an embedding in a CV worker; the first call (or a template change) rebuilds the gallery index"""
+    with SessionLocal() as session:
+        return cv_service.match_student(embedding, session)
 
 
 @router.post("/scan", response_model=AttendanceScanResponse)
@@ -21,11 +50,16 @@ async def scan_attendance(
     image_data: UploadFile = File(...),
     class_id: Optional[str] = Form(None),
     location: Optional[str] = Form(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Process attendance scan using computer vision.
     
+    The scan runs under a deadline of ATTENDANCE_SCAN_TIMEOUT seconds across
+    decode -> detect -> embed -> match -> write. When the budget runs out the
+    remaining faces are skipped and the students already matched and recorded
+    are returned with `partial: true`.
+    
     Args:
         teacher_id: ID of teacher taking attendance
         image_data: Image file from camera
@@ -35,17 +69,19 @@ async def scan_attendance(
     Returns:
         List of detected students with confidence scores
     """
+    deadline = Deadline(settings.ATTENDANCE_SCAN_TIMEOUT, pipeline="attendance_scan")
+    detected_students = []
+    
     try:
         # Read and decode image
         image_bytes = await image_data.read()
-        nparr = np.frombuffer(image_bytes, np.uint8)
-        image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+        image = await deadline.run("decode", _decode_image, image_bytes, executor=cv_executor)
         
         if image is None:
             raise HTTPException(status_code=400, detail="Invalid image format")
         
         # Detect faces in image
-        detected_faces = cv_service.detect_faces(image)
+        detected_faces = await deadline.run("detect", cv_service.detect_faces, image, executor=cv_executor)
         
         if not detected_faces:
             return AttendanceScanResponse(
@@ -55,30 +91,30 @@ async def scan_attendance(
             )
         
         # Process each detected face
-        detected_students = []
-        
         for face_data in detected_faces:
             # Extract embedding
-            embedding = cv_service.extract_embedding(face_data)
+            embedding = await deadline.run("embed", cv_service.extract_embedding, face_data, executor=cv_executor)
             
-            # Match against templates
-            match = cv_service.match_student(embedding, db)
+            # Match against templates (off the event loop, bounded by the deadline)
+            match = await deadline.run("match", _match_student, embedding, executor=cv_executor)
             
             if match and match.get("confidence", 0) >= cv_service.confidence_threshold:
                 student_id = match["student_id"]
                 confidence = match["confidence"]
                 
                 # Record attendance
-                attendance_record = cv_service.record_attendance(
+                attendance_record = await db.run_sync(lambda session: deadline.run_sync(
+                    "write",
+                    cv_service.record_attendance,
                     student_id=student_id,
                     teacher_id=teacher_id,
                     confidence=confidence,
                     location=location,
-                    db=db
-                )
+                    db=session
+                ))
                 
                 # Get student info
-                student = db.query(Student).filter(Student.id == student_id).first()
+                student = await db.get(Student, student_id)
                 if student:
                     detected_students.append({
                         "student_id": student_id,
@@ -95,6 +131,14 @@ async def scan_attendance(
             scan_time=datetime.utcnow()
         )
     
+    except DeadlineExceeded as e:
+        return AttendanceScanResponse(
+            detected_students=detected_students,
+            total_detected=len(detected_students),
+            scan_time=datetime.utcnow(),
+            partial=True,
+            timed_out_stage=e.stage,
+        )
     except HTTPException:
         raise
     except Exception as e:
@@ -109,7 +153,7 @@ async def manual_attendance_record(
     student_id: str = Form(...),
     teacher_id: str = Form(...),
     location: Optional[str] = Form(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Manually record attendance for a student.
@@ -121,18 +165,18 @@ async def manual_attendance_record(
     """
     try:
         # Verify student exists
-        student = db.query(Student).filter(Student.id == student_id).first()
+        student = await db.get(Student, student_id)
         if not student:
             raise HTTPException(status_code=404, detail="Student not found")
         
         # Record attendance
-        record = cv_service.record_attendance(
+        record = await db.run_sync(lambda session: cv_service.record_attendance(
             student_id=student_id,
             teacher_id=teacher_id,
             confidence=1.0,  # Manual entry has full confidence
             location=location,
-            db=db
-        )
+            db=session
+        ))
         
         return {
             "success": True,
@@ -150,45 +194,89 @@ async def manual_attendance_record(
         )
 
 
+def _record_dict(record) -> dict:
+    return {
+        "id": record.id,
+        "student_id": record.student_id,
+        "scan_time": record.scan_time,
+        "confidence": record.confidence,
+        "status": record.status,
+        "location": record.location
+    }
+
+
+def _student_dict(student) -> dict:
+    return {
+        "id": student.id,
+        "first_name": student.first_name,
+        "last_name": student.last_name,
+        "class_id": student.class_id,
+        "grade_level": student.grade_level,
+        "parent_email": student.parent_email,
+        "is_active": student.is_active
+    }
+
+
+async def _require_student(db: AsyncSession, student_id: str):
+    if await db.scalar(select(Student.id).where(Student.id == student_id)) is None:
+        raise HTTPException(status_code=404, detail="Student not found")
+
+
+def _records_filter(student_id: str, days: int):
+    """Records of the student in the last N days"""
+    cutoff_date = datetime.utcnow() - timedelta(days=days)
+    return (
+        AttendanceRecord.student_id == student_id,
+        AttendanceRecord.scan_time >= cutoff_date
+    )
+
+
+def _students_filter(class_id: Optional[str]):
+    return (Student.class_id == class_id,) if class_id else ()
+
+
 @router.get("/records/{student_id}", response_model=List[dict])
 async def get_attendance_records(
     student_id: str,
+    response: Response,
     days: int = 30,
-    db: Session = Depends(get_db)
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Get attendance records for a student.
+    Get attendance records for a student, newest first.
+    
+    Keyset-paginated on (scan_time, id): pass the X-Next-Cursor response
+    header as `cursor` to get the next page; the header is absent on the
+    last page.
     
     Args:
         student_id: Student ID
         days: Number of days to look back (default 30)
+        limit: Records per page
+        cursor: Cursor of the page to fetch (from X-Next-Cursor)
     """
     try:
-        from datetime import timedelta
+        await _require_student(db, student_id)
         
-        # Verify student exists
-        student = db.query(Student).filter(Student.id == student_id).first()
-        if not student:
-            raise HTTPException(status_code=404, detail="Student not found")
+        query = select(AttendanceRecord).where(*_records_filter(student_id, days))
+        if cursor:
+            scan_time, record_id = decode_cursor(cursor, datetime.fromisoformat, int)
+            # Written so the (student_id, scan_time) index bounds the scan
+            query = query.where(
+                AttendanceRecord.scan_time <= scan_time,
+                or_(AttendanceRecord.scan_time < scan_time, AttendanceRecord.id < record_id)
+            )
+        records = (await db.scalars(query.order_by(
+            AttendanceRecord.scan_time.desc(), AttendanceRecord.id.desc()
+        ).limit(limit + 1))).all()
         
-        # Get records from last N days
-        cutoff_date = datetime.utcnow() - timedelta(days=days)
-        records = db.query(AttendanceRecord).filter(
-            AttendanceRecord.student_id == student_id,
-            AttendanceRecord.scan_time >= cutoff_date
-        ).order_by(AttendanceRecord.scan_time.desc()).all()
+        if len(records) > limit:
+            records = records[:limit]
+            response.headers[NEXT_CURSOR_HEADER] = encode_cursor(records[-1].scan_time, records[-1].id)
         
-        return [
-            {
-                "id": r.id,
-                "student_id": r.student_id,
-                "scan_time": r.scan_time,
-                "confidence": r.confidence,
-                "status": r.status,
-                "location": r.location
-            }
-            for r in records
-        ]
+        return [_record_dict(r) for r in records]
     
     except HTTPException:
         raise
@@ -199,99 +287,242 @@ async def get_attendance_records(
         )
 
 
+@router.get("/records/{student_id}/stream")
+async def stream_attendance_records(
+    student_id: str,
+    days: int = 30,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Stream every attendance record of a student in the last N days as NDJSON,
+    newest first, for bulk consumers.
+    
+    Rows are read through a server-side cursor in chunks, so the response
+    never holds the whole result in memory.
+    """
+    await _require_student(db, student_id)
+    query = select(
+        AttendanceRecord.id,
+        AttendanceRecord.student_id,
+        AttendanceRecord.scan_time,
+        AttendanceRecord.confidence,
+        AttendanceRecord.status,
+        AttendanceRecord.location
+    ).where(
+        *_records_filter(student_id, days)
+    ).order_by(AttendanceRecord.scan_time.desc(), AttendanceRecord.id.desc())
+    return StreamingResponse(ndjson_lines(_stream(query, _record_dict)), media_type=NDJSON_MEDIA_TYPE)
+
+
 @router.get("/students", response_model=List[StudentResponse])
 async def get_students(
+    response: Response,
     class_id: Optional[str] = None,
-    db: Session = Depends(get_db)
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get list of students"""
-    query = db.query(Student)
-    if class_id:
-        query = query.filter(Student.class_id == class_id)
-    students = query.all()
-    return [StudentResponse(**{
-        "id": s.id,
-        "first_name": s.first_name,
-        "last_name": s.last_name,
-        "class_id": s.class_id,
-        "grade_level": s.grade_level,
-        "parent_email": s.parent_email,
-        "is_active": s.is_active
-    }) for s in students]
+    """
+    Get list of students, ordered by last name.
+    
+    Keyset-paginated on (last_name, id): pass the X-Next-Cursor response
+    header as `cursor` to get the next page.
+    """
+    query = select(Student).where(*_students_filter(class_id))
+    if cursor:
+        last_name, last_id = decode_cursor(cursor, str, str)
+        query = query.where(
+            Student.last_name >= last_name,
+            or_(Student.last_name > last_name, Student.id > last_id)
+        )
+    students = (await db.scalars(query.order_by(Student.last_name, Student.id).limit(limit + 1))).all()
+    
+    if len(students) > limit:
+        students = students[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(students[-1].last_name, students[-1].id)
+    
+    return [StudentResponse(**_student_dict(s)) for s in students]
+
+
+@router.get("/students/stream")
+async def stream_students(class_id: Optional[str] = None):
+    """Stream every student (optionally of one class) as NDJSON, ordered by last name"""
+    query = select(
+        Student.id,
+        Student.first_name,
+        Student.last_name,
+        Student.class_id,
+        Student.grade_level,
+        Student.parent_email,
+        Student.is_active
+    ).where(
+        *_students_filter(class_id)
+    ).order_by(Student.last_name, Student.id)
+    return StreamingResponse(ndjson_lines(_stream(query, _student_dict)), media_type=NDJSON_MEDIA_TYPE)
+
+
+async def _stream(query, to_dict):
+    """
+    Rows of `query` as dicts, fetched STREAM_CHUNK_SIZE at a time through a
+    server-side cursor. Runs in its own session, which lives as long as the
+    response body is being sent.
+    """
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(query.execution_options(yield_per=STREAM_CHUNK_SIZE))
+        async for row in result:
+            yield to_dict(row)
+
+
+def _class_presence_query(
+    class_id: str,
+    start: Optional[datetime],
+    end: Optional[datetime],
+    *columns
+):
+    """
+    Every student of the class LEFT JOINed to their records in [start, end)
+    (all records without bounds), grouped per student and any extra columns.
+    """
+    joined = AttendanceRecord.student_id == Student.id
+    if start is not None:
+        joined &= (AttendanceRecord.scan_time >= start) & (AttendanceRecord.scan_time < end)
+    return select(
+        Student.id,
+        Student.first_name,
+        Student.last_name,
+        *columns,
+        func.count(AttendanceRecord.id),
+        func.max(AttendanceRecord.scan_time),
+    ).outerjoin(
+        AttendanceRecord, joined
+    ).where(
+        Student.class_id == class_id
+    ).group_by(
+        Student.id, Student.first_name, Student.last_name, *columns
+    ).order_by(
+        Student.last_name, Student.first_name, Student.id
+    )
 
 
 @router.get("/class-summary/{class_id}")
 async def get_class_attendance_summary(
     class_id: str,
     date: Optional[str] = None,
-    db: Session = Depends(get_db)
+    days: Optional[int] = Query(None, ge=1, le=31),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get attendance summary for a class.
     
+    Presence, record counts and last record time of every student come from
+    one LEFT JOIN aggregate. Days are school-local days, [midnight, next
+    midnight).
+    
+    With `days`, returns a student x day presence grid instead: `days` local
+    days starting at `date` (default: the last `days` days up to today), also
+    in one query.
+    
     Args:
         class_id: Class ID
         date: Optional date filter (YYYY-MM-DD)
+        days: Number of days for the presence grid (e.g. 7 for a week)
     """
     try:
-        from datetime import datetime as dt
-        
-        # Get all students in class
-        students = db.query(Student).filter(Student.class_id == class_id).all()
+        filter_date = None
+        if date:
+            try:
+                filter_date = datetime.strptime(date, "%Y-%m-%d").date()
+            except ValueError:
+                raise HTTPException(status_code=400, detail="date must be YYYY-MM-DD")
         
-        if not students:
-            return {
-                "class_id": class_id,
-                "summary": [],
-                "total_students": 0,
-                "present_count": 0
-            }
+        if days:
+            return await _class_presence_grid(db, class_id, filter_date, days)
         
-        summary = []
-        present_count = 0
+        start = end = None
+        if filter_date:
+            start = school_day_start(filter_date)
+            end = school_day_start(filter_date + timedelta(days=1))
         
-        for student in students:
-            query = db.query(AttendanceRecord).filter(
-                AttendanceRecord.student_id == student.id
-            )
-            
-            # Filter by date if provided
-            if date:
-                try:
-                    filter_date = dt.strptime(date, "%Y-%m-%d").date()
-                    query = query.filter(
-                        AttendanceRecord.scan_time >= dt.combine(filter_date, dt.min.time()),
-                        AttendanceRecord.scan_time < dt.combine(filter_date, dt.max.time())
-                    )
-                except ValueError:
-                    pass
-            
-            records = query.all()
-            is_present = len(records) > 0
-            
-            if is_present:
-                present_count += 1
-            
-            summary.append({
-                "student_id": student.id,
-                "name": f"{student.first_name} {student.last_name}",
-                "present": is_present,
-                "records_count": len(records),
-                "last_record": records[0].scan_time if records else None
-            })
+        summary = [
+            {
+                "student_id": student_id,
+                "name": f"{first_name} {last_name}",
+                "present": records_count > 0,
+                "records_count": records_count,
+                "last_record": last_record
+            }
+            for student_id, first_name, last_name, records_count, last_record
+            in await db.execute(_class_presence_query(class_id, start, end))
+        ]
+        present_count = sum(student["present"] for student in summary)
         
         return {
             "class_id": class_id,
             "date_filter": date,
             "summary": summary,
-            "total_students": len(students),
+            "total_students": len(summary),
             "present_count": present_count,
-            "attendance_rate": (present_count / len(students) * 100) if students else 0
+            "attendance_rate": (present_count / len(summary) * 100) if summary else 0
         }
     
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Failed to get summary: {str(e)}"
         )
 
+
+async def _class_presence_grid(db: AsyncSession, class_id: str, first_day: Optional[date_type], days: int) -> dict:
+    """Student x day presence grid over `days` local days"""
+    if first_day is None:
+        first_day = to_school_date(datetime.utcnow()) - timedelta(days=days - 1)
+    grid_days = [first_day + timedelta(days=i) for i in range(days)]
+    day_index = {day: i for i, day in enumerate(grid_days)}
+    
+    local_day = AnalyticsService(db)._local_day()
+    rows = await db.execute(_class_presence_query(
+        class_id,
+        school_day_start(grid_days[0]),
+        school_day_start(grid_days[-1] + timedelta(days=1)),
+        local_day,
+    ))
+    
+    students = {}
+    for student_id, first_name, last_name, day, records_count, last_record in rows:
+        student = students.setdefault(student_id, {
+            "student_id": student_id,
+            "name": f"{first_name} {last_name}",
+            "present": [False] * days,
+            "records_count": [0] * days,
+            "days_present": 0,
+            "last_record": None
+        })
+        if day is None:
+            # LEFT JOIN row of a student without records
+            continue
+        if not isinstance(day, date_type):
+            day = date_type.fromisoformat(str(day))
+        i = day_index.get(day)
+        if i is None:
+            continue
+        student["present"][i] = records_count > 0
+        student["records_count"][i] = records_count
+        student["days_present"] += records_count > 0
+        if student["last_record"] is None or last_record > student["last_record"]:
+            student["last_record"] = last_record
+    
+    grid = list(students.values())
+    present_counts = [sum(student["present"][i] for student in grid) for i in range(days)]
+    
+    return {
+        "class_id": class_id,
+        "days": [day.isoformat() for day in grid_days],
+        "grid": grid,
+        "total_students": len(grid),
+        "present_counts": present_counts,
+        "attendance_rates": [
+            (count / len(grid) * 100) if grid else 0 for count in present_counts
+        ]
+    }
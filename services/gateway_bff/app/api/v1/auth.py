@@ -1,12 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timedelta
 from typing import Optional
 import jwt
 from passlib.context import CryptContext
 
-from app.core.database import get_db
+from app.core.database import get_async_db
 from app.core.config import settings
 from app.models.attendance import Teacher
 from app.schemas.auth import LoginRequest, LoginResponse, TokenData
@@ -27,6 +28,14 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm="HS256")
     return encoded_jwt
 
+def teacher_id_from_token(token: str) -> Optional[str]:
+    """Teacher ID of a valid access token, None otherwise"""
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
+    except jwt.PyJWTError:
+        return None
+    return payload.get("sub")
+
 def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
     """Verify JWT token"""
     try:
@@ -45,20 +54,20 @@ def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
             detail="Invalid authentication credentials"
         )
 
-def get_current_teacher(
+async def get_current_teacher(
     token_data: TokenData = Depends(verify_token),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get current authenticated teacher"""
-    teacher = db.query(Teacher).filter(Teacher.id == token_data.teacher_id).first()
+    teacher = await db.get(Teacher, token_data.teacher_id)
     if not teacher:
         raise HTTPException(status_code=404, detail="Teacher not found")
     return teacher
 
 @router.post("/login", response_model=LoginResponse)
-async def login(request: LoginRequest, db: Session = Depends(get_db)):
+async def login(request: LoginRequest, db: AsyncSession = Depends(get_async_db)):
     """Teacher login endpoint"""
-    teacher = db.query(Teacher).filter(Teacher.email == request.email).first()
+    teacher = await db.scalar(select(Teacher).where(Teacher.email == request.email).limit(1))
     
     if not teacher:
         raise HTTPException(
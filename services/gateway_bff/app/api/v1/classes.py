@@ -1,13 +1,15 @@
 """Class management endpoints"""
 
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from datetime import datetime
 import uuid
 
-from app.core.database import get_db
-from app.models.attendance import Student
+from app.core.config import settings
+from app.core.database import get_async_db
+from app.models.attendance import Student, StudentAttendanceRisk
 from app.models.classes import Class
 from app.schemas.classes import (
     ClassCreate,
@@ -17,6 +19,8 @@ from app.schemas.classes import (
     ClassListResponse,
     EnrollStudentRequest,
     StudentEnrollmentResponse,
+    AtRiskStudent,
+    AtRiskStudentsResponse,
 )
 
 router = APIRouter()
@@ -29,7 +33,7 @@ async def list_classes(
     is_active: Optional[bool] = Query(None, description="Filter by active status"),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     List all classes with optional filtering
@@ -41,17 +45,17 @@ async def list_classes(
         skip: Number of records to skip
         limit: Maximum number of records to return
     """
-    query = db.query(Class)
+    query = select(Class)
     
     if teacher_id:
-        query = query.filter(Class.teacher_id == teacher_id)
+        query = query.where(Class.teacher_id == teacher_id)
     if grade_level:
-        query = query.filter(Class.grade_level == grade_level)
+        query = query.where(Class.grade_level == grade_level)
     if is_active is not None:
-        query = query.filter(Class.is_active == is_active)
+        query = query.where(Class.is_active == is_active)
     
-    total = query.count()
-    classes = query.offset(skip).limit(limit).all()
+    total = await db.scalar(select(func.count()).select_from(query.subquery()))
+    classes = (await db.scalars(query.offset(skip).limit(limit))).all()
     
     return ClassListResponse(
         total=total,
@@ -62,7 +66,7 @@ async def list_classes(
 @router.post("", response_model=ClassResponse, status_code=201)
 async def create_class(
     class_data: ClassCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Create a new class
@@ -77,7 +81,7 @@ async def create_class(
     class_id = class_data.id or f"class_{uuid.uuid4().hex[:8]}"
     
     # Check if class already exists
-    existing = db.query(Class).filter(Class.id == class_id).first()
+    existing = await db.get(Class, class_id)
     if existing:
         raise HTTPException(status_code=409, detail="Class ID already exists")
     
@@ -95,8 +99,8 @@ async def create_class(
     )
     
     db.add(db_class)
-    db.commit()
-    db.refresh(db_class)
+    await db.commit()
+    await db.refresh(db_class)
     
     return ClassResponse.from_orm(db_class)
 
@@ -104,7 +108,7 @@ async def create_class(
 @router.get("/{class_id}", response_model=ClassDetailResponse)
 async def get_class(
     class_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Get a specific class with student list
@@ -115,15 +119,17 @@ async def get_class(
     Returns:
         Class details with enrolled students
     """
-    db_class = db.query(Class).filter(Class.id == class_id).first()
+    db_class = await db.get(Class, class_id)
     
     if not db_class:
         raise HTTPException(status_code=404, detail="Class not found")
     
     # Get enrolled students
-    students = db.query(Student).filter(Student.class_id == class_id).all()
+    students = (await db.scalars(select(Student).where(Student.class_id == class_id))).all()
     
-    response = ClassDetailResponse.from_orm(db_class)
+    # From the class columns only: reading the students relationship would
+    # need a lazy load, which AsyncSession cannot do
+    response = ClassDetailResponse(**ClassResponse.from_orm(db_class).dict())
     response.student_count = len(students)
     response.students = [
         {
@@ -140,11 +146,63 @@ async def get_class(
     return response
 
 
+@router.get("/{class_id}/at-risk", response_model=AtRiskStudentsResponse)
+async def list_at_risk_students(
+    class_id: str,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    List the class's at-risk students
+    
+    Read from the at-risk index (kept current on every attendance write), so
+    the cost grows with the number of at-risk students, not with attendance
+    history. Counts cover the last AT_RISK_WINDOW_DAYS school days.
+    
+    Args:
+        class_id: Class ID
+    
+    Returns:
+        At-risk students, lowest attendance rate first
+    """
+    if await db.get(Class, class_id) is None:
+        raise HTTPException(status_code=404, detail="Class not found")
+    
+    rows = (await db.execute(select(
+        StudentAttendanceRisk, Student.first_name, Student.last_name
+    ).join(
+        Student, Student.id == StudentAttendanceRisk.student_id
+    ).where(
+        StudentAttendanceRisk.class_id == class_id,
+        StudentAttendanceRisk.at_risk.is_(True),
+    ))).all()
+    
+    students = [
+        AtRiskStudent(
+            student_id=risk.student_id,
+            student_name=f"{first_name} {last_name}",
+            attendance_rate=round(risk.present_records / risk.total_records * 100, 2),
+            present_records=risk.present_records,
+            total_records=risk.total_records,
+            at_risk_since=risk.at_risk_since,
+        )
+        for risk, first_name, last_name in rows
+    ]
+    students.sort(key=lambda student: (student.attendance_rate, student.student_id))
+    
+    return AtRiskStudentsResponse(
+        class_id=class_id,
+        window_days=settings.AT_RISK_WINDOW_DAYS,
+        threshold=settings.AT_RISK_THRESHOLD,
+        total=len(students),
+        students=students,
+    )
+
+
 @router.put("/{class_id}", response_model=ClassResponse)
 async def update_class(
     class_id: str,
     class_data: ClassUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Update a class
@@ -156,7 +214,7 @@ async def update_class(
     Returns:
         Updated class object
     """
-    db_class = db.query(Class).filter(Class.id == class_id).first()
+    db_class = await db.get(Class, class_id)
     
     if not db_class:
         raise HTTPException(status_code=404, detail="Class not found")
@@ -168,8 +226,8 @@ async def update_class(
     for field, value in update_data.items():
         setattr(db_class, field, value)
     
-    db.commit()
-    db.refresh(db_class)
+    await db.commit()
+    await db.refresh(db_class)
     
     return ClassResponse.from_orm(db_class)
 
@@ -177,7 +235,7 @@ async def update_class(
 @router.delete("/{class_id}", status_code=204)
 async def delete_class(
     class_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Delete a class (soft delete - sets is_active to False)
@@ -185,7 +243,7 @@ async def delete_class(
     Args:
         class_id: Class ID to delete
     """
-    db_class = db.query(Class).filter(Class.id == class_id).first()
+    db_class = await db.get(Class, class_id)
     
     if not db_class:
         raise HTTPException(status_code=404, detail="Class not found")
@@ -194,14 +252,14 @@ async def delete_class(
     db_class.is_active = False
     db_class.updated_at = datetime.utcnow()
     
-    db.commit()
+    await db.commit()
 
 
 @router.post("/{class_id}/enroll", response_model=StudentEnrollmentResponse)
 async def enroll_student_in_class(
     class_id: str,
     enrollment_data: EnrollStudentRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Enroll a student in a class
@@ -214,20 +272,20 @@ async def enroll_student_in_class(
         Enrollment response
     """
     # Verify class exists
-    db_class = db.query(Class).filter(Class.id == class_id).first()
+    db_class = await db.get(Class, class_id)
     if not db_class:
         raise HTTPException(status_code=404, detail="Class not found")
     
     # Verify student exists
-    student = db.query(Student).filter(Student.id == enrollment_data.student_id).first()
+    student = await db.get(Student, enrollment_data.student_id)
     if not student:
         raise HTTPException(status_code=404, detail="Student not found")
     
     # Check capacity
     if db_class.capacity:
-        enrolled_count = db.query(Student).filter(
+        enrolled_count = await db.scalar(select(func.count(Student.id)).where(
             Student.class_id == class_id
-        ).count()
+        ))
         if enrolled_count >= db_class.capacity:
             raise HTTPException(
                 status_code=400,
@@ -238,8 +296,8 @@ async def enroll_student_in_class(
     student.class_id = class_id
     student.grade_level = db_class.grade_level
     
-    db.commit()
-    db.refresh(student)
+    await db.commit()
+    await db.refresh(student)
     
     return StudentEnrollmentResponse(
         success=True,
@@ -255,7 +313,7 @@ async def enroll_student_in_class(
 async def remove_student_from_class(
     class_id: str,
     student_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Remove a student from a class
@@ -265,15 +323,15 @@ async def remove_student_from_class(
         student_id: Student ID to remove
     """
     # Verify class exists
-    db_class = db.query(Class).filter(Class.id == class_id).first()
+    db_class = await db.get(Class, class_id)
     if not db_class:
         raise HTTPException(status_code=404, detail="Class not found")
     
     # Verify student exists and is in the class
-    student = db.query(Student).filter(
+    student = await db.scalar(select(Student).where(
         Student.id == student_id,
         Student.class_id == class_id
-    ).first()
+    ))
     
     if not student:
         raise HTTPException(
@@ -284,7 +342,7 @@ async def remove_student_from_class(
     # Move student to unassigned class or default
     student.class_id = "UNASSIGNED"
     
-    db.commit()
+    await db.commit()
     
     return {
         "success": True,
@@ -295,7 +353,7 @@ async def remove_student_from_class(
 @router.get("/", response_model=List[ClassResponse])
 async def list_class_by_teacher(
     teacher_id: str = Query(..., description="Teacher ID"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     List all classes for a specific teacher
@@ -306,9 +364,9 @@ async def list_class_by_teacher(
     Returns:
         List of teacher's classes
     """
-    classes = db.query(Class).filter(
+    classes = (await db.scalars(select(Class).where(
         Class.teacher_id == teacher_id,
         Class.is_active == True
-    ).all()
+    ))).all()
     
     return [ClassResponse.from_orm(c) for c in classes]
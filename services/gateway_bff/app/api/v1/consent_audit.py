@@ -1,9 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from datetime import datetime
 
-from app.core.database import get_db
+from app.core.database import get_async_db
 from app.models.consent_audit import ConsentRecord, AuditLog
 from app.schemas.consent_audit import ConsentRequest, ConsentResponse, ConsentStatusResponse
 
@@ -12,7 +13,7 @@ router = APIRouter()
 @router.post("/consent", response_model=ConsentResponse)
 async def record_consent(
     request: ConsentRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Record parent consent for student data processing"""
     consent = ConsentRecord(
@@ -26,8 +27,8 @@ async def record_consent(
         version=request.version
     )
     db.add(consent)
-    db.commit()
-    db.refresh(consent)
+    await db.commit()
+    await db.refresh(consent)
     return ConsentResponse(**{
         "id": consent.id,
         "student_id": consent.student_id,
@@ -42,13 +43,13 @@ async def record_consent(
 async def get_consent_status(
     student_id: str,
     consent_type: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get current consent status for a student"""
-    consent = db.query(ConsentRecord).filter(
+    consent = await db.scalar(select(ConsentRecord).where(
         ConsentRecord.student_id == student_id,
         ConsentRecord.consent_type == consent_type
-    ).order_by(ConsentRecord.granted_at.desc()).first()
+    ).order_by(ConsentRecord.granted_at.desc()).limit(1))
     
     if not consent:
         return ConsentStatusResponse(
@@ -1,16 +1,19 @@
 """Face enrollment endpoints for CV pipeline"""
 
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query, Header, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from datetime import datetime
 import numpy as np
 import io
 import cv2
 
-from app.core.database import get_db
+from app.core.database import SessionLocal, get_async_db
 from app.models.attendance import FaceTemplate, Student
 from app.services.cv_service import CVService
+from app.services.cv_scheduler import cv_scheduler
+from app.services.gallery_service import GalleryService
 from app.schemas.enrollment import (
     EnrollmentRequest,
     EnrollmentResponse,
@@ -22,12 +25,19 @@ router = APIRouter()
 cv_service = CVService()
 
 
+def _build_gallery_bundle(class_id: str, dtype: str, since: Optional[int], state: dict) -> bytes:
+    """Decode and quantize a class's templates in a CV worker"""
+    with SessionLocal() as session:
+        service = GalleryService(session, embedding_dim=cv_service.embedding_dim)
+        return service.build_bundle(class_id, dtype=dtype, since=since, state=state)
+
+
 @router.post("/enroll", response_model=EnrollmentResponse)
 async def enroll_student(
     student_id: str = Form(...),
     image_data: UploadFile = File(...),
     pose_index: int = Form(default=0),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Enroll a student with a face image.
@@ -42,20 +52,20 @@ async def enroll_student(
     """
     try:
         # Verify student exists
-        student = db.query(Student).filter(Student.id == student_id).first()
+        student = await db.get(Student, student_id)
         if not student:
             raise HTTPException(status_code=404, detail="Student not found")
         
         # Read and decode image
         image_bytes = await image_data.read()
         nparr = np.frombuffer(image_bytes, np.uint8)
-        image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+        image = await cv_scheduler.run("enrollment", cv2.imdecode, nparr, cv2.IMREAD_COLOR)
         
         if image is None:
             raise HTTPException(status_code=400, detail="Invalid image format")
         
-        # Detect faces
-        faces = cv_service.detect_faces(image)
+        # Detect faces (queued behind live attendance scans)
+        faces = await cv_scheduler.run("enrollment", cv_service.detect_faces, image)
         
         if not faces:
             return EnrollmentResponse(
@@ -76,15 +86,15 @@ async def enroll_student(
             )
         
         # Extract embedding
-        embedding = cv_service.extract_embedding(face)
+        embedding = await cv_scheduler.run("enrollment", cv_service.extract_embedding, face)
         
         # Store template (average with existing if not first pose)
-        template = cv_service.store_face_template(
+        template = await db.run_sync(lambda session: cv_service.store_face_template(
             student_id=student_id,
             embedding=embedding,
-            db=db,
+            db=session,
             overwrite=(pose_index == 0)
-        )
+        ))
         
         return EnrollmentResponse(
             success=True,
@@ -106,17 +116,17 @@ async def enroll_student(
 @router.get("/status/{student_id}", response_model=EnrollmentResponse)
 async def get_enrollment_status(
     student_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Get enrollment status for a student"""
     try:
         # Verify student exists
-        student = db.query(Student).filter(Student.id == student_id).first()
+        student = await db.get(Student, student_id)
         if not student:
             raise HTTPException(status_code=404, detail="Student not found")
         
         # Check if enrolled
-        template = cv_service.get_face_template(student_id, db)
+        template = await db.run_sync(lambda session: cv_service.get_face_template(student_id, session))
         
         if template:
             return EnrollmentResponse(
@@ -148,17 +158,17 @@ async def get_enrollment_status(
 @router.delete("/unenroll/{student_id}")
 async def unenroll_student(
     student_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Unenroll a student (delete face template)"""
     try:
         # Verify student exists
-        student = db.query(Student).filter(Student.id == student_id).first()
+        student = await db.get(Student, student_id)
         if not student:
             raise HTTPException(status_code=404, detail="Student not found")
         
         # Delete template
-        success = cv_service.delete_face_template(student_id, db)
+        success = await db.run_sync(lambda session: cv_service.delete_face_template(student_id, session))
         
         return {
             "success": success,
@@ -178,16 +188,16 @@ async def unenroll_student(
 @router.get("/list/{class_id}", response_model=EnrollmentListResponse)
 async def get_enrollment_list(
     class_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Get enrollment status for all students in a class"""
     try:
         # Get all students in class
-        students = db.query(Student).filter(Student.class_id == class_id).all()
+        students = (await db.scalars(select(Student).where(Student.class_id == class_id))).all()
         
         enrollment_data = []
         for student in students:
-            template = cv_service.get_face_template(student.id, db)
+            template = await db.run_sync(lambda session: cv_service.get_face_template(student.id, session))
             enrollment_data.append({
                 "student_id": student.id,
                 "first_name": student.first_name,
@@ -213,11 +223,11 @@ async def get_enrollment_list(
 @router.get("/progress/{class_id}", response_model=EnrollmentProgressResponse)
 async def get_enrollment_progress(
     class_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Get enrollment progress for a class"""
     try:
-        students = db.query(Student).filter(Student.class_id == class_id).all()
+        students = (await db.scalars(select(Student).where(Student.class_id == class_id))).all()
         
         if not students:
             return EnrollmentProgressResponse(
@@ -230,7 +240,7 @@ async def get_enrollment_progress(
         # Count enrolled students
         enrolled_count = 0
         for student in students:
-            template = cv_service.get_face_template(student.id, db)
+            template = await db.run_sync(lambda session: cv_service.get_face_template(student.id, session))
             if template:
                 enrolled_count += 1
         
@@ -252,10 +262,10 @@ async def get_enrollment_progress(
 
 
 @router.get("/stats")
-async def get_cv_statistics(db: Session = Depends(get_db)):
+async def get_cv_statistics(db: AsyncSession = Depends(get_async_db)):
     """Get CV system statistics"""
     try:
-        stats = cv_service.get_statistics(db)
+        stats = await db.run_sync(cv_service.get_statistics)
         return {
             "success": True,
             "data": stats,
@@ -265,3 +275,61 @@ async def get_cv_statistics(db: Session = Depends(get_db)):
             status_code=500,
             detail=f"Failed to get statistics: {str(e)}"
         )
+
+
+@router.get("/gallery/{class_id}/bundle")
+async def get_gallery_bundle(
+    class_id: str,
+    dtype: str = Query("float16", description="Embedding dtype: 'float16' or 'int8'"),
+    since: Optional[int] = Query(None, ge=0, description="Gallery version to build a delta from"),
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Download a compact binary gallery bundle for on-device matching.
+    
+    Args:
+        class_id: Class whose face templates to bundle
+        dtype: Embedding matrix dtype ('float16' or 'int8' with per-row scales)
+        since: Optional version from a previous bundle; only students whose templates
+            changed or were deleted since then are sent
+    
+    Returns:
+        application/octet-stream bundle with ETag and X-Gallery-Version headers,
+        or 304 when If-None-Match matches the current bundle
+    """
+    if dtype not in GalleryService.SUPPORTED_DTYPES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid dtype: {dtype}. Use one of {', '.join(GalleryService.SUPPORTED_DTYPES)}"
+        )
+    
+    try:
+        def gallery_state(session):
+            service = GalleryService(session, embedding_dim=cv_service.embedding_dim)
+            return service, service.get_gallery_state(class_id)
+        
+        service, state = await db.run_sync(gallery_state)
+        etag = service.compute_etag(class_id, state, dtype, since)
+        headers = {
+            "ETag": etag,
+            "X-Gallery-Version": str(state["version"]),
+            "Cache-Control": "no-cache",
+        }
+        
+        if if_none_match and if_none_match == etag:
+            return Response(status_code=304, headers=headers)
+        
+        # Bulk work: queued behind live scans and enrollment captures
+        bundle = await cv_scheduler.run("batch", _build_gallery_bundle, class_id, dtype, since, state)
+        return Response(
+            content=bundle,
+            media_type="application/octet-stream",
+            headers=headers,
+        )
+    
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to build gallery bundle: {str(e)}"
+        )
@@ -1,11 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from datetime import datetime
 import os
 import uuid
 
-from app.core.database import get_db
+from app.core.database import get_async_db
 from app.models.attendance import EvidenceMedia
 from app.schemas.evidence import EvidenceUploadResponse
 
@@ -16,7 +16,7 @@ async def upload_evidence(
     file: UploadFile = File(...),
     student_id: str = None,
     teacher_id: str = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Upload evidence media with automatic redaction"""
     # Placeholder - file upload and redaction logic needed
@@ -30,8 +30,8 @@ async def upload_evidence(
         retention_days=30
     )
     db.add(evidence)
-    db.commit()
-    db.refresh(evidence)
+    await db.commit()
+    await db.refresh(evidence)
     
     return EvidenceUploadResponse(
         id=evidence.id,
@@ -1,11 +1,12 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from datetime import datetime, timedelta
 
-from app.core.database import get_db
-from app.models.attendance import AttendanceRecord, Student
-from app.schemas.insights import AttendanceInsightResponse, InsightPattern
+from app.schemas.insights import AttendanceInsightResponse
+from app.services.analytics_service import school_day_window
+from app.services.insight_service import InsightService
+from app.services.report_cache import report_cache
 
 router = APIRouter()
 
@@ -14,36 +15,23 @@ async def get_attendance_insights(
     class_id: str,
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
-    db: Session = Depends(get_db)
 ):
-    """Get attendance insights for a class"""
-    start = datetime.fromisoformat(start_date) if start_date else datetime.utcnow() - timedelta(days=30)
-    end = datetime.fromisoformat(end_date) if end_date else datetime.utcnow()
+    """
+    Get attendance insights for a class
     
-    total_students = db.query(Student).filter(Student.class_id == class_id).count()
-    attendance_records = db.query(AttendanceRecord).join(Student).filter(
-        Student.class_id == class_id,
-        AttendanceRecord.scan_time >= start,
-        AttendanceRecord.scan_time <= end
-    ).all()
+    Computed from per-student, per-day aggregates and cached per class, range
+    and data version. The default range is the last 30 school days.
+    """
+    if start_date or end_date:
+        start = datetime.fromisoformat(start_date) if start_date else datetime.utcnow() - timedelta(days=30)
+        end = datetime.fromisoformat(end_date) if end_date else datetime.utcnow()
+    else:
+        start, end = school_day_window(30)
     
-    total_days = (end - start).days or 1
-    attendance_rate = (len(attendance_records) / (total_students * total_days * 1.0) * 100) if total_students > 0 else 0
-    
-    patterns = [
-        InsightPattern(
-            type="high_engagement",
-            description=f"{len(attendance_records)} attendance scans recorded",
-            confidence=0.95,
-            explanation="Strong class engagement detected with consistent attendance tracking."
+    async def compute(db: AsyncSession):
+        insights = await db.run_sync(
+            lambda session: InsightService(session).get_attendance_insights(class_id, start, end)
         )
-    ]
+        return AttendanceInsightResponse(**insights)
     
-    return AttendanceInsightResponse(
-        total_students=total_students,
-        attendance_rate=attendance_rate,
-        total_scans=len(attendance_records),
-        date_range_days=total_days,
-        patterns=patterns
-    )
-
+    return await report_cache.get_or_compute_async("insights", class_id, start, end, compute)
@@ -1,10 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 from datetime import datetime
 import uuid
 
-from app.core.database import get_db
+from app.core.database import get_async_db
 from app.models.attendance import Student
 from app.schemas.messaging import DigestRequest, DigestResponse, DigestContent, MessageStatus
 
@@ -13,10 +13,10 @@ router = APIRouter()
 @router.post("/digest", response_model=DigestResponse)
 async def send_parent_digest(
     request: DigestRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Send nightly digest to parent"""
-    student = db.query(Student).filter(Student.id == request.student_id).first()
+    student = await db.get(Student, request.student_id)
     if not student:
         raise HTTPException(status_code=404, detail="Student not found")
     
@@ -15,13 +15,14 @@ KEY PRINCIPLES:
 """
 
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timedelta, date
 from typing import Optional
 
-from app.core.database import get_db
-from app.services.analytics_service import AnalyticsService
+from app.core.database import get_async_db
+from app.services.analytics_service import AnalyticsService, async_analytics, school_day_window
 from app.services.export_service import ExportService
+from app.services.report_cache import report_cache
 from app.schemas.reports import (
     AttendanceStatsResponse,
     StudentAttendanceSummaryResponse,
@@ -34,6 +35,8 @@ from app.schemas.reports import (
 
 router = APIRouter(prefix="/api/v1/reports", tags=["reports"])
 
+DEFAULT_REPORT_DAYS = 30
+
 
 # =============================================================================
 # HELPER FUNCTIONS
@@ -55,21 +58,26 @@ def parse_date(date_str: Optional[str]) -> Optional[datetime]:
 def get_date_range(
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
+    days: Optional[int] = None,
 ) -> tuple[datetime, datetime]:
     """
     Get date range for reports.
     
-    Default: last 30 days
+    Default: the last `days` (30) school days including today, on local day
+    boundaries so the range - and its cache entry - is the same all day
     """
+    if not start_date and not end_date:
+        return school_day_window(days or DEFAULT_REPORT_DAYS)
+    
     if end_date:
         end = parse_date(end_date)
     else:
-        end = datetime.utcnow()
+        end = school_day_window(1)[1]
     
     if start_date:
         start = parse_date(start_date)
     else:
-        start = end - timedelta(days=30)
+        start = end - timedelta(days=days or DEFAULT_REPORT_DAYS)
     
     if start > end:
         raise HTTPException(
@@ -93,8 +101,8 @@ def get_date_range(
 async def get_attendance_stats(
     start_date: Optional[str] = Query(None, description="Start date (ISO format, default: 30 days ago)"),
     end_date: Optional[str] = Query(None, description="End date (ISO format, default: today)"),
+    days: Optional[int] = Query(None, ge=1, le=366, description="Days ending today, used without start_date (default: 30)"),
     class_id: Optional[str] = Query(None, description="Optional class ID to filter"),
-    db: Session = Depends(get_db),
 ):
     """
     Get attendance statistics.
@@ -110,12 +118,14 @@ async def get_attendance_stats(
     - `attendance_rate`: Overall percentage (0-100)
     - `total_students`: Unique students in range
     """
-    start, end = get_date_range(start_date, end_date)
-    
-    service = AnalyticsService(db)
-    stats = service.get_attendance_stats(start, end, class_id)
+    start, end = get_date_range(start_date, end_date, days)
     
-    return AttendanceStatsResponse(**stats)
+    return await report_cache.get_or_compute_async(
+        "stats", class_id, start, end,
+        async_analytics(lambda service: AttendanceStatsResponse(
+            **service.get_attendance_stats(start, end, class_id)
+        )),
+    )
 
 
 @router.get(
@@ -127,8 +137,8 @@ async def get_attendance_stats(
 async def get_student_summaries(
     start_date: Optional[str] = Query(None, description="Start date (ISO format)"),
     end_date: Optional[str] = Query(None, description="End date (ISO format)"),
+    days: Optional[int] = Query(None, ge=1, le=366, description="Days ending today, used without start_date (default: 30)"),
     class_id: Optional[str] = Query(None, description="Optional class ID to filter"),
-    db: Session = Depends(get_db),
 ):
     """
     Get per-student attendance summaries.
@@ -138,39 +148,46 @@ async def get_student_summaries(
     - `students_at_risk`: Count of students below 80% attendance
     - `at_risk`: Boolean indicating if student is at risk (< 80% attendance)
     """
-    start, end = get_date_range(start_date, end_date)
+    start, end = get_date_range(start_date, end_date, days)
     
-    service = AnalyticsService(db)
-    data = service.get_student_summaries(start, end, class_id)
-    
-    return StudentAttendanceSummaryResponse(**data)
+    return await report_cache.get_or_compute_async(
+        "student_summaries", class_id, start, end,
+        async_analytics(lambda service: StudentAttendanceSummaryResponse(
+            **service.get_student_summaries(start, end, class_id)
+        )),
+    )
 
 
 @router.get(
     "/daily-trends",
     response_model=DailyTrendResponse,
     summary="Daily attendance trends",
-    description="Get daily attendance data for charting",
+    description="Get daily, weekly or monthly attendance data for charting",
 )
 async def get_daily_trends(
     start_date: Optional[str] = Query(None, description="Start date (ISO format)"),
     end_date: Optional[str] = Query(None, description="End date (ISO format)"),
+    days: Optional[int] = Query(None, ge=1, le=366, description="Days ending today, used without start_date (default: 30)"),
     class_id: Optional[str] = Query(None, description="Optional class ID to filter"),
-    db: Session = Depends(get_db),
+    granularity: str = Query("day", pattern="^(day|week|month)$", description="Bucket size: day, week or month"),
 ):
     """
-    Get daily attendance trends for visualization.
+    Get attendance trends for visualization.
     
     **Returns:**
-    - `trends`: List of daily data points with attendance counts
-    - One entry per day with present/absent/tardy counts
+    - `trends`: List of data points with attendance counts
+    - One entry per day (or week/month) with present/absent/tardy counts,
+      bucketed in the school's timezone
     """
-    start, end = get_date_range(start_date, end_date)
-    
-    service = AnalyticsService(db)
-    data = service.get_daily_trends(start, end, class_id)
-    
-    return DailyTrendResponse(**data)
+    start, end = get_date_range(start_date, end_date, days)
+    
+    return await report_cache.get_or_compute_async(
+        "daily_trends", class_id, start, end,
+        async_analytics(lambda service: DailyTrendResponse(
+            **service.get_daily_trends(start, end, class_id, granularity=granularity)
+        )),
+        granularity=granularity,
+    )
 
 
 @router.get(
@@ -182,7 +199,7 @@ async def get_daily_trends(
 async def get_class_comparisons(
     start_date: Optional[str] = Query(None, description="Start date (ISO format)"),
     end_date: Optional[str] = Query(None, description="End date (ISO format)"),
-    db: Session = Depends(get_db),
+    days: Optional[int] = Query(None, ge=1, le=366, description="Days ending today, used without start_date (default: 30)"),
 ):
     """
     Compare attendance statistics across classes.
@@ -192,12 +209,14 @@ async def get_class_comparisons(
     - `highest_attendance_class`: Class ID with best attendance
     - `lowest_attendance_class`: Class ID with worst attendance
     """
-    start, end = get_date_range(start_date, end_date)
-    
-    service = AnalyticsService(db)
-    data = service.get_class_comparisons(start, end)
+    start, end = get_date_range(start_date, end_date, days)
     
-    return ClassComparisonResponse(**data)
+    return await report_cache.get_or_compute_async(
+        "class_comparisons", None, start, end,
+        async_analytics(lambda service: ClassComparisonResponse(
+            **service.get_class_comparisons(start, end)
+        )),
+    )
 
 
 # =============================================================================
@@ -213,8 +232,8 @@ async def get_class_comparisons(
 async def detect_patterns(
     start_date: Optional[str] = Query(None, description="Start date (ISO format)"),
     end_date: Optional[str] = Query(None, description="End date (ISO format)"),
+    days: Optional[int] = Query(None, ge=1, le=366, description="Days ending today, used without start_date (default: 30)"),
     class_id: Optional[str] = Query(None, description="Optional class ID to filter"),
-    db: Session = Depends(get_db),
 ):
     """
     Detect attendance patterns and generate recommendations.
@@ -224,12 +243,14 @@ async def detect_patterns(
     - `risk_level`: Overall risk assessment (low, medium, high)
     - `recommendations`: List of action recommendations
     """
-    start, end = get_date_range(start_date, end_date)
+    start, end = get_date_range(start_date, end_date, days)
     
-    service = AnalyticsService(db)
-    data = service.detect_patterns(start, end, class_id)
-    
-    return AttendancePatternsResponse(**data)
+    return await report_cache.get_or_compute_async(
+        "patterns", class_id, start, end,
+        async_analytics(lambda service: AttendancePatternsResponse(
+            **service.detect_patterns(start, end, class_id)
+        )),
+    )
 
 
 @router.get(
@@ -241,8 +262,8 @@ async def detect_patterns(
 async def get_performance_report(
     start_date: Optional[str] = Query(None, description="Start date (ISO format)"),
     end_date: Optional[str] = Query(None, description="End date (ISO format)"),
+    days: Optional[int] = Query(None, ge=1, le=366, description="Days ending today, used without start_date (default: 30)"),
     class_id: Optional[str] = Query(None, description="Optional class ID to filter"),
-    db: Session = Depends(get_db),
 ):
     """
     Generate comprehensive performance report.
@@ -253,12 +274,14 @@ async def get_performance_report(
     - `at_risk_students`: Students below 80% attendance
     - `trend`: Overall class trend (improving, stable, declining)
     """
-    start, end = get_date_range(start_date, end_date)
-    
-    service = AnalyticsService(db)
-    data = service.get_performance_report(start, end, class_id)
+    start, end = get_date_range(start_date, end_date, days)
     
-    return PerformanceReportResponse(**data)
+    return await report_cache.get_or_compute_async(
+        "performance", class_id, start, end,
+        async_analytics(lambda service: PerformanceReportResponse(
+            **service.get_performance_report(start, end, class_id)
+        )),
+    )
 
 
 # =============================================================================
@@ -274,8 +297,8 @@ async def get_performance_report(
 async def get_comprehensive_report(
     start_date: Optional[str] = Query(None, description="Start date (ISO format)"),
     end_date: Optional[str] = Query(None, description="End date (ISO format)"),
+    days: Optional[int] = Query(None, ge=1, le=366, description="Days ending today, used without start_date (default: 30)"),
     class_id: Optional[str] = Query(None, description="Optional class ID to filter"),
-    db: Session = Depends(get_db),
 ):
     """
     Get comprehensive report with all analytics.
@@ -285,50 +308,53 @@ async def get_comprehensive_report(
     - Useful for dashboard or full-page exports
     - Single request gets all data
     """
-    start, end = get_date_range(start_date, end_date)
-    
-    service = AnalyticsService(db)
-    
-    # Load all data in parallel-like fashion
-    stats = service.get_attendance_stats(start, end, class_id)
-    summaries = service.get_student_summaries(start, end, class_id)
-    trends = service.get_daily_trends(start, end, class_id)
-    performance = service.get_performance_report(start, end, class_id)
-    
-    # Class comparisons only if no class filter
-    comparisons = None
-    if not class_id:
-        comparisons = service.get_class_comparisons(start, end)
-    
-    # Patterns only if meaningful data
-    patterns = None
-    if summaries["total_students"] > 0:
-        patterns = service.detect_patterns(start, end, class_id)
-    
-    # Period name
-    period_days = (end - start).days
-    if period_days == 1:
-        period = "Daily"
-    elif period_days <= 7:
-        period = "Weekly"
-    elif period_days <= 30:
-        period = "Monthly"
-    else:
-        period = f"{period_days} Days"
+    start, end = get_date_range(start_date, end_date, days)
+    
+    def build(service: AnalyticsService) -> ComprehensiveReportResponse:
+        # Every section is derived from one shared per-student/per-day dataset
+        report = service.report_context(start, end, class_id)
+        
+        stats = report.get_attendance_stats()
+        summaries = report.get_student_summaries()
+        trends = report.get_daily_trends()
+        performance = report.get_performance_report()
+        
+        # Class comparisons only if no class filter
+        comparisons = None
+        if not class_id:
+            comparisons = report.get_class_comparisons()
+        
+        # Patterns only if meaningful data
+        patterns = None
+        if summaries["total_students"] > 0:
+            patterns = report.detect_patterns()
+        
+        # Period name
+        period_days = (end - start).days
+        if period_days == 1:
+            period = "Daily"
+        elif period_days <= 7:
+            period = "Weekly"
+        elif period_days <= 30:
+            period = "Monthly"
+        else:
+            period = f"{period_days} Days"
+        
+        return ComprehensiveReportResponse(
+            report_id=f"rpt_{start.timestamp():.0f}_{end.timestamp():.0f}",
+            generated_at=datetime.utcnow(),
+            period=period,
+            start_date=start.date(),
+            end_date=end.date(),
+            statistics=AttendanceStatsResponse(**stats),
+            student_summaries=StudentAttendanceSummaryResponse(**summaries),
+            daily_trends=DailyTrendResponse(**trends),
+            class_comparisons=ClassComparisonResponse(**comparisons) if comparisons else None,
+            patterns=AttendancePatternsResponse(**patterns) if patterns else None,
+            performance=PerformanceReportResponse(**performance),
+        )
     
-    return ComprehensiveReportResponse(
-        report_id=f"rpt_{start.timestamp():.0f}_{end.timestamp():.0f}",
-        generated_at=datetime.utcnow(),
-        period=period,
-        start_date=start.date(),
-        end_date=end.date(),
-        statistics=AttendanceStatsResponse(**stats),
-        student_summaries=StudentAttendanceSummaryResponse(**summaries),
-        daily_trends=DailyTrendResponse(**trends),
-        class_comparisons=ClassComparisonResponse(**comparisons) if comparisons else None,
-        patterns=AttendancePatternsResponse(**patterns) if patterns else None,
-        performance=PerformanceReportResponse(**performance),
-    )
+    return await report_cache.get_or_compute_async("comprehensive", class_id, start, end, async_analytics(build))
 
 
 # =============================================================================
@@ -344,7 +370,7 @@ async def export_to_csv(
     start_date: Optional[str] = Query(None),
     end_date: Optional[str] = Query(None),
     class_id: Optional[str] = Query(None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Export attendance report to CSV format.
@@ -355,10 +381,9 @@ async def export_to_csv(
     """
     start, end = get_date_range(start_date, end_date)
     
-    analytics = AnalyticsService(db)
-    export = ExportService(analytics)
-    
-    csv_content = export.generate_csv(start, end, class_id)
+    csv_content = await db.run_sync(
+        lambda session: ExportService(AnalyticsService(session)).generate_csv(start, end, class_id)
+    )
     
     # Generate filename
     period = (end - start).days
@@ -381,7 +406,7 @@ async def export_to_pdf(
     start_date: Optional[str] = Query(None),
     end_date: Optional[str] = Query(None),
     class_id: Optional[str] = Query(None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Export attendance report to PDF format.
@@ -394,11 +419,11 @@ async def export_to_pdf(
     """
     start, end = get_date_range(start_date, end_date)
     
-    analytics = AnalyticsService(db)
-    export = ExportService(analytics)
+    def build(session):
+        export = ExportService(AnalyticsService(session))
+        return export.generate_json_data(start, end, class_id), export.get_export_summary(start, end, class_id)
     
-    json_data = export.generate_json_data(start, end, class_id)
-    summary = export.get_export_summary(start, end, class_id)
+    json_data, summary = await db.run_sync(build)
     
     period = (end - start).days
     filename = f"attendance_report_{period}days_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.pdf"
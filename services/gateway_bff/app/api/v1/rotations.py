@@ -1,9 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from datetime import datetime
 
-from app.core.database import get_db
+from app.core.database import get_async_db
 from app.models.attendance import Rotation, RotationStudent
 from app.schemas.rotations import RotationCreateRequest, RotationResponse
 
@@ -12,7 +13,7 @@ router = APIRouter()
 @router.post("/", response_model=RotationResponse)
 async def create_rotation(
     request: RotationCreateRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new rotation"""
     rotation = Rotation(
@@ -25,8 +26,8 @@ async def create_rotation(
         status="scheduled"
     )
     db.add(rotation)
-    db.commit()
-    db.refresh(rotation)
+    await db.commit()
+    await db.refresh(rotation)
     return RotationResponse(**{
         "id": rotation.id,
         "name": rotation.name,
@@ -41,10 +42,10 @@ async def create_rotation(
 @router.get("/", response_model=List[RotationResponse])
 async def get_rotations(
     class_id: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get rotations for a class"""
-    rotations = db.query(Rotation).filter(Rotation.class_id == class_id).all()
+    rotations = (await db.scalars(select(Rotation).where(Rotation.class_id == class_id))).all()
     return [RotationResponse(**{
         "id": r.id,
         "name": r.name,
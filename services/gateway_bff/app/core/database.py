@@ -1,14 +1,45 @@
 from fastapi import FastAPI
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import redis
 
 from .config import settings
+from .db_pool import instrument_engine, pool_options
+
+# Async drivers of the sync URLs in DATABASE_URL
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+}
+
+def async_database_url(url: str) -> str:
+    """DATABASE_URL with its driver swapped for the asyncio one (asyncpg, aiosqlite)"""
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.drivername)
+    if driver is None:
+        return url
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
 
 # Database setup
-engine = create_engine(settings.DATABASE_URL)
+# Sync engine: scripts, background jobs and worker threads (OneRosterImporter,
+# prewarm, partition maintenance)
+engine = create_engine(settings.DATABASE_URL, **pool_options(settings.DATABASE_URL))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Async engine: request handlers, so a query awaits the database instead of
+# blocking the event loop
+async_engine = create_async_engine(
+    async_database_url(settings.DATABASE_URL), **pool_options(settings.DATABASE_URL, use_async=True)
+)
+# Objects stay readable after commit: an expired attribute would need a lazy
+# load, which AsyncSession cannot do implicitly
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+instrument_engine(engine, "sync")
+instrument_engine(async_engine.sync_engine, "async")
 Base = declarative_base()
 
 # Redis setup
@@ -21,6 +52,10 @@ def get_db():
     finally:
         db.close()
 
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
 async def init_db():
     # Create tables
     try:
@@ -30,3 +65,5 @@ async def init_db():
         print(f"❌ Database initialization error: {e}")
         raise
 
+async def close_db():
+    await async_engine.dispose()
@@ -0,0 +1,134 @@
+"""
+Connection pool settings and live pool metrics.
+
+Both engines (sync for scripts and background jobs, async for requests) get
+their pool size, overflow, checkout timeout, recycle age and pre-ping from
+Settings (DB_POOL_*); each worker process holds up to
+DB_POOL_SIZE + DB_POOL_MAX_OVERFLOW connections per engine.
+
+instrument_engine() reports, per pool (label pool=sync|async), through the
+/metrics endpoint:
+
+- db_pool_checked_out, db_pool_checked_in, db_pool_overflow, db_pool_size:
+  current pool state (gauges, read at snapshot time)
+- db_pool_wait_seconds: time a checkout waited for a connection (histogram)
+- db_pool_timeouts_total: checkouts that gave up after DB_POOL_TIMEOUT
+- db_pool_connection_age_seconds: age of each connection handed out
+  (histogram), db_pool_connection_age_max_seconds: oldest open connection
+- db_pool_connections_opened_total, db_pool_connections_invalidated_total:
+  connections opened (incl. recycles) and dropped as broken (incl. pre-ping)
+
+A pool that is often at DB_POOL_SIZE + DB_POOL_MAX_OVERFLOW with a growing
+wait histogram is too small for the load (or the database is slow); one that
+rarely checks out more than a few connections can shrink.
+"""
+
+import threading
+import time
+from typing import Dict
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from .config import settings
+from .metrics import metrics
+
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+AGE_BUCKETS = (1.0, 10.0, 60.0, 300.0, 900.0, 1800.0, 3600.0, 7200.0, 86400.0)
+
+
+class _TimedCheckout:
+    """Times how long a checkout waits for a connection"""
+
+    metrics_name = "default"
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            metrics.inc("db_pool_timeouts_total", pool=self.metrics_name)
+            raise
+        finally:
+            metrics.observe("db_pool_wait_seconds", time.perf_counter() - started,
+                            buckets=WAIT_BUCKETS, pool=self.metrics_name)
+
+    def recreate(self):
+        # engine.dispose() replaces the pool
+        pool = super().recreate()
+        pool.metrics_name = self.metrics_name
+        return pool
+
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+
+class TimedAsyncAdaptedQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    pass
+
+
+def pool_options(url: str, use_async: bool = False) -> Dict:
+    """create_engine / create_async_engine pool arguments from Settings"""
+    options = {
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+    }
+    if make_url(url).get_backend_name() == "sqlite":
+        # Development database: keep the dialect's own pool (no sizing)
+        return options
+    options.update(
+        poolclass=TimedAsyncAdaptedQueuePool if use_async else TimedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_POOL_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+    )
+    return options
+
+
+def instrument_engine(engine, name: str):
+    """Report the pool of a sync Engine (or AsyncEngine.sync_engine) as pool=`name`"""
+    engine.pool.metrics_name = name
+    opened: Dict[int, float] = {}
+    lock = threading.Lock()
+
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        connection_record.info["connected_at"] = time.monotonic()
+        with lock:
+            opened[id(connection_record)] = connection_record.info["connected_at"]
+        metrics.inc("db_pool_connections_opened_total", pool=name)
+
+    @event.listens_for(engine, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        connected_at = connection_record.info.get("connected_at")
+        if connected_at is not None:
+            metrics.observe("db_pool_connection_age_seconds", time.monotonic() - connected_at,
+                            buckets=AGE_BUCKETS, pool=name)
+
+    def forget(dbapi_connection, connection_record):
+        with lock:
+            opened.pop(id(connection_record), None)
+
+    event.listen(engine, "close", forget)
+    event.listen(engine, "detach", forget)
+
+    @event.listens_for(engine, "invalidate")
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        metrics.inc("db_pool_connections_invalidated_total", pool=name)
+
+    def collect():
+        pool = engine.pool
+        with lock:
+            oldest = min(opened.values(), default=None)
+        metrics.set("db_pool_connection_age_max_seconds",
+                    time.monotonic() - oldest if oldest is not None else 0.0, pool=name)
+        if isinstance(pool, QueuePool):
+            metrics.set("db_pool_size", pool.size(), pool=name)
+            metrics.set("db_pool_checked_out", pool.checkedout(), pool=name)
+            metrics.set("db_pool_checked_in", pool.checkedin(), pool=name)
+            metrics.set("db_pool_overflow", max(0, pool.overflow()), pool=name)
+
+    metrics.register_collector(collect)
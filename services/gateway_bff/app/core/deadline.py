@@ -0,0 +1,93 @@
+"""
+Request deadlines for multi-stage pipelines.
+
+A Deadline is created once per request and passed through every stage. CPU
+heavy stages run in a worker thread and are abandoned when the remaining
+budget runs out; later stages are never started once the deadline passed.
+"""
+
+import asyncio
+import functools
+import time
+from typing import Any, Callable, Optional
+
+from app.core.metrics import metrics
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a pipeline stage runs past the request deadline"""
+
+    def __init__(self, stage: str):
+        super().__init__(f"Deadline exceeded during '{stage}'")
+        self.stage = stage
+
+
+class Deadline:
+    """Absolute time budget for one request"""
+
+    def __init__(self, timeout_seconds: float, pipeline: str = "pipeline"):
+        self.timeout_seconds = timeout_seconds
+        self.pipeline = pipeline
+        self.expires_at = time.monotonic() + timeout_seconds
+
+    def remaining(self) -> float:
+        """Seconds left before the deadline (never negative)"""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    def check(self, stage: str):
+        """Raise DeadlineExceeded if no budget is left to start a stage"""
+        if self.expired:
+            self._record_timeout(stage)
+            raise DeadlineExceeded(stage)
+
+    def run_sync(self, stage: str, fn: Callable, *args, **kwargs) -> Any:
+        """Run a quick stage inline after checking the budget, timing it"""
+        self.check(stage)
+        started = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self._record_duration(stage, time.perf_counter() - started)
+
+    async def run(
+        self,
+        stage: str,
+        fn: Callable,
+        *args,
+        executor: Optional[Callable] = None,
+        **kwargs,
+    ) -> Any:
+        """
+        Run a blocking stage off the event loop, bounded by the remaining budget.
+
+        Args:
+            stage: Stage name used in metrics and DeadlineExceeded
+            fn: Blocking callable
+            executor: Optional coroutine function `(fn) -> result` used to run
+                the call; defaults to the loop's thread pool
+        """
+        self.check(stage)
+        call = functools.partial(fn, *args, **kwargs)
+        if executor is None:
+            work = asyncio.get_running_loop().run_in_executor(None, call)
+        else:
+            work = executor(call)
+
+        started = time.perf_counter()
+        try:
+            return await asyncio.wait_for(work, timeout=self.remaining())
+        except asyncio.TimeoutError:
+            self._record_timeout(stage)
+            raise DeadlineExceeded(stage)
+        finally:
+            self._record_duration(stage, time.perf_counter() - started)
+
+    def _record_timeout(self, stage: str):
+        metrics.inc(f"{self.pipeline}_stage_timeouts_total", stage=stage)
+
+    def _record_duration(self, stage: str, seconds: float):
+        metrics.observe(f"{self.pipeline}_stage_seconds", seconds, stage=stage)
@@ -0,0 +1,106 @@
+"""
+In-process metrics registry.
+
+Counters, gauges and histograms keyed by metric name plus labels, exposed as
+JSON from the /metrics endpoint. Collectors can be registered to report live
+values (e.g. queue depths) at snapshot time.
+"""
+
+import bisect
+import threading
+from typing import Callable, Dict, List, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class MetricsRegistry:
+    """Thread-safe store for counters, gauges and histograms"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._gauges: Dict[str, Dict[LabelKey, float]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, Dict]] = {}
+        self._collectors: List[Callable[[], None]] = []
+
+    def inc(self, name: str, value: float = 1.0, **labels):
+        """Increment a counter"""
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+
+    def set(self, name: str, value: float, **labels):
+        """Set a gauge"""
+        key = _label_key(labels)
+        with self._lock:
+            self._gauges.setdefault(name, {})[key] = value
+
+    def observe(self, name: str, value: float, buckets: Tuple[float, ...] = DEFAULT_BUCKETS, **labels):
+        """Record a histogram observation"""
+        key = _label_key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            hist = series.get(key)
+            if hist is None:
+                hist = {"buckets": buckets, "counts": [0] * (len(buckets) + 1), "count": 0, "sum": 0.0}
+                series[key] = hist
+            hist["counts"][bisect.bisect_left(hist["buckets"], value)] += 1
+            hist["count"] += 1
+            hist["sum"] += value
+
+    def get(self, name: str, **labels) -> float:
+        """Current value of a counter or gauge (0 if unset)"""
+        key = _label_key(labels)
+        with self._lock:
+            if name in self._counters:
+                return self._counters[name].get(key, 0.0)
+            return self._gauges.get(name, {}).get(key, 0.0)
+
+    def register_collector(self, collector: Callable[[], None]):
+        """Register a callable that updates gauges right before each snapshot"""
+        self._collectors.append(collector)
+
+    def snapshot(self) -> Dict:
+        """JSON-serializable view of every metric"""
+        for collector in list(self._collectors):
+            try:
+                collector()
+            except Exception as e:
+                print(f"❌ Metrics collector error: {e}")
+
+        with self._lock:
+            counters = {
+                name: [{"labels": dict(key), "value": value} for key, value in series.items()]
+                for name, series in self._counters.items()
+            }
+            gauges = {
+                name: [{"labels": dict(key), "value": value} for key, value in series.items()]
+                for name, series in self._gauges.items()
+            }
+            histograms = {}
+            for name, series in self._histograms.items():
+                histograms[name] = []
+                for key, hist in series.items():
+                    cumulative = 0
+                    buckets = {}
+                    for bound, count in zip(list(hist["buckets"]) + ["+Inf"], hist["counts"]):
+                        cumulative += count
+                        buckets[str(bound)] = cumulative
+                    histograms[name].append({
+                        "labels": dict(key),
+                        "count": hist["count"],
+                        "sum": round(hist["sum"], 6),
+                        "buckets": buckets,
+                    })
+
+        return {"counters": counters, "gauges": gauges, "histograms": histograms}
+
+
+metrics = MetricsRegistry()
@@ -0,0 +1,58 @@
+"""
+Keyset pagination and NDJSON streaming helpers.
+
+A page is fetched with `WHERE (sort key, id) after the cursor ORDER BY sort
+key, id LIMIT n`, so every page costs the same index range read however deep
+the client pages, and rows written meanwhile never shift later pages. The
+cursor is the last row's (sort key, id), base64url-encoded so clients treat
+it as opaque. List endpoints keep returning a JSON array and send the cursor
+of the next page in the X-Next-Cursor header (absent on the last page).
+"""
+
+import base64
+import json
+from datetime import date, datetime
+from typing import Any, AsyncIterable, AsyncIterator, Callable, Dict, List
+
+from fastapi import HTTPException
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+# Rows per fetch of a streamed query's server-side cursor
+STREAM_CHUNK_SIZE = 1000
+
+
+def _json_default(value: Any):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def encode_cursor(*values: Any) -> str:
+    payload = json.dumps(values, default=_json_default, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, *types: Callable[[Any], Any]) -> List[Any]:
+    """
+    Decode a cursor into values converted by `types` (one per value).
+
+    Raises:
+        HTTPException: 400 if the cursor was not issued by encode_cursor
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != len(types):
+            raise ValueError("wrong number of values")
+        return [convert(value) for convert, value in zip(types, values)]
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid cursor: {e}")
+
+
+async def ndjson_lines(rows: AsyncIterable[Dict]) -> AsyncIterator[bytes]:
+    """One JSON document per line"""
+    async for row in rows:
+        yield json.dumps(row, default=_json_default).encode() + b"\n"
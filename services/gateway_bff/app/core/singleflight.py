@@ -0,0 +1,54 @@
+"""
+Single-flight execution for asyncio.
+
+Concurrent callers asking for the same key share one in-flight call instead
+of each running it. The call runs as its own task, so a caller that goes
+away (e.g. client disconnect) does not cancel the work for the others.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+from app.core.metrics import metrics
+
+
+class SingleFlight:
+    """Coalesce concurrent calls with the same key within one event loop"""
+
+    def __init__(self, name: str = "singleflight"):
+        self.name = name
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]], **labels) -> Tuple[Any, bool]:
+        """
+        Run `fn` once for all concurrent callers with the same key.
+
+        Args:
+            key: Identity of the call
+            fn: Coroutine function producing the result
+            **labels: Metric labels
+
+        Returns:
+            (result, shared) where shared is True for callers that joined a
+            call already in flight
+        """
+        task = self._inflight.get(key)
+        shared = task is not None
+        if shared:
+            metrics.inc(f"{self.name}_coalesced_total", **labels)
+        else:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+            metrics.inc(f"{self.name}_calls_total", **labels)
+        return await asyncio.shield(task), shared
+
+    def _forget(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the exception as retrieved when every caller went away
+        if not task.cancelled():
+            task.exception()
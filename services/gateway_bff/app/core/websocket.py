@@ -1,14 +1,17 @@
 from fastapi import WebSocket
-from typing import List, Dict
+from typing import List, Dict, Optional
+import asyncio
 import json
 
 class ConnectionManager:
     def __init__(self):
         self.active_connections: List[WebSocket] = []
         self.user_connections: Dict[str, List[WebSocket]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
 
     async def connect(self, websocket: WebSocket, user_id: str = None):
         await websocket.accept()
+        self._loop = asyncio.get_running_loop()
         self.active_connections.append(websocket)
         
         if user_id:
@@ -51,3 +54,25 @@ class ConnectionManager:
             for conn in disconnected:
                 self.disconnect(conn, user_id)
 
+    def notify_user(self, user_id: str, message: dict) -> bool:
+        """
+        Schedule send_to_user from any thread (e.g. sync database hooks).
+        
+        Returns False when the user has no open connection in this process.
+        """
+        if self._loop is None or self._loop.is_closed() or not self.user_connections.get(user_id):
+            return False
+        coroutine = self.send_to_user(user_id, message)
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            self._loop.create_task(coroutine)
+        else:
+            asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+        return True
+
+
+# Shared by the /ws endpoint and services that push notifications
+manager = ConnectionManager()
@@ -1,12 +1,15 @@
 """Database models"""
 
-from app.models.attendance import Student, AttendanceRecord, FaceTemplate, Rotation, RotationStudent, EvidenceMedia, Teacher, ConsentAudit
+from app.models.attendance import Student, AttendanceRecord, AttendanceDailyRollup, StudentAttendanceRisk, FaceTemplate, FaceTemplateTombstone, Rotation, RotationStudent, EvidenceMedia, Teacher, ConsentAudit
 from app.models.classes import Class
 
 __all__ = [
     "Student",
     "AttendanceRecord",
+    "AttendanceDailyRollup",
+    "StudentAttendanceRisk",
     "FaceTemplate",
+    "FaceTemplateTombstone",
     "Rotation",
     "RotationStudent",
     "EvidenceMedia",
@@ -14,3 +17,12 @@ __all__ = [
     "ConsentAudit",
     "Class",
 ]
+
+# Session write hooks that keep derived data current. They are registered
+# here, next to the models, so every process that writes them (API, scripts,
+# OneRosterImporter) maintains the rollup, the at-risk index and the gallery
+# tombstones and invalidates cached reports.
+import app.services.attendance_rollup  # noqa: E402,F401
+import app.services.attendance_risk  # noqa: E402,F401
+import app.services.gallery_service  # noqa: E402,F401
+import app.services.report_cache  # noqa: E402,F401
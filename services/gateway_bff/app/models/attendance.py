@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Float, Text, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, Date, DateTime, Float, Text, Boolean, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
@@ -10,7 +10,7 @@ class Student(Base):
     id = Column(String, primary_key=True)
     first_name = Column(String, nullable=False)
     last_name = Column(String, nullable=False)
-    class_id = Column(String, ForeignKey("classes.id"), nullable=False)
+    class_id = Column(String, ForeignKey("classes.id"), nullable=False, index=True)
     grade_level = Column(String)
     parent_email = Column(String)
     enrollment_date = Column(DateTime, default=datetime.utcnow)
@@ -20,8 +20,15 @@ class Student(Base):
     attendance_records = relationship("AttendanceRecord", back_populates="student")
     face_templates = relationship("FaceTemplate", back_populates="student")
     class_obj = relationship("Class", back_populates="students", foreign_keys=[class_id])
+    
+    __table_args__ = (
+        # Keyset pagination of the roster
+        Index("ix_students_last_name_id", "last_name", "id"),
+    )
 
 class AttendanceRecord(Base):
+    # Partitioned by month on PostgreSQL (primary key (id, scan_time)),
+    # see app/services/attendance_partitions.py
     __tablename__ = "attendance_records"
     
     id = Column(Integer, primary_key=True, index=True)
@@ -34,12 +41,56 @@ class AttendanceRecord(Base):
     
     # Relationships
     student = relationship("Student", back_populates="attendance_records")
+    
+    __table_args__ = (
+        # Report ranges, and one student's records in a range
+        Index("ix_attendance_records_scan_time", "scan_time"),
+        Index("ix_attendance_records_student_id_scan_time", "student_id", "scan_time"),
+    )
+
+class AttendanceDailyRollup(Base):
+    """Per-day attendance counts, maintained on every attendance write"""
+    __tablename__ = "attendance_daily_rollup"
+    
+    class_id = Column(String, primary_key=True)
+    student_id = Column(String, primary_key=True)
+    day = Column(Date, primary_key=True)  # Local date in SCHOOL_TIMEZONE
+    status = Column(String, primary_key=True)  # Normalized: lower-case, "unknown" if empty
+    count = Column(Integer, nullable=False, default=0)
+    first_scan = Column(DateTime)
+    last_scan = Column(DateTime)
+    
+    __table_args__ = (
+        Index("ix_attendance_daily_rollup_student_day", "student_id", "day"),
+        Index("ix_attendance_daily_rollup_day", "day"),
+    )
+
+class StudentAttendanceRisk(Base):
+    """Rolling attendance counters and at-risk flag per student, maintained on every attendance write"""
+    __tablename__ = "student_attendance_risk"
+    
+    student_id = Column(String, ForeignKey("students.id"), primary_key=True)
+    class_id = Column(String, nullable=False)
+    window_start = Column(Date, nullable=False)  # First local date counted
+    total_records = Column(Integer, nullable=False, default=0)
+    present_records = Column(Integer, nullable=False, default=0)
+    at_risk = Column(Boolean, nullable=False, default=False)
+    at_risk_since = Column(DateTime)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        # The per-class at-risk set; partial, so it only holds at-risk students
+        Index(
+            "ix_student_attendance_risk_class_at_risk", "class_id",
+            postgresql_where=at_risk.is_(True), sqlite_where=at_risk.is_(True),
+        ),
+    )
 
 class FaceTemplate(Base):
     __tablename__ = "face_templates"
     
     id = Column(Integer, primary_key=True, index=True)
-    student_id = Column(String, ForeignKey("students.id"), nullable=False)
+    student_id = Column(String, ForeignKey("students.id"), nullable=False, index=True)
     embedding_data = Column(Text, nullable=False)  # Pickled embedding
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow)
@@ -47,6 +98,20 @@ class FaceTemplate(Base):
     # Relationships
     student = relationship("Student", back_populates="face_templates")
 
+class FaceTemplateTombstone(Base):
+    """Deleted face templates, recorded on delete so gallery deltas can drop them"""
+    __tablename__ = "face_template_tombstones"
+    
+    id = Column(Integer, primary_key=True)
+    template_id = Column(Integer, nullable=False)
+    student_id = Column(String, nullable=False)
+    class_id = Column(String)  # The student's class when the template was deleted
+    deleted_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    
+    __table_args__ = (
+        Index("ix_face_template_tombstones_class_deleted", "class_id", "deleted_at"),
+    )
+
 class Rotation(Base):
     __tablename__ = "rotations"
     
@@ -1,6 +1,6 @@
 """Class model for database"""
 
-from sqlalchemy import Column, String, DateTime, Boolean, Text, ForeignKey, Integer
+from sqlalchemy import Column, String, DateTime, Boolean, Text, ForeignKey, Integer, Index, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
@@ -27,6 +27,14 @@ class Class(Base):
     # Relationships
     students = relationship("Student", foreign_keys="Student.class_id", back_populates="class_obj")
     
+    __table_args__ = (
+        # A teacher's active classes; partial, so it only holds active classes
+        Index(
+            "ix_classes_teacher_id_active", "teacher_id",
+            postgresql_where=text("is_active"), sqlite_where=text("is_active"),
+        ),
+    )
+    
     def to_dict(self):
         """Convert to dictionary"""
         return {
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, Index
 from datetime import datetime
 
 from app.core.database import Base
@@ -17,6 +17,11 @@ class ConsentRecord(Base):
     user_agent = Column(Text)
     consent_text = Column(Text)
     version = Column(String)  # Version of consent text
+    
+    __table_args__ = (
+        # Latest consent of a type for a student
+        Index("ix_consent_records_student_id_consent_type_granted_at", "student_id", "consent_type", "granted_at"),
+    )
 
 class AuditLog(Base):
     __tablename__ = "audit_logs"
@@ -18,6 +18,8 @@ class AttendanceScanResponse(BaseModel):
     detected_students: List[DetectedStudent]
     total_detected: int
     scan_time: datetime
+    partial: bool = False  # True when the scan deadline cut processing short
+    timed_out_stage: Optional[str] = None
 
 class StudentResponse(BaseModel):
     id: str
@@ -80,3 +80,22 @@ class ClassSchedule(BaseModel):
     start_time: str  # HH:MM format
     end_time: str  # HH:MM format
     location: Optional[str] = None
+
+
+class AtRiskStudent(BaseModel):
+    """Student below the attendance threshold in the rolling window"""
+    student_id: str
+    student_name: str
+    attendance_rate: float = Field(..., description="Percentage of records marked present (0-100)")
+    present_records: int
+    total_records: int
+    at_risk_since: Optional[datetime] = None
+
+
+class AtRiskStudentsResponse(BaseModel):
+    """At-risk students of a class, read from the at-risk index"""
+    class_id: str
+    window_days: int
+    threshold: float
+    total: int
+    students: List[AtRiskStudent]
@@ -7,11 +7,33 @@ class InsightPattern(BaseModel):
     confidence: float
     explanation: str
 
+class RateDistribution(BaseModel):
+    """Distribution of per-student attendance rates (0-100)"""
+    min: float
+    p10: float
+    p25: float
+    median: float
+    p75: float
+    p90: float
+    max: float
+    mean: float
+
+class StudentTrendInsight(BaseModel):
+    student_id: str
+    student_name: str
+    first_half_rate: float
+    second_half_rate: float
+    change: float  # Percentage points, second half minus first half
+
 class AttendanceInsightResponse(BaseModel):
     total_students: int
-    attendance_rate: float
+    attendance_rate: float  # Share of student x school days attended
     total_scans: int
     date_range_days: int
+    school_days: int = 0  # Days with at least one scan in the class
+    distribution: Optional[RateDistribution] = None
+    most_improved: List[StudentTrendInsight] = []
+    most_declined: List[StudentTrendInsight] = []
     patterns: List[InsightPattern]
 
 class RotationInsightResponse(BaseModel):
@@ -105,7 +105,7 @@ class StudentAttendanceSummaryResponse(BaseModel):
 # =============================================================================
 
 class DailyTrendPoint(BaseModel):
-    """Single day's attendance trend data"""
+    """Single day's (or week's/month's) attendance trend data"""
     date: date
     present_count: int
     absent_count: int
@@ -117,6 +117,9 @@ class DailyTrendPoint(BaseModel):
 class DailyTrendResponse(BaseModel):
     """Daily attendance trends for charting"""
     trends: List[DailyTrendPoint]
+    granularity: str = Field(
+        default="day", description="Bucket size: 'day', 'week' or 'month'"
+    )
     total_records: int
     date_range_days: int
     start_date: date
@@ -143,6 +146,7 @@ class DailyTrendResponse(BaseModel):
                         "attendance_percentage": 88.0
                     }
                 ],
+                "granularity": "day",
                 "total_records": 50,
                 "date_range_days": 30,
                 "start_date": "2024-11-01",
@@ -0,0 +1,6 @@
+"""Business logic services"""
+
+# app.models registers the Session write hooks of attendance_rollup,
+# attendance_risk and report_cache; loading it before any service keeps that
+# import order acyclic whichever module is imported first.
+import app.models  # noqa: F401
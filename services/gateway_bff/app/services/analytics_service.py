@@ -14,20 +14,146 @@ KEY PRINCIPLES:
 =============================================================================
 """
 
-from datetime import datetime, timedelta, date
-from typing import List, Dict, Tuple, Optional
+from datetime import datetime, timedelta, date, timezone
+from typing import Any, Awaitable, Callable, List, Dict, NamedTuple, Tuple, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, case, cast, and_, Date, literal_column
+from zoneinfo import ZoneInfo
+import numpy as np
 
-from app.models.attendance import AttendanceRecord, Student
+from app.core.config import settings
+from app.models.attendance import AttendanceDailyRollup, AttendanceRecord, Student
 from app.models.classes import Class as ClassModel
+from app.services.pattern_engine import StatusMatrix
+
+
+TREND_GRANULARITIES = ("day", "week", "month")
+RECENT_WINDOW_DAYS = 7
+
+
+def to_school_date(scan_time: datetime) -> date:
+    """Local calendar date in SCHOOL_TIMEZONE of a naive-UTC scan time"""
+    return scan_time.replace(tzinfo=timezone.utc).astimezone(
+        ZoneInfo(settings.SCHOOL_TIMEZONE)
+    ).date()
+
+
+def school_day_start(day: date) -> datetime:
+    """Naive-UTC instant at which a local school day starts"""
+    local = datetime.combine(day, datetime.min.time(), tzinfo=ZoneInfo(settings.SCHOOL_TIMEZONE))
+    return local.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def school_day_window(days: int, today: Optional[date] = None) -> Tuple[datetime, datetime]:
+    """
+    Naive-UTC (start, end) covering the last `days` local school days up to
+    and including today.
+    
+    Whole-day bounds keep report cache keys stable for the day, so the
+    nightly pre-warm and daytime dashboard requests share entries.
+    """
+    if today is None:
+        today = to_school_date(datetime.utcnow())
+    end_day = today + timedelta(days=1)
+    return school_day_start(end_day - timedelta(days=days)), school_day_start(end_day)
+
+
+def bucket_start(day: date, granularity: str) -> date:
+    """First day of the day/week/month bucket containing `day`"""
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    return day
+
+
+def sql_literal(value: str):
+    """
+    Inline a trusted string constant into SQL.
+    
+    Expressions used in both SELECT and GROUP BY must render identically; with
+    server-side bind parameters each occurrence would get its own placeholder.
+    """
+    return literal_column("'" + value.replace("'", "''") + "'")
+
+
+def normalized_status():
+    """SQL expression matching `(record.status or "unknown").lower()`"""
+    return func.lower(
+        func.coalesce(func.nullif(AttendanceRecord.status, sql_literal("")), sql_literal("unknown"))
+    )
+
+
+def async_analytics(section: Callable[["AnalyticsService"], Any]) -> Callable[[AsyncSession], Awaitable[Any]]:
+    """
+    report_cache compute running `section(AnalyticsService(...))` on the
+    AsyncSession it is given (the shared computation's own session, never
+    a request's).
+    
+    The service stays synchronous (scripts and the pre-warm use it with a
+    plain Session); run_sync drives it on the async connection, so its
+    queries await the database instead of blocking the event loop.
+    """
+    async def compute(db: AsyncSession):
+        return await db.run_sync(lambda session: section(AnalyticsService(session)))
+    return compute
+
+
+class ReportFact(NamedTuple):
+    """Attendance of one student on one local day with one stored status"""
+    student_id: Optional[str]
+    first_name: Optional[str]
+    last_name: Optional[str]
+    class_id: Optional[str]
+    day: date
+    status: Optional[str]  # as stored, not normalized
+    in_range: int  # records within [start, end]
+    recent: int  # records within the last RECENT_WINDOW_DAYS before end
+    last_scan: Optional[datetime]  # latest in-range scan time
 
 
 class AnalyticsService:
-    """Service for computing attendance analytics and statistics"""
+    """
+    Service for computing attendance analytics and statistics
+    
+    Engines:
+    - "sql": aggregate in the database (GROUP BY / COUNT), constant memory
+    - "rows": load ORM rows and aggregate in Python (reference implementation)
+    - "rollup": read attendance_daily_rollup (days x students rows); ranges
+      are widened to whole school days
+    - "numpy": load the range once into columnar arrays and aggregate with
+      bincount (see columnar_analytics)
+    """
+    
+    ENGINES = ("sql", "rows", "rollup", "numpy")
+    # Engines that build every section from one shared dataset
+    DATASET_ENGINES = ("rollup", "numpy")
     
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, engine: Optional[str] = None):
         self.db = db
+        self.engine = engine or settings.ANALYTICS_ENGINE
+        if self.engine not in self.ENGINES:
+            raise ValueError(f"Unknown analytics engine: {self.engine}")
+    
+    def _records_in_range(
+        self,
+        query,
+        start_date: datetime,
+        end_date: datetime,
+        class_id: Optional[str] = None,
+        student_joined: bool = False,
+    ):
+        """Apply the date range and optional class filter to an attendance query"""
+        query = query.filter(
+            AttendanceRecord.scan_time >= start_date,
+            AttendanceRecord.scan_time <= end_date,
+        )
+        if class_id:
+            if not student_joined:
+                query = query.join(Student, Student.id == AttendanceRecord.student_id)
+            query = query.filter(Student.class_id == class_id)
+        return query
     
     # =========================================================================
     # CORE STATISTICS
@@ -50,29 +176,44 @@ class AnalyticsService:
         Returns:
             Dictionary with attendance stats
         """
-        query = self.db.query(AttendanceRecord)
+        if self.engine in self.DATASET_ENGINES:
+            return self.report_context(start_date, end_date, class_id).get_attendance_stats()
+        if self.engine == "sql":
+            status_counts = self._status_counts_sql(start_date, end_date, class_id)
+        else:
+            status_counts = self._status_counts_rows(start_date, end_date, class_id)
         
-        # Filter by date range
-        query = query.filter(
-            AttendanceRecord.scan_time >= start_date,
-            AttendanceRecord.scan_time <= end_date,
-        )
+        total_students = self._total_students(start_date, end_date, class_id)
         
-        # Filter by class if provided
+        return self._build_stats(status_counts, total_students, start_date, end_date)
+    
+    def _total_students(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        class_id: Optional[str] = None,
+    ) -> int:
+        """Roster size of the class, or students with records in range"""
         if class_id:
-            query = query.join(Student).filter(
+            return self.db.query(Student).filter(
                 Student.class_id == class_id
-            )
-        
-        records = query.all()
-        
-        # Count by status
-        status_counts = {}
-        for record in records:
-            status = (record.status or "unknown").lower()
-            status_counts[status] = status_counts.get(status, 0) + 1
-        
-        total_records = len(records)
+            ).count()
+        return self.db.query(func.count(func.distinct(Student.id))).join(
+            AttendanceRecord
+        ).filter(
+            AttendanceRecord.scan_time >= start_date,
+            AttendanceRecord.scan_time <= end_date,
+        ).scalar() or 0
+    
+    def _build_stats(
+        self,
+        status_counts: Dict[str, int],
+        total_students: int,
+        start_date: datetime,
+        end_date: datetime,
+    ) -> Dict:
+        """Calculate totals and rates from per-status counts"""
+        total_records = sum(status_counts.values())
         present_count = status_counts.get("present", 0)
         absent_count = status_counts.get("absent", 0)
         tardy_count = status_counts.get("tardy", 0) + status_counts.get("late", 0)
@@ -81,20 +222,6 @@ class AnalyticsService:
         # Calculate rates
         attendance_rate = (present_count / total_records * 100) if total_records > 0 else 0
         
-        # Get unique students
-        total_students = 0
-        if class_id:
-            total_students = self.db.query(Student).filter(
-                Student.class_id == class_id
-            ).count()
-        else:
-            total_students = self.db.query(func.count(func.distinct(Student.id))).join(
-                AttendanceRecord
-            ).filter(
-                AttendanceRecord.scan_time >= start_date,
-                AttendanceRecord.scan_time <= end_date,
-            ).scalar() or 0
-        
         # Calculate average attendance rate per student
         average_attendance_rate = 0.0
         if total_students > 0 and total_records > 0:
@@ -116,6 +243,37 @@ class AnalyticsService:
             "total_students": total_students,
         }
     
+    def _status_counts_sql(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        class_id: Optional[str] = None,
+    ) -> Dict[str, int]:
+        """Count records per normalized status with one GROUP BY query"""
+        status = normalized_status()
+        query = self._records_in_range(
+            self.db.query(status, func.count(AttendanceRecord.id)),
+            start_date, end_date, class_id,
+        )
+        return {row[0]: row[1] for row in query.group_by(status).all()}
+    
+    def _status_counts_rows(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        class_id: Optional[str] = None,
+    ) -> Dict[str, int]:
+        """Count records per normalized status by loading every row"""
+        records = self._records_in_range(
+            self.db.query(AttendanceRecord), start_date, end_date, class_id
+        ).all()
+        
+        status_counts = {}
+        for record in records:
+            status = (record.status or "unknown").lower()
+            status_counts[status] = status_counts.get(status, 0) + 1
+        return status_counts
+    
     # =========================================================================
     # STUDENT SUMMARIES
     # =========================================================================
@@ -132,32 +290,74 @@ class AnalyticsService:
         Returns:
             Dictionary with per-student summaries and risk assessment
         """
-        query = self.db.query(AttendanceRecord).filter(
-            AttendanceRecord.scan_time >= start_date,
-            AttendanceRecord.scan_time <= end_date,
-        )
+        if self.engine in self.DATASET_ENGINES:
+            return self.report_context(start_date, end_date, class_id).get_student_summaries()
+        if self.engine == "sql":
+            rows = self._student_counts_sql(start_date, end_date, class_id)
+        else:
+            rows = self._student_counts_rows(start_date, end_date, class_id)
         
-        if class_id:
-            query = query.join(Student).filter(
-                Student.class_id == class_id
-            )
+        return self._build_student_summaries(rows, start_date, end_date)
+    
+    def _student_counts_sql(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        class_id: Optional[str] = None,
+    ) -> List[Dict]:
+        """Per-student status counts and last scan with one GROUP BY student_id query"""
+        status = normalized_status()
         
-        records = query.all()
+        def count_status(*values):
+            return func.sum(case((status.in_(values), 1), else_=0))
         
-        # Group by student
-        student_data: Dict[str, Dict] = {}
+        query = self.db.query(
+            AttendanceRecord.student_id,
+            Student.first_name,
+            Student.last_name,
+            count_status("present"),
+            count_status("absent"),
+            count_status("tardy", "late"),
+            count_status("excused"),
+            func.max(AttendanceRecord.scan_time),
+        ).outerjoin(Student, Student.id == AttendanceRecord.student_id)
+        query = self._records_in_range(query, start_date, end_date, class_id, student_joined=True)
+        query = query.group_by(
+            AttendanceRecord.student_id, Student.first_name, Student.last_name
+        )
+        
+        return [
+            {
+                "student_id": student_id or "unknown",
+                "student_name": f"{first_name} {last_name}" if first_name is not None else "Unknown",
+                "present_days": int(present or 0),
+                "absent_days": int(absent or 0),
+                "tardy_days": int(tardy or 0),
+                "excused_days": int(excused or 0),
+                "last_attendance_date": last_scan,
+            }
+            for student_id, first_name, last_name, present, absent, tardy, excused, last_scan in query.all()
+        ]
+    
+    def _student_counts_rows(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        class_id: Optional[str] = None,
+    ) -> List[Dict]:
+        """Per-student status counts by loading every row"""
+        records = self._records_in_range(
+            self.db.query(AttendanceRecord), start_date, end_date, class_id
+        ).all()
         
+        student_data: Dict[str, Dict] = {}
         for record in records:
             student_id = record.student_id or "unknown"
             
             if student_id not in student_data:
-                student = self.db.query(Student).filter(
-                    Student.id == student_id
-                ).first()
-                
                 student_data[student_id] = {
                     "student_id": student_id,
-                    "student_name": student.name if student else "Unknown",
+                    "student_name": "Unknown",
                     "present_days": 0,
                     "absent_days": 0,
                     "tardy_days": 0,
@@ -181,11 +381,26 @@ class AnalyticsService:
             if last is None or record_date > last:
                 student_data[student_id]["last_attendance_date"] = record_date
         
-        # Calculate rates and identify at-risk
+        if student_data:
+            students = self.db.query(Student).filter(
+                Student.id.in_(list(student_data.keys()))
+            ).all()
+            for student in students:
+                student_data[student.id]["student_name"] = f"{student.first_name} {student.last_name}"
+        
+        return list(student_data.values())
+    
+    def _build_student_summaries(
+        self,
+        rows: List[Dict],
+        start_date: datetime,
+        end_date: datetime,
+    ) -> Dict:
+        """Calculate rates and at-risk flags from per-student counts"""
         summaries = []
         at_risk_count = 0
         
-        for student_id, data in student_data.items():
+        for data in rows:
             total = (
                 data["present_days"] + data["absent_days"] + 
                 data["tardy_days"] + data["excused_days"]
@@ -198,7 +413,7 @@ class AnalyticsService:
                 at_risk_count += 1
             
             summaries.append({
-                "student_id": student_id,
+                "student_id": data["student_id"],
                 "student_name": data["student_name"],
                 "total_days": total,
                 "present_days": data["present_days"],
@@ -233,70 +448,117 @@ class AnalyticsService:
         start_date: datetime,
         end_date: datetime,
         class_id: Optional[str] = None,
+        granularity: str = "day",
     ) -> Dict:
         """
-        Get daily attendance trends for charting.
+        Get attendance trends for charting.
+        
+        Records are bucketed by their local date in SCHOOL_TIMEZONE.
+        
+        Args:
+            granularity: 'day', 'week' (ISO weeks starting Monday) or 'month'
         
         Returns:
-            Dictionary with daily trend data points
+            Dictionary with one trend data point per bucket
         """
-        query = self.db.query(AttendanceRecord).filter(
-            AttendanceRecord.scan_time >= start_date,
-            AttendanceRecord.scan_time <= end_date,
-        )
+        if granularity not in TREND_GRANULARITIES:
+            raise ValueError(f"Unknown trend granularity: {granularity}")
         
-        if class_id:
-            query = query.join(Student).filter(
-                Student.class_id == class_id
-            )
+        if self.engine in self.DATASET_ENGINES:
+            return self.report_context(start_date, end_date, class_id).get_daily_trends(granularity)
+        if self.engine == "sql":
+            rows = self._trend_counts_sql(start_date, end_date, class_id, granularity)
+        else:
+            rows = self._trend_counts_rows(start_date, end_date, class_id)
         
-        records = query.all()
+        # Roll rows up to bucket starts (no-op when the database already truncated)
+        bucket_counts: Dict[date, Dict[str, int]] = {}
+        for day, status, count in rows:
+            bucket = bucket_start(day, granularity)
+            counts = bucket_counts.setdefault(bucket, {})
+            counts[status] = counts.get(status, 0) + count
         
-        # Group by date
-        daily_data: Dict[date, Dict] = {}
+        return self._build_trends(bucket_counts, start_date, end_date, granularity)
+    
+    def _local_scan_time(self):
+        """SQL expression for scan_time (stored as naive UTC) in the school timezone"""
+        return func.timezone(
+            sql_literal(settings.SCHOOL_TIMEZONE),
+            func.timezone(sql_literal("UTC"), AttendanceRecord.scan_time),
+        )
+    
+    def _trend_counts_sql(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        class_id: Optional[str],
+        granularity: str,
+    ) -> List[Tuple[date, str, int]]:
+        """(bucket date, status, count) rows grouped in the database"""
+        if self.db.get_bind().dialect.name == "postgresql":
+            bucket = cast(func.date_trunc(sql_literal(granularity), self._local_scan_time()), Date)
+        else:
+            # No timezone support: bucket by stored (UTC) date, roll up in Python
+            bucket = func.date(AttendanceRecord.scan_time)
         
-        for record in records:
-            record_date = record.scan_time.date()
-            
-            if record_date not in daily_data:
-                daily_data[record_date] = {
-                    "present": 0,
-                    "absent": 0,
-                    "tardy": 0,
-                    "total": 0,
-                }
-            
-            status = (record.status or "unknown").lower()
-            daily_data[record_date]["total"] += 1
-            
-            if status == "present":
-                daily_data[record_date]["present"] += 1
-            elif status == "absent":
-                daily_data[record_date]["absent"] += 1
-            elif status in ["tardy", "late"]:
-                daily_data[record_date]["tardy"] += 1
+        status = normalized_status()
+        query = self._records_in_range(
+            self.db.query(bucket, status, func.count(AttendanceRecord.id)),
+            start_date, end_date, class_id,
+        ).group_by(bucket, status)
         
-        # Build trend points and sort by date
+        return [
+            (day if isinstance(day, date) else date.fromisoformat(str(day)), status_value, count)
+            for day, status_value, count in query.all()
+        ]
+    
+    def _trend_counts_rows(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        class_id: Optional[str],
+    ) -> List[Tuple[date, str, int]]:
+        """(local date, status, 1) per record by loading every row"""
+        records = self._records_in_range(
+            self.db.query(AttendanceRecord), start_date, end_date, class_id
+        ).all()
+        
+        return [
+            (to_school_date(record.scan_time), (record.status or "unknown").lower(), 1)
+            for record in records
+        ]
+    
+    def _build_trends(
+        self,
+        bucket_counts: Dict[date, Dict[str, int]],
+        start_date: datetime,
+        end_date: datetime,
+        granularity: str = "day",
+    ) -> Dict:
+        """Build sorted trend points from per-bucket status counts"""
         trends = []
-        for trend_date in sorted(daily_data.keys()):
-            data = daily_data[trend_date]
-            total = data["total"]
-            attendance_pct = (data["present"] / total * 100) if total > 0 else 0
+        total_records = 0
+        for trend_date in sorted(bucket_counts.keys()):
+            counts = bucket_counts[trend_date]
+            present = counts.get("present", 0)
+            total = sum(counts.values())
+            total_records += total
+            attendance_pct = (present / total * 100) if total > 0 else 0
             
             trends.append({
                 "date": trend_date,
-                "present_count": data["present"],
-                "absent_count": data["absent"],
-                "tardy_count": data["tardy"],
+                "present_count": present,
+                "absent_count": counts.get("absent", 0),
+                "tardy_count": counts.get("tardy", 0) + counts.get("late", 0),
                 "total_count": total,
                 "attendance_percentage": round(attendance_pct, 2),
             })
         
-        total_records = len(records)
         date_range_days = max((end_date - start_date).days, 1)
         
         return {
             "trends": trends,
+            "granularity": granularity,
             "total_records": total_records,
             "date_range_days": date_range_days,
             "start_date": start_date.date(),
@@ -318,33 +580,110 @@ class AnalyticsService:
         Returns:
             Dictionary with per-class comparison data
         """
-        classes = self.db.query(ClassModel).all()
+        if self.engine in self.DATASET_ENGINES:
+            return self.report_context(start_date, end_date).get_class_comparisons()
+        if self.engine == "sql":
+            rows = self._class_counts_sql(start_date, end_date)
+        else:
+            rows = self._class_counts_rows(start_date, end_date)
         
+        return self._build_class_comparisons(rows, start_date, end_date)
+    
+    def _class_counts_sql(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+    ) -> List[Dict]:
+        """Per-class roster size and status counts with two grouped queries"""
+        roster = self._class_roster()
+        
+        status = normalized_status()
+        counts = self.db.query(
+            Student.class_id,
+            status,
+            func.count(AttendanceRecord.id),
+        ).join(
+            Student, Student.id == AttendanceRecord.student_id
+        ).filter(
+            AttendanceRecord.scan_time >= start_date,
+            AttendanceRecord.scan_time <= end_date,
+        ).group_by(Student.class_id, status).all()
+        
+        status_counts: Dict[str, Dict[str, int]] = {}
+        for class_id, status_value, count in counts:
+            status_counts.setdefault(class_id, {})[status_value] = count
+        
+        return [
+            {
+                "class_id": class_id,
+                "class_name": name,
+                "student_count": student_count,
+                "status_counts": status_counts.get(class_id, {}),
+            }
+            for class_id, name, student_count in roster
+        ]
+    
+    def _class_roster(self) -> List[Tuple[str, str, int]]:
+        """(class_id, name, student_count) for every class"""
+        return self.db.query(
+            ClassModel.id,
+            ClassModel.name,
+            func.count(Student.id),
+        ).outerjoin(
+            Student, Student.class_id == ClassModel.id
+        ).group_by(ClassModel.id, ClassModel.name).order_by(ClassModel.id).all()
+    
+    def _class_counts_rows(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+    ) -> List[Dict]:
+        """Per-class roster size and status counts, one class at a time"""
+        rows = []
+        for class_obj in self.db.query(ClassModel).order_by(ClassModel.id).all():
+            rows.append({
+                "class_id": class_obj.id,
+                "class_name": class_obj.name,
+                "student_count": self.db.query(Student).filter(
+                    Student.class_id == class_obj.id
+                ).count(),
+                "status_counts": self._status_counts_rows(
+                    start_date, end_date, class_id=class_obj.id
+                ),
+            })
+        return rows
+    
+    def _build_class_comparisons(
+        self,
+        rows: List[Dict],
+        start_date: datetime,
+        end_date: datetime,
+    ) -> Dict:
+        """Rank classes by attendance rate from per-class counts"""
         comparisons = []
         total_attendance_rates = []
         
-        for class_obj in classes:
-            stats = self.get_attendance_stats(
-                start_date, end_date, class_id=class_obj.id
-            )
-            
-            summaries = self.get_student_summaries(
-                start_date, end_date, class_id=class_obj.id
+        for row in rows:
+            status_counts = row["status_counts"]
+            total_records = sum(status_counts.values())
+            present_count = status_counts.get("present", 0)
+            attendance_rate = round(
+                (present_count / total_records * 100) if total_records > 0 else 0, 2
             )
             
             comparison = {
-                "class_id": class_obj.id,
-                "class_name": class_obj.name,
-                "student_count": stats["total_students"],
-                "attendance_rate": stats["attendance_rate"],
-                "present_count": stats["present_count"],
-                "absent_count": stats["absent_count"],
-                "tardy_count": stats["tardy_count"],
-                "total_records": stats["total_records"],
+                "class_id": row["class_id"],
+                "class_name": row["class_name"],
+                "student_count": row["student_count"],
+                "attendance_rate": attendance_rate,
+                "present_count": present_count,
+                "absent_count": status_counts.get("absent", 0),
+                "tardy_count": status_counts.get("tardy", 0) + status_counts.get("late", 0),
+                "total_records": total_records,
             }
             
             comparisons.append(comparison)
-            total_attendance_rates.append(stats["attendance_rate"])
+            total_attendance_rates.append(attendance_rate)
         
         # Sort by attendance rate (descending)
         comparisons.sort(key=lambda x: x["attendance_rate"], reverse=True)
@@ -385,9 +724,21 @@ class AnalyticsService:
         Returns:
             Dictionary with patterns and recommendations
         """
-        summaries = self.get_student_summaries(start_date, end_date, class_id)
-        stats = self.get_attendance_stats(start_date, end_date, class_id)
-        
+        # Stats, summaries and the status matrix share one dataset
+        return self.report_context(start_date, end_date, class_id).detect_patterns()
+    
+    def _build_patterns(
+        self,
+        stats: Dict,
+        summaries: Dict,
+        start_date: datetime,
+        end_date: datetime,
+        matrix: Optional[StatusMatrix] = None,
+    ) -> Dict:
+        """
+        Flag absence, at-risk and tardiness patterns from stats and summaries,
+        plus per-student streak, weekday and trend patterns from `matrix`
+        """
         patterns = []
         recommendations = []
         risk_level = "low"
@@ -431,6 +782,15 @@ class AnalyticsService:
             recommendations.append("Review morning procedures and entry policies")
             recommendations.append("Communicate tardiness expectations to students and families")
         
+        if matrix is not None:
+            found, advice = matrix.find_patterns()
+            patterns.extend(found)
+            recommendations.extend(advice)
+            if any(pattern["severity"] == "high" for pattern in found):
+                risk_level = "high"
+            elif found and risk_level == "low":
+                risk_level = "medium"
+        
         date_range_days = max((end_date - start_date).days, 1)
         
         return {
@@ -456,76 +816,184 @@ class AnalyticsService:
         Returns:
             Dictionary with performance metrics and categorization
         """
-        summaries = self.get_student_summaries(start_date, end_date, class_id)
+        if self.engine in self.DATASET_ENGINES:
+            return self.report_context(start_date, end_date, class_id).get_performance_report()
+        if self.engine == "sql":
+            rows = self._performance_counts_sql(start_date, end_date, class_id)
+        else:
+            rows = self._performance_counts_rows(start_date, end_date, class_id)
         
-        students = []
-        high_performers = []
-        at_risk = []
+        return self._build_performance_report(rows, start_date, end_date)
+    
+    def _performance_counts_sql(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        class_id: Optional[str] = None,
+    ) -> List[Dict]:
+        """
+        Per-student counts for the whole range and the last 7 days in one query.
+        
+        Uses conditional aggregation over the union of both windows, i.e.
+        COUNT(*) FILTER (WHERE scan_time >= end - 7d) written as SUM(CASE ...).
+        """
+        recent_start = end_date - timedelta(days=RECENT_WINDOW_DAYS)
+        status = normalized_status()
+        in_range = AttendanceRecord.scan_time >= start_date
+        recent = AttendanceRecord.scan_time >= recent_start
+        
+        def count_where(*conditions):
+            return func.sum(case((and_(*conditions), 1), else_=0))
+        
+        query = self.db.query(
+            AttendanceRecord.student_id,
+            Student.first_name,
+            Student.last_name,
+            count_where(in_range),
+            count_where(in_range, status == sql_literal("present")),
+            count_where(in_range, status == sql_literal("absent")),
+            count_where(in_range, status.in_(["tardy", "late"])),
+            count_where(in_range, status == sql_literal("excused")),
+            func.max(case((in_range, AttendanceRecord.scan_time))),
+            count_where(recent),
+            count_where(recent, status == sql_literal("present")),
+            count_where(recent, status == sql_literal("absent")),
+        ).outerjoin(Student, Student.id == AttendanceRecord.student_id)
+        query = self._records_in_range(
+            query, min(start_date, recent_start), end_date, class_id, student_joined=True
+        ).group_by(AttendanceRecord.student_id, Student.first_name, Student.last_name)
+        
+        rows = []
+        for (student_id, first_name, last_name, in_range_count, present, absent, tardy,
+             excused, last_scan, recent_total, recent_present, recent_absences) in query.all():
+            # Only students with records in the report range get a summary
+            if not in_range_count:
+                continue
+            rows.append({
+                "student_id": student_id or "unknown",
+                "student_name": f"{first_name} {last_name}" if first_name is not None else "Unknown",
+                "present_days": int(present or 0),
+                "absent_days": int(absent or 0),
+                "tardy_days": int(tardy or 0),
+                "excused_days": int(excused or 0),
+                "last_attendance_date": last_scan,
+                "recent_total": int(recent_total or 0),
+                "recent_present": int(recent_present or 0),
+                "recent_absences": int(recent_absences or 0),
+            })
+        return rows
+    
+    def _performance_counts_rows(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        class_id: Optional[str] = None,
+    ) -> List[Dict]:
+        """Per-student counts plus two last-7-days queries per student"""
+        rows = self._student_counts_rows(start_date, end_date, class_id)
         
-        for summary in summaries["summaries"]:
-            # Calculate trend (simplified: present days trend)
+        for row in rows:
             recent_records = self.db.query(AttendanceRecord).filter(
-                AttendanceRecord.student_id == summary["student_id"],
-                AttendanceRecord.scan_time >= (end_date - timedelta(days=7)),
+                AttendanceRecord.student_id == row["student_id"],
+                AttendanceRecord.scan_time >= (end_date - timedelta(days=RECENT_WINDOW_DAYS)),
                 AttendanceRecord.scan_time <= end_date,
             ).all()
             
-            recent_present = sum(1 for r in recent_records if r.status and r.status.lower() == "present")
-            recent_total = len(recent_records)
-            recent_rate = (recent_present / recent_total * 100) if recent_total > 0 else 0
-            
-            # Determine trend
-            overall_rate = summary["attendance_rate"]
-            if recent_rate > overall_rate + 5:
-                trend = "improving"
-            elif recent_rate < overall_rate - 5:
-                trend = "declining"
-            else:
-                trend = "stable"
-            
-            # Recent absences (last 7 days)
-            recent_absences = self.db.query(AttendanceRecord).filter(
-                AttendanceRecord.student_id == summary["student_id"],
-                AttendanceRecord.scan_time >= (end_date - timedelta(days=7)),
+            row["recent_total"] = len(recent_records)
+            row["recent_present"] = sum(
+                1 for r in recent_records if r.status and r.status.lower() == "present"
+            )
+            row["recent_absences"] = self.db.query(AttendanceRecord).filter(
+                AttendanceRecord.student_id == row["student_id"],
+                AttendanceRecord.scan_time >= (end_date - timedelta(days=RECENT_WINDOW_DAYS)),
                 AttendanceRecord.scan_time <= end_date,
-                AttendanceRecord.status == "absent",
+                normalized_status() == "absent",
             ).count()
-            
-            # Performance score (0-100)
-            performance_score = (
-                (overall_rate / 100 * 60) +  # Attendance rate (60% weight)
-                (min(10 - recent_absences, 10) / 10 * 25) +  # Recent absences (25% weight)
-                (25 if trend == "improving" else (15 if trend == "stable" else 5))  # Trend (15% weight)
-            )
-            
+        
+        return rows
+    
+    def _build_performance_report(
+        self,
+        rows: List[Dict],
+        start_date: datetime,
+        end_date: datetime,
+    ) -> Dict:
+        """Score and classify every student in one vectorized pass"""
+        summaries = self._build_student_summaries(rows, start_date, end_date)["summaries"]
+        recent_by_student = {row["student_id"]: row for row in rows}
+        
+        if not summaries:
+            return {
+                "total_students": 0,
+                "students": [],
+                "high_performers": [],
+                "at_risk_students": [],
+                "average_attendance_rate": 0,
+                "trend": "stable",
+            }
+        
+        overall_rate = np.array([s["attendance_rate"] for s in summaries], dtype=np.float64)
+        recent_total = np.array(
+            [recent_by_student[s["student_id"]]["recent_total"] for s in summaries], dtype=np.float64
+        )
+        recent_present = np.array(
+            [recent_by_student[s["student_id"]]["recent_present"] for s in summaries], dtype=np.float64
+        )
+        recent_absences = np.array(
+            [recent_by_student[s["student_id"]]["recent_absences"] for s in summaries], dtype=np.int64
+        )
+        
+        # Trend: last 7 days vs whole range
+        recent_rate = np.divide(
+            recent_present, recent_total,
+            out=np.zeros_like(recent_present), where=recent_total > 0,
+        ) * 100
+        trends = np.where(
+            recent_rate > overall_rate + 5, "improving",
+            np.where(recent_rate < overall_rate - 5, "declining", "stable"),
+        )
+        
+        # Performance score (0-100)
+        trend_points = np.where(trends == "improving", 25, np.where(trends == "stable", 15, 5))
+        performance_score = (
+            (overall_rate / 100 * 60) +  # Attendance rate (60% weight)
+            (np.minimum(10 - recent_absences, 10) / 10 * 25) +  # Recent absences (25% weight)
+            trend_points  # Trend (15% weight)
+        )
+        
+        students = []
+        high_performers = []
+        at_risk = []
+        
+        for i, summary in enumerate(summaries):
             student = {
                 "student_id": summary["student_id"],
                 "student_name": summary["student_name"],
                 "attendance_rate": summary["attendance_rate"],
-                "attendance_trend": trend,
-                "recent_absences": recent_absences,
-                "performance_score": round(performance_score, 2),
+                "attendance_trend": str(trends[i]),
+                "recent_absences": int(recent_absences[i]),
+                "performance_score": round(float(performance_score[i]), 2),
             }
             
             students.append(student)
             
-            if overall_rate >= 95:
+            if summary["attendance_rate"] >= 95:
                 high_performers.append(student)
             elif summary["at_risk"]:
                 at_risk.append(student)
         
         # Calculate overall trend
-        overall_rates = [s["attendance_rate"] for s in students]
-        if overall_rates:
-            avg_rate = sum(overall_rates) / len(overall_rates)
-            recent_avg = sum([s["attendance_rate"] for s in students if s["attendance_trend"] == "improving"]) / len([s for s in students if s["attendance_trend"] == "improving"]) if any(s["attendance_trend"] == "improving" for s in students) else avg_rate
-            
-            if recent_avg > avg_rate:
-                overall_trend = "improving"
-            elif recent_avg < avg_rate:
-                overall_trend = "declining"
-            else:
-                overall_trend = "stable"
+        avg_rate = sum(s["attendance_rate"] for s in students) / len(students)
+        improving = trends == "improving"
+        recent_avg = (
+            sum(s["attendance_rate"] for s, up in zip(students, improving) if up) / int(improving.sum())
+            if improving.any() else avg_rate
+        )
+        
+        if recent_avg > avg_rate:
+            overall_trend = "improving"
+        elif recent_avg < avg_rate:
+            overall_trend = "declining"
         else:
             overall_trend = "stable"
         
@@ -534,6 +1002,356 @@ class AnalyticsService:
             "students": students,
             "high_performers": high_performers,
             "at_risk_students": at_risk,
-            "average_attendance_rate": round(sum(overall_rates) / len(overall_rates) if overall_rates else 0, 2),
+            "average_attendance_rate": round(avg_rate, 2),
             "trend": overall_trend,
         }
+    
+    # =========================================================================
+    # SHARED REPORT DATASET
+    # =========================================================================
+    
+    def report_context(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        class_id: Optional[str] = None,
+    ):
+        """Shared dataset for building several report sections over one range"""
+        if self.engine == "numpy":
+            from app.services.columnar_analytics import ColumnarReport
+            return ColumnarReport(self, start_date, end_date, class_id)
+        return ReportContext(self, start_date, end_date, class_id)
+    
+    def _local_day(self):
+        """SQL expression for the school-local date of a record"""
+        if self.db.get_bind().dialect.name == "postgresql":
+            return cast(self._local_scan_time(), Date)
+        # No timezone support: use the stored (UTC) date
+        return func.date(AttendanceRecord.scan_time)
+    
+    def _report_facts_sql(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        class_id: Optional[str] = None,
+    ) -> List[ReportFact]:
+        """
+        Per-student x per-day x status counts for the range in one query.
+        
+        The filter also covers the recent window when it starts before the
+        range; in-range and recent counts are separate conditional sums.
+        """
+        recent_start = end_date - timedelta(days=RECENT_WINDOW_DAYS)
+        day = self._local_day()
+        in_range = AttendanceRecord.scan_time >= start_date
+        recent = AttendanceRecord.scan_time >= recent_start
+        
+        query = self.db.query(
+            AttendanceRecord.student_id,
+            Student.first_name,
+            Student.last_name,
+            Student.class_id,
+            day,
+            AttendanceRecord.status,
+            func.sum(case((in_range, 1), else_=0)),
+            func.sum(case((recent, 1), else_=0)),
+            func.max(case((in_range, AttendanceRecord.scan_time))),
+        ).outerjoin(Student, Student.id == AttendanceRecord.student_id)
+        query = self._records_in_range(
+            query, min(start_date, recent_start), end_date, class_id, student_joined=True
+        ).group_by(
+            AttendanceRecord.student_id,
+            Student.first_name,
+            Student.last_name,
+            Student.class_id,
+            day,
+            AttendanceRecord.status,
+        )
+        
+        return [
+            ReportFact(
+                student_id, first_name, last_name, student_class_id,
+                day_value if isinstance(day_value, date) else date.fromisoformat(str(day_value)),
+                status, int(in_range_count or 0), int(recent_count or 0), last_scan,
+            )
+            for (student_id, first_name, last_name, student_class_id, day_value, status,
+                 in_range_count, recent_count, last_scan) in query.all()
+        ]
+    
+    def _report_facts_rows(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        class_id: Optional[str] = None,
+    ) -> List[ReportFact]:
+        """Per-student x per-day x status counts by loading every row"""
+        recent_start = end_date - timedelta(days=RECENT_WINDOW_DAYS)
+        records = self._records_in_range(
+            self.db.query(AttendanceRecord), min(start_date, recent_start), end_date, class_id
+        ).all()
+        
+        groups: Dict[tuple, List] = {}
+        for record in records:
+            key = (record.student_id, to_school_date(record.scan_time), record.status)
+            group = groups.setdefault(key, [0, 0, None])
+            if record.scan_time >= start_date:
+                group[0] += 1
+                if group[2] is None or record.scan_time > group[2]:
+                    group[2] = record.scan_time
+            if record.scan_time >= recent_start:
+                group[1] += 1
+        
+        student_ids = {student_id for student_id, _, _ in groups}
+        students = {
+            student.id: student
+            for student in self.db.query(Student).filter(Student.id.in_(list(student_ids))).all()
+        } if student_ids else {}
+        
+        facts = []
+        for (student_id, day, status), (in_range_count, recent_count, last_scan) in groups.items():
+            student = students.get(student_id)
+            facts.append(ReportFact(
+                student_id,
+                student.first_name if student else None,
+                student.last_name if student else None,
+                student.class_id if student else None,
+                day, status, in_range_count, recent_count, last_scan,
+            ))
+        return facts
+    
+    def _report_facts_rollup(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        class_id: Optional[str] = None,
+    ) -> List[ReportFact]:
+        """
+        Per-student x per-day x status counts read from attendance_daily_rollup.
+        
+        The rollup has day granularity, so the range and the recent window
+        cover whole school days. Statuses are already normalized and the
+        class is the student's current class (roster moves rebuild the rows).
+        """
+        rollup = AttendanceDailyRollup
+        recent_start = end_date - timedelta(days=RECENT_WINDOW_DAYS)
+        last_day = to_school_date(end_date)
+        if school_day_start(last_day) == end_date:
+            # A range ending at midnight (school_day_window) excludes that day
+            last_day -= timedelta(days=1)
+        in_range = rollup.day >= to_school_date(start_date)
+        recent = rollup.day >= to_school_date(recent_start)
+        
+        query = self.db.query(
+            rollup.student_id,
+            Student.first_name,
+            Student.last_name,
+            rollup.class_id,
+            rollup.day,
+            rollup.status,
+            func.sum(case((in_range, rollup.count), else_=0)),
+            func.sum(case((recent, rollup.count), else_=0)),
+            func.max(case((in_range, rollup.last_scan))),
+        ).outerjoin(
+            Student, Student.id == rollup.student_id
+        ).filter(
+            rollup.day >= to_school_date(min(start_date, recent_start)),
+            rollup.day <= last_day,
+        )
+        if class_id:
+            query = query.filter(rollup.class_id == class_id)
+        query = query.group_by(
+            rollup.student_id,
+            Student.first_name,
+            Student.last_name,
+            rollup.class_id,
+            rollup.day,
+            rollup.status,
+        )
+        
+        return [
+            ReportFact(
+                student_id, first_name, last_name, student_class_id, day, status,
+                int(in_range_count or 0), int(recent_count or 0), last_scan,
+            )
+            for (student_id, first_name, last_name, student_class_id, day, status,
+                 in_range_count, recent_count, last_scan) in query.all()
+        ]
+
+
+class ReportContext:
+    """
+    Request-scoped dataset shared by every section of a combined report.
+    
+    The range's attendance is fetched once as per-student x per-day x status
+    counts (plus the roster size), and stats, summaries, trends, performance,
+    class comparisons and patterns are all derived from it in memory. Each
+    section is built at most once.
+    """
+    
+    def __init__(
+        self,
+        service: AnalyticsService,
+        start_date: datetime,
+        end_date: datetime,
+        class_id: Optional[str] = None,
+    ):
+        self.service = service
+        self.start_date = start_date
+        self.end_date = end_date
+        self.class_id = class_id
+        self._facts: Optional[List[ReportFact]] = None
+        self._student_rows: Optional[List[Dict]] = None
+        self._status_matrix: Optional[StatusMatrix] = None
+        self._sections: Dict[str, Dict] = {}
+    
+    @property
+    def facts(self) -> List[ReportFact]:
+        """The shared dataset, loaded on first use"""
+        if self._facts is None:
+            load = getattr(self.service, f"_report_facts_{self.service.engine}")
+            self._facts = load(self.start_date, self.end_date, self.class_id)
+        return self._facts
+    
+    def _section(self, name: str, build) -> Dict:
+        if name not in self._sections:
+            self._sections[name] = build()
+        return self._sections[name]
+    
+    def student_rows(self) -> List[Dict]:
+        """Per-student counts in the shape of AnalyticsService._performance_counts_*"""
+        if self._student_rows is not None:
+            return self._student_rows
+        
+        students: Dict[str, Dict] = {}
+        for fact in self.facts:
+            student_id = fact.student_id or "unknown"
+            row = students.get(student_id)
+            if row is None:
+                row = students[student_id] = {
+                    "student_id": student_id,
+                    "student_name": (
+                        f"{fact.first_name} {fact.last_name}" if fact.first_name is not None else "Unknown"
+                    ),
+                    "present_days": 0,
+                    "absent_days": 0,
+                    "tardy_days": 0,
+                    "excused_days": 0,
+                    "last_attendance_date": None,
+                    "recent_total": 0,
+                    "recent_present": 0,
+                    "recent_absences": 0,
+                    "in_range": 0,
+                }
+            
+            status = (fact.status or "unknown").lower()
+            if fact.in_range:
+                row["in_range"] += fact.in_range
+                if status == "present":
+                    row["present_days"] += fact.in_range
+                elif status == "absent":
+                    row["absent_days"] += fact.in_range
+                elif status in ("tardy", "late"):
+                    row["tardy_days"] += fact.in_range
+                elif status == "excused":
+                    row["excused_days"] += fact.in_range
+                last = row["last_attendance_date"]
+                if last is None or fact.last_scan > last:
+                    row["last_attendance_date"] = fact.last_scan
+            
+            if fact.recent:
+                row["recent_total"] += fact.recent
+                if status == "present":
+                    row["recent_present"] += fact.recent
+                elif status == "absent":
+                    row["recent_absences"] += fact.recent
+        
+        # Only students with records in the report range get a summary
+        self._student_rows = [row for row in students.values() if row["in_range"]]
+        return self._student_rows
+    
+    def _status_counts(self, facts: List[ReportFact]) -> Dict[str, int]:
+        status_counts: Dict[str, int] = {}
+        for fact in facts:
+            if fact.in_range:
+                status = (fact.status or "unknown").lower()
+                status_counts[status] = status_counts.get(status, 0) + fact.in_range
+        return status_counts
+    
+    def _total_students(self) -> int:
+        if self.class_id:
+            return self.service._total_students(self.start_date, self.end_date, self.class_id)
+        return len({
+            fact.student_id for fact in self.facts
+            if fact.in_range and fact.first_name is not None
+        })
+    
+    # =========================================================================
+    # SECTIONS
+    # =========================================================================
+    
+    def get_attendance_stats(self) -> Dict:
+        return self._section("stats", lambda: self.service._build_stats(
+            self._status_counts(self.facts), self._total_students(), self.start_date, self.end_date
+        ))
+    
+    def get_student_summaries(self) -> Dict:
+        return self._section("summaries", lambda: self.service._build_student_summaries(
+            self.student_rows(), self.start_date, self.end_date
+        ))
+    
+    def get_daily_trends(self, granularity: str = "day") -> Dict:
+        if granularity not in TREND_GRANULARITIES:
+            raise ValueError(f"Unknown trend granularity: {granularity}")
+        
+        def build():
+            bucket_counts: Dict[date, Dict[str, int]] = {}
+            for fact in self.facts:
+                if not fact.in_range:
+                    continue
+                counts = bucket_counts.setdefault(bucket_start(fact.day, granularity), {})
+                status = (fact.status or "unknown").lower()
+                counts[status] = counts.get(status, 0) + fact.in_range
+            return self.service._build_trends(bucket_counts, self.start_date, self.end_date, granularity)
+        
+        return self._section(f"trends:{granularity}", build)
+    
+    def get_performance_report(self) -> Dict:
+        return self._section("performance", lambda: self.service._build_performance_report(
+            self.student_rows(), self.start_date, self.end_date
+        ))
+    
+    def get_class_comparisons(self) -> Dict:
+        """Cross-class comparison; only meaningful without a class filter"""
+        def build():
+            by_class: Dict[str, List[ReportFact]] = {}
+            for fact in self.facts:
+                if fact.class_id is not None:
+                    by_class.setdefault(fact.class_id, []).append(fact)
+            rows = [
+                {
+                    "class_id": class_id,
+                    "class_name": name,
+                    "student_count": student_count,
+                    "status_counts": self._status_counts(by_class.get(class_id, [])),
+                }
+                for class_id, name, student_count in self.service._class_roster()
+            ]
+            return self.service._build_class_comparisons(rows, self.start_date, self.end_date)
+        
+        return self._section("comparisons", build)
+    
+    def status_matrix(self) -> StatusMatrix:
+        """Students x school days matrix of the range's daily statuses"""
+        if self._status_matrix is None:
+            self._status_matrix = StatusMatrix.from_records(
+                (fact.student_id, fact.day, fact.status)
+                for fact in self.facts
+                if fact.in_range and fact.student_id is not None
+            )
+        return self._status_matrix
+    
+    def detect_patterns(self) -> Dict:
+        return self._section("patterns", lambda: self.service._build_patterns(
+            self.get_attendance_stats(), self.get_student_summaries(), self.start_date, self.end_date,
+            matrix=self.status_matrix(),
+        ))
@@ -0,0 +1,272 @@
+"""
+Monthly partitions of attendance_records (PostgreSQL).
+
+attendance_records is append-only and every read filters a scan_time range,
+so on PostgreSQL it is partitioned by RANGE (scan_time), one partition per
+calendar month (naive UTC, like scan_time):
+
+    attendance_records_y2026m10  FOR VALUES FROM ('2026-10-01') TO ('2026-11-01')
+
+plus attendance_records_default for scans outside every month (a device
+with a wrong clock), so an insert never fails for lack of a partition. When
+a month is created later, its rows are moved out of the default partition.
+Range queries only touch the months they overlap (partition pruning), so
+their cost follows the range and not the years of history kept.
+
+Alembic revision 003_partition_attendance_records converts the table.
+ensure_partitions() creates the months ahead; the API runs it at startup and
+daily. archive_partitions() exports past school years to compressed CSV and
+detaches them, see archive_attendance_partitions.py. Other databases keep a
+plain table and every function here is a no-op on them.
+"""
+
+import asyncio
+import gzip
+import os
+import re
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import text
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.database import engine
+from app.core.metrics import metrics
+
+PARENT = "attendance_records"
+DEFAULT_PARTITION = f"{PARENT}_default"
+PARTITION_NAME = re.compile(rf"^{PARENT}_y(\d{{4}})m(\d{{2}})$")
+# Serializes partition DDL between API workers
+LOCK_KEY = 4707
+
+
+def month_start(day: date) -> date:
+    return date(day.year, day.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{PARENT}_y{month.year:04d}m{month.month:02d}"
+
+
+def school_year_start(today: Optional[date] = None) -> date:
+    """First day of the current school year (SCHOOL_YEAR_START_MONTH)"""
+    today = today or datetime.utcnow().date()
+    year = today.year if today.month >= settings.SCHOOL_YEAR_START_MONTH else today.year - 1
+    return date(year, settings.SCHOOL_YEAR_START_MONTH, 1)
+
+
+def is_partitioned(connection) -> bool:
+    if connection.dialect.name != "postgresql":
+        return False
+    return connection.execute(text(
+        "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+        "WHERE c.relname = :parent AND c.relnamespace = to_regnamespace(current_schema())::oid"
+    ), {"parent": PARENT}).first() is not None
+
+
+def list_partitions(connection) -> List[Dict]:
+    """Monthly partitions attached to attendance_records, oldest first"""
+    rows = connection.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = :parent AND p.relnamespace = to_regnamespace(current_schema())::oid"
+    ), {"parent": PARENT})
+    partitions = []
+    for name, in rows:
+        match = PARTITION_NAME.match(name)
+        if match:
+            month = date(int(match.group(1)), int(match.group(2)), 1)
+            partitions.append({"name": name, "start": month, "end": add_months(month, 1)})
+    return sorted(partitions, key=lambda partition: partition["start"])
+
+
+def _create_partition(connection, month: date, has_default: bool) -> int:
+    """
+    Create the partition of one month; returns the number of rows moved into
+    it from the default partition.
+
+    PostgreSQL refuses to create a partition whose range already has rows in
+    the default partition. Those months are built as a standalone table, the
+    rows are moved into it and it is attached, all in the caller's transaction.
+    """
+    name = partition_name(month)
+    # Bounds are trusted dates, inlined because DDL takes no parameters
+    start, end = month.isoformat(), add_months(month, 1).isoformat()
+    bounds = f"FOR VALUES FROM ('{start}') TO ('{end}')"
+    in_month = f"scan_time >= '{start}' AND scan_time < '{end}'"
+    if not has_default or connection.execute(text(
+        f"SELECT NOT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE {in_month})"
+    )).scalar():
+        connection.execute(text(f"CREATE TABLE {name} PARTITION OF {PARENT} {bounds}"))
+        return 0
+
+    connection.execute(text(f"CREATE TABLE {name} (LIKE {PARENT} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    moved = connection.execute(text(
+        f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE {in_month} RETURNING *) "
+        f"INSERT INTO {name} SELECT * FROM moved"
+    )).rowcount
+    # Attaching builds the partition's indexes and checks its rows
+    connection.execute(text(f"ALTER TABLE {PARENT} ATTACH PARTITION {name} {bounds}"))
+    return moved
+
+
+def create_partitions(connection, first_month: date, last_month: date) -> List[str]:
+    """
+    Create the monthly partitions from first_month to last_month (inclusive)
+    that do not exist yet, and the default partition.
+
+    Returns:
+        Names of the partitions created
+    """
+    connection.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": LOCK_KEY})
+    existing = {partition["name"] for partition in list_partitions(connection)}
+    has_default = connection.execute(
+        text("SELECT to_regclass(:name) IS NOT NULL"), {"name": DEFAULT_PARTITION}
+    ).scalar()
+    created = []
+    month = month_start(first_month)
+    while month <= last_month:
+        name = partition_name(month)
+        if name not in existing:
+            moved = _create_partition(connection, month, has_default)
+            if moved:
+                print(f"🗓️ Moved {moved} attendance records from {DEFAULT_PARTITION} to {name}")
+                metrics.inc("attendance_partition_rows_moved_total", moved)
+            created.append(name)
+        month = add_months(month, 1)
+    connection.execute(text(f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF {PARENT} DEFAULT"))
+    return created
+
+
+def ensure_partitions(months_ahead: Optional[int] = None, today: Optional[date] = None) -> List[str]:
+    """
+    Create the partitions of the current month and the next `months_ahead`
+    (default: ATTENDANCE_PARTITION_MONTHS_AHEAD) months.
+
+    Returns:
+        Names of the partitions created
+    """
+    months_ahead = settings.ATTENDANCE_PARTITION_MONTHS_AHEAD if months_ahead is None else months_ahead
+    current = month_start(today or datetime.utcnow().date())
+    with engine.begin() as connection:
+        if not is_partitioned(connection):
+            return []
+        created = create_partitions(connection, current, add_months(current, months_ahead))
+    for name in created:
+        print(f"🗓️ Created attendance partition {name}")
+    metrics.inc("attendance_partitions_created_total", len(created))
+    return created
+
+
+# =============================================================================
+# ARCHIVAL
+# =============================================================================
+
+def _export(connection, name: str, path: str) -> int:
+    """COPY one partition into a gzip-compressed CSV file; returns its row count"""
+    rows = connection.execute(text(f"SELECT count(*) FROM {name}")).scalar()
+    partial = f"{path}.partial"
+    cursor = connection.connection.cursor()
+    try:
+        with gzip.open(partial, "wb") as out:
+            cursor.copy_expert(f"COPY {name} TO STDOUT WITH (FORMAT csv, HEADER true)", out)
+    finally:
+        cursor.close()
+    os.replace(partial, path)
+    return rows
+
+
+def archive_partitions(
+    before: Optional[date] = None,
+    directory: Optional[str] = None,
+    keep_tables: bool = False,
+    dry_run: bool = False,
+) -> List[Dict]:
+    """
+    Export every monthly partition that ends on or before `before` to
+    `directory`/<partition>.csv.gz, then detach and drop it.
+
+    Each partition is exported and detached in its own transaction, so an
+    interrupted run leaves the remaining months attached.
+
+    Args:
+        before: Archive months ending on or before this date
+            (default: start of the current school year)
+        directory: Output directory (default: ATTENDANCE_ARCHIVE_DIR)
+        keep_tables: Detach the partitions but keep them as standalone tables
+        dry_run: Only list the partitions that would be archived
+
+    Returns:
+        One dict per partition with its name, month, rows and file
+    """
+    before = before or school_year_start()
+    directory = directory or settings.ATTENDANCE_ARCHIVE_DIR
+    os.makedirs(directory, exist_ok=True)
+
+    with engine.connect() as connection:
+        if not is_partitioned(connection):
+            print("⚠️ attendance_records is not partitioned, nothing to archive")
+            return []
+        partitions = [partition for partition in list_partitions(connection) if partition["end"] <= before]
+
+    archived = []
+    for partition in partitions:
+        name = partition["name"]
+        path = os.path.join(directory, f"{name}.csv.gz")
+        entry = {"name": name, "month": partition["start"].isoformat()[:7], "file": path, "rows": None}
+        if dry_run:
+            archived.append(entry)
+            continue
+        with engine.begin() as connection:
+            entry["rows"] = _export(connection, name, path)
+            connection.execute(text(f"ALTER TABLE {PARENT} DETACH PARTITION {name}"))
+            if not keep_tables:
+                connection.execute(text(f"DROP TABLE {name}"))
+        metrics.inc("attendance_partitions_archived_total")
+        archived.append(entry)
+    return archived
+
+
+def restore_partition(path: str) -> int:
+    """
+    Load an archived month back into attendance_records (it lands in the
+    month's partition, which is created if needed).
+
+    Returns:
+        Number of rows restored
+    """
+    match = PARTITION_NAME.match(os.path.basename(path).split(".")[0])
+    if not match:
+        raise ValueError(f"Not an archived attendance partition: {path}")
+    month = date(int(match.group(1)), int(match.group(2)), 1)
+    with engine.begin() as connection:
+        create_partitions(connection, month, month)
+        cursor = connection.connection.cursor()
+        try:
+            with gzip.open(path, "rb") as source:
+                cursor.copy_expert(f"COPY {PARENT} FROM STDIN WITH (FORMAT csv, HEADER true)", source)
+            return cursor.rowcount
+        finally:
+            cursor.close()
+
+
+# =============================================================================
+# SCHEDULING
+# =============================================================================
+
+async def run_partition_schedule():
+    """Keep ATTENDANCE_PARTITION_MONTHS_AHEAD months of partitions, checked daily"""
+    while True:
+        try:
+            await run_in_threadpool(ensure_partitions)
+        except Exception as e:
+            metrics.inc("attendance_partition_maintenance_failures_total")
+            print(f"❌ Attendance partition maintenance failed: {e}")
+        await asyncio.sleep(timedelta(days=1).total_seconds())
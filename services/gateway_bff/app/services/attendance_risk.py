@@ -0,0 +1,316 @@
+"""
+Incrementally maintained at-risk index.
+
+student_attendance_risk holds, per student, the record counts of a rolling
+window (the last AT_RISK_WINDOW_DAYS school days) and whether the student is
+at risk: below AT_RISK_THRESHOLD percent present, the rule
+get_student_summaries applies to a report range. Its partial index on
+class_id WHERE at_risk is each class's at-risk set, so listing a class's
+at-risk students reads O(at-risk) rows and never scans attendance.
+
+Session hooks keep the index current in the same transaction as the write:
+
+- inserted records inside the current window add to the student's counters
+- updated or deleted records, roster moves and students whose row is from
+  an older window recompute the student from attendance_records
+
+Students whose at-risk flag flips are pushed to the class teacher over the
+WebSocket once the transaction commits. roll_window() moves every student to
+the current window; the API runs it after each local midnight, and
+rebuild_attendance_risk.py runs it as a backfill.
+"""
+
+import asyncio
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import bindparam, case, event, func, inspect, select
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.metrics import metrics
+from app.core.websocket import manager
+from app.models.attendance import AttendanceRecord, Student, StudentAttendanceRisk
+from app.models.classes import Class as ClassModel
+from app.services.analytics_service import (
+    normalized_status,
+    school_day_start,
+    school_day_window,
+    sql_literal,
+    to_school_date,
+)
+from app.services.attendance_rollup import normalize_status
+
+CROSSINGS_KEY = "attendance_risk_crossings"
+
+risk_table = StudentAttendanceRisk.__table__
+
+# (window_start, start, end): first local date and naive-UTC bounds
+Window = Tuple[date, datetime, datetime]
+
+
+def current_window(today: Optional[date] = None) -> Window:
+    start, end = school_day_window(settings.AT_RISK_WINDOW_DAYS, today)
+    return to_school_date(start), start, end
+
+
+def is_at_risk(total_records: int, present_records: int) -> bool:
+    """Same rule as get_student_summaries; students without records are not at risk"""
+    return total_records > 0 and present_records / total_records * 100 < settings.AT_RISK_THRESHOLD
+
+
+def _recompute(connection, student_ids: Optional[Set[str]], window: Window) -> Dict[str, Tuple]:
+    """student_id -> (class_id, total, present) counted from attendance_records"""
+    _, start, end = window
+    query = select(
+        Student.id,
+        Student.class_id,
+        func.count(AttendanceRecord.id),
+        func.coalesce(func.sum(case((normalized_status() == sql_literal("present"), 1), else_=0)), 0),
+    ).outerjoin(
+        AttendanceRecord,
+        (AttendanceRecord.student_id == Student.id)
+        & (AttendanceRecord.scan_time >= start)
+        & (AttendanceRecord.scan_time < end),
+    ).group_by(Student.id, Student.class_id)
+    if student_ids is not None:
+        query = query.where(Student.id.in_(student_ids))
+    return {
+        student_id: (class_id, int(total), int(present))
+        for student_id, class_id, total, present in connection.execute(query)
+    }
+
+
+def _existing(connection, student_ids: Optional[Set[str]]) -> Dict[str, Tuple]:
+    query = select(risk_table).with_for_update()
+    if student_ids is not None:
+        query = query.where(risk_table.c.student_id.in_(student_ids))
+    return {row.student_id: row for row in connection.execute(query)}
+
+
+def _insert(connection, rows: List[Dict]):
+    """
+    Insert risk rows; a row another transaction inserted first is overwritten.
+
+    Two concurrent first writes of a student both find no row. A plain INSERT
+    would fail the second transaction, i.e. the attendance write itself. Its
+    counters, recomputed before the other write committed, may then miss that
+    write's records until the student is recomputed (the next roll_window).
+    """
+    dialect = connection.dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+
+        stmt = insert(risk_table).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[risk_table.c.student_id],
+            set_={name: stmt.excluded[name] for name in rows[0] if name != "student_id"},
+        )
+        connection.execute(stmt)
+        return
+
+    connection.execute(risk_table.insert(), rows)
+
+
+def _apply(connection, counts: Dict[str, Tuple], existing: Dict[str, Tuple], window_start: date) -> List[Dict]:
+    """Write new counters; returns the students whose at-risk flag flipped"""
+    now = datetime.utcnow()
+    inserts, updates, crossings = [], [], []
+    for student_id, (class_id, total, present) in counts.items():
+        old = existing.get(student_id)
+        was_at_risk = bool(old is not None and old.at_risk)
+        at_risk = is_at_risk(total, present)
+        values = {
+            "class_id": class_id,
+            "window_start": window_start,
+            "total_records": total,
+            "present_records": present,
+            "at_risk": at_risk,
+            "at_risk_since": (old.at_risk_since if was_at_risk else now) if at_risk else None,
+            "updated_at": now,
+        }
+        if old is None:
+            inserts.append({"student_id": student_id, **values})
+        else:
+            updates.append({"b_student_id": student_id, **values})
+        if at_risk != was_at_risk:
+            crossings.append({
+                "student_id": student_id,
+                "class_id": class_id,
+                "at_risk": at_risk,
+                "attendance_rate": round(present / total * 100, 2) if total else 0.0,
+                "present_records": present,
+                "total_records": total,
+            })
+
+    if inserts:
+        _insert(connection, inserts)
+    if updates:
+        connection.execute(
+            risk_table.update().where(risk_table.c.student_id == bindparam("b_student_id")),
+            updates,
+        )
+    return crossings
+
+
+def _add_recipients(connection, crossings: List[Dict]) -> List[Dict]:
+    """Attach the student's name and the class teacher to each crossing"""
+    details = {
+        student_id: (first_name, last_name, teacher_id)
+        for student_id, first_name, last_name, teacher_id in connection.execute(
+            select(Student.id, Student.first_name, Student.last_name, ClassModel.teacher_id)
+            .outerjoin(ClassModel, ClassModel.id == Student.class_id)
+            .where(Student.id.in_([crossing["student_id"] for crossing in crossings]))
+        )
+    }
+    for crossing in crossings:
+        first_name, last_name, teacher_id = details.get(crossing["student_id"], (None, None, None))
+        crossing["student_name"] = f"{first_name} {last_name}" if first_name is not None else "Unknown"
+        crossing["teacher_id"] = teacher_id
+    return crossings
+
+
+def _record(session: Session, connection, crossings: List[Dict]):
+    if crossings:
+        session.info.setdefault(CROSSINGS_KEY, []).extend(_add_recipients(connection, crossings))
+
+
+# =============================================================================
+# WRITE TRACKING
+# =============================================================================
+
+def _history_values(obj, attr: str) -> Set:
+    history = inspect(obj).attrs[attr].history
+    return {value for value in (*history.deleted, *history.unchanged, *history.added) if value is not None}
+
+
+def _after_flush(session: Session, flush_context):
+    """Apply the flushed attendance and roster writes to the index in the same transaction"""
+    increments: Dict[str, List[int]] = {}
+    recompute: Set[str] = set()
+    window = None
+
+    for obj in session.new:
+        if isinstance(obj, AttendanceRecord) and obj.student_id and obj.scan_time:
+            window = window or current_window()
+            _, start, end = window
+            if start <= obj.scan_time < end:
+                counts = increments.setdefault(obj.student_id, [0, 0])
+                counts[0] += 1
+                counts[1] += normalize_status(obj.status) == "present"
+    for obj in (*session.dirty, *session.deleted):
+        if isinstance(obj, AttendanceRecord):
+            if obj in session.deleted or session.is_modified(obj, include_collections=False):
+                recompute |= _history_values(obj, "student_id")
+        elif isinstance(obj, Student) and inspect(obj).attrs["class_id"].history.has_changes():
+            recompute.add(obj.id)
+
+    if not (increments or recompute):
+        return
+
+    window = window or current_window()
+    window_start = window[0]
+    connection = session.connection()
+    existing = _existing(connection, set(increments) | recompute)
+    # Students without a row for the current window are counted from scratch
+    recompute |= {
+        student_id for student_id in increments
+        if student_id not in existing or existing[student_id].window_start != window_start
+    }
+
+    counts = _recompute(connection, recompute, window) if recompute else {}
+    for student_id, (total, present) in increments.items():
+        if student_id not in recompute:
+            old = existing[student_id]
+            counts[student_id] = (old.class_id, old.total_records + total, old.present_records + present)
+
+    _record(session, connection, _apply(connection, counts, existing, window_start))
+
+
+def _after_commit(session: Session):
+    for crossing in session.info.pop(CROSSINGS_KEY, None) or []:
+        event_name = "at_risk" if crossing["at_risk"] else "recovered"
+        metrics.inc("attendance_risk_crossings_total", event=event_name)
+        teacher_id = crossing.pop("teacher_id")
+        if teacher_id:
+            manager.notify_user(teacher_id, {
+                "type": "attendance_risk",
+                "event": event_name,
+                "window_days": settings.AT_RISK_WINDOW_DAYS,
+                "threshold": settings.AT_RISK_THRESHOLD,
+                **crossing,
+            })
+
+
+def _after_rollback(session: Session):
+    session.info.pop(CROSSINGS_KEY, None)
+
+
+event.listen(Session, "after_flush", _after_flush)
+event.listen(Session, "after_commit", _after_commit)
+event.listen(Session, "after_rollback", _after_rollback)
+
+
+# =============================================================================
+# WINDOW ROLL
+# =============================================================================
+
+def roll_window(db: Session, today: Optional[date] = None, student_ids: Optional[Iterable[str]] = None) -> Dict:
+    """
+    Recompute students for the current window (every student by default).
+
+    Crossings are pushed when the caller commits.
+
+    Args:
+        db: Database session (the caller commits)
+        today: Last school day of the window (default: today)
+        student_ids: Only recompute these students
+
+    Returns:
+        Dictionary with the number of students written, at risk and crossing
+    """
+    window = current_window(today)
+    student_ids = set(student_ids) if student_ids is not None else None
+    connection = db.connection()
+    counts = _recompute(connection, student_ids, window)
+    crossings = _apply(connection, counts, _existing(connection, student_ids), window[0])
+    _record(db, connection, crossings)
+    return {
+        "students": len(counts),
+        "at_risk": sum(is_at_risk(total, present) for _, total, present in counts.values()),
+        "crossings": len(crossings),
+    }
+
+
+def seconds_until_next_day(now: Optional[datetime] = None) -> float:
+    """Seconds from `now` (naive UTC, default: current time) to the next local midnight"""
+    now = now or datetime.utcnow()
+    return (school_day_start(to_school_date(now) + timedelta(days=1)) - now).total_seconds()
+
+
+async def run_window_roll_schedule():
+    """Roll the at-risk index to the new window shortly after each local midnight"""
+    def roll():
+        db = SessionLocal()
+        try:
+            result = roll_window(db)
+            db.commit()
+            print(f"📉 At-risk index rolled: {result['students']} students, "
+                  f"{result['at_risk']} at risk, {result['crossings']} changed")
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    while True:
+        await asyncio.sleep(seconds_until_next_day() + 60)
+        try:
+            await run_in_threadpool(roll)
+        except Exception as e:
+            print(f"❌ At-risk index roll failed: {e}")
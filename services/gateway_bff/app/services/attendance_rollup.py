@@ -0,0 +1,249 @@
+"""
+Daily attendance rollup maintenance.
+
+attendance_daily_rollup holds one row per (class, student, local day, status)
+with the record count and the first/last scan time, so reports read
+days x students rows instead of every scan event.
+
+The table is kept in sync from a Session flush hook, in the same transaction
+as the write itself, so every ORM write to attendance_records (live scans,
+manual records, bulk imports) is covered:
+
+- inserted records increment their rollup row with an upsert
+- updated or deleted records rebuild the affected student-days from the raw
+  records
+- a student moved to another class has all their rows rebuilt, so the rollup
+  always files a student's history under their current class, like the
+  reports that join attendance_records to students
+
+rebuild_rollup() recomputes the table from attendance_records; use the
+backfill_attendance_rollup.py command after enabling the rollup on an
+existing database.
+"""
+
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import delete, event, func, inspect, select, update
+from sqlalchemy.orm import Session
+
+from app.models.attendance import AttendanceDailyRollup, AttendanceRecord, Student
+from app.services.analytics_service import school_day_start, to_school_date
+
+RollupKey = Tuple[str, str, date, str]
+
+rollup_table = AttendanceDailyRollup.__table__
+
+
+def normalize_status(status: Optional[str]) -> str:
+    """Status as stored in the rollup: lower-case, "unknown" when empty"""
+    return (status or "unknown").lower()
+
+
+def _aggregate(rows: Iterable[Tuple[str, str, datetime, Optional[str]]]) -> Dict[RollupKey, List]:
+    """Group (class_id, student_id, scan_time, status) rows into [count, first, last]"""
+    groups: Dict[RollupKey, List] = {}
+    for class_id, student_id, scan_time, status in rows:
+        key = (class_id, student_id, to_school_date(scan_time), normalize_status(status))
+        group = groups.get(key)
+        if group is None:
+            groups[key] = [1, scan_time, scan_time]
+        else:
+            group[0] += 1
+            group[1] = min(group[1], scan_time)
+            group[2] = max(group[2], scan_time)
+    return groups
+
+
+def _as_rows(groups: Dict[RollupKey, List]) -> List[Dict]:
+    return [
+        {
+            "class_id": class_id,
+            "student_id": student_id,
+            "day": day,
+            "status": status,
+            "count": count,
+            "first_scan": first_scan,
+            "last_scan": last_scan,
+        }
+        for (class_id, student_id, day, status), (count, first_scan, last_scan) in groups.items()
+    ]
+
+
+def _upsert(connection, rows: List[Dict]):
+    """Add counts to existing rollup rows, inserting missing ones"""
+    if not rows:
+        return
+
+    dialect = connection.dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+            earliest, latest = func.least, func.greatest
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+            earliest, latest = func.min, func.max
+
+        stmt = insert(rollup_table).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[c.name for c in rollup_table.primary_key.columns],
+            set_={
+                "count": rollup_table.c.count + stmt.excluded.count,
+                "first_scan": earliest(rollup_table.c.first_scan, stmt.excluded.first_scan),
+                "last_scan": latest(rollup_table.c.last_scan, stmt.excluded.last_scan),
+            },
+        )
+        connection.execute(stmt)
+        return
+
+    # Generic fallback: update, then insert rows that did not exist yet
+    for row in rows:
+        key = [rollup_table.c[name] == row[name] for name in ("class_id", "student_id", "day", "status")]
+        existing = connection.execute(
+            select(rollup_table.c.first_scan, rollup_table.c.last_scan).where(*key)
+        ).first()
+        if existing is None:
+            connection.execute(rollup_table.insert().values(**row))
+        else:
+            connection.execute(update(rollup_table).where(*key).values(
+                count=rollup_table.c.count + row["count"],
+                first_scan=min(existing.first_scan, row["first_scan"]),
+                last_scan=max(existing.last_scan, row["last_scan"]),
+            ))
+
+
+def _rebuild_student_days(connection, student_days: Set[Tuple[str, date]]):
+    """Recompute rollup rows of the given (student_id, day) pairs from raw records"""
+    for student_id, day in student_days:
+        connection.execute(delete(rollup_table).where(
+            rollup_table.c.student_id == student_id,
+            rollup_table.c.day == day,
+        ))
+        records = connection.execute(
+            select(
+                Student.class_id,
+                AttendanceRecord.student_id,
+                AttendanceRecord.scan_time,
+                AttendanceRecord.status,
+            ).join(
+                Student, Student.id == AttendanceRecord.student_id
+            ).where(
+                AttendanceRecord.student_id == student_id,
+                AttendanceRecord.scan_time >= school_day_start(day),
+                AttendanceRecord.scan_time < school_day_start(day + timedelta(days=1)),
+            )
+        ).all()
+        rows = _as_rows(_aggregate(records))
+        if rows:
+            connection.execute(rollup_table.insert(), rows)
+
+
+def _rebuild_students(connection, student_ids: Set[str]):
+    """Recompute every rollup row of the given students from raw records"""
+    connection.execute(delete(rollup_table).where(rollup_table.c.student_id.in_(student_ids)))
+    records = connection.execute(
+        select(
+            Student.class_id,
+            AttendanceRecord.student_id,
+            AttendanceRecord.scan_time,
+            AttendanceRecord.status,
+        ).join(
+            Student, Student.id == AttendanceRecord.student_id
+        ).where(
+            AttendanceRecord.student_id.in_(student_ids),
+            AttendanceRecord.scan_time.isnot(None),
+        )
+    ).all()
+    rows = _as_rows(_aggregate(records))
+    if rows:
+        connection.execute(rollup_table.insert(), rows)
+
+
+def _history_values(record: AttendanceRecord, attr: str) -> List:
+    """Old and new values of a flushed attribute"""
+    history = inspect(record).attrs[attr].history
+    return [
+        value for value in (*history.deleted, *history.unchanged, *history.added)
+        if value is not None
+    ]
+
+
+def _after_flush(session: Session, flush_context):
+    """Apply the flushed attendance writes to the rollup in the same transaction"""
+    inserted = [obj for obj in session.new if isinstance(obj, AttendanceRecord)]
+    changed = [
+        obj for obj in session.dirty
+        if isinstance(obj, AttendanceRecord) and session.is_modified(obj, include_collections=False)
+    ]
+    deleted = [obj for obj in session.deleted if isinstance(obj, AttendanceRecord)]
+    moved = {
+        obj.id for obj in session.dirty
+        if isinstance(obj, Student) and inspect(obj).attrs["class_id"].history.has_changes()
+    }
+    if not (inserted or changed or deleted or moved):
+        return
+
+    connection = session.connection()
+
+    if inserted:
+        student_ids = {record.student_id for record in inserted}
+        class_ids = dict(connection.execute(
+            select(Student.id, Student.class_id).where(Student.id.in_(student_ids))
+        ).all())
+        _upsert(connection, _as_rows(_aggregate(
+            (class_ids[record.student_id], record.student_id, record.scan_time, record.status)
+            for record in inserted
+            if record.student_id in class_ids and record.scan_time is not None
+        )))
+
+    # Rare paths: rebuild every student-day the record was in before or after the change
+    student_days: Set[Tuple[str, date]] = set()
+    for record in changed + deleted:
+        for student_id in _history_values(record, "student_id"):
+            for scan_time in _history_values(record, "scan_time"):
+                student_days.add((student_id, to_school_date(scan_time)))
+    _rebuild_student_days(connection, {
+        (student_id, day) for student_id, day in student_days if student_id not in moved
+    })
+    if moved:
+        _rebuild_students(connection, moved)
+
+
+event.listen(Session, "after_flush", _after_flush)
+
+
+def rebuild_rollup(db: Session, since: Optional[date] = None, chunk_size: int = 5000) -> Dict:
+    """
+    Recompute the rollup from attendance_records.
+
+    Args:
+        db: Database session (the caller commits)
+        since: Only rebuild days on or after this local date
+        chunk_size: Rows fetched and inserted per batch
+
+    Returns:
+        Dictionary with the number of records read and rollup rows written
+    """
+    clear = delete(rollup_table)
+    query = db.query(
+        Student.class_id,
+        AttendanceRecord.student_id,
+        AttendanceRecord.scan_time,
+        AttendanceRecord.status,
+    ).join(
+        Student, Student.id == AttendanceRecord.student_id
+    ).filter(AttendanceRecord.scan_time.isnot(None))
+    if since is not None:
+        clear = clear.where(rollup_table.c.day >= since)
+        query = query.filter(AttendanceRecord.scan_time >= school_day_start(since))
+
+    db.execute(clear)
+
+    groups = _aggregate(query.yield_per(chunk_size))
+    records = sum(count for count, _, _ in groups.values())
+
+    rows = _as_rows(groups)
+    for start in range(0, len(rows), chunk_size):
+        db.execute(rollup_table.insert(), rows[start:start + chunk_size])
+
+    return {"records": records, "rows": len(rows)}
@@ -0,0 +1,436 @@
+"""
+Columnar NumPy analytics engine.
+
+The report range is loaded once, in chunks, into compact parallel arrays:
+
+- student: int32 index into the roster of students seen
+- day:     int16 days since the dataset's base date (school-local date)
+- status:  int8 status code (see STATUS_CODES)
+- flags:   int8 bit set (IN_RANGE, RECENT), computed by the database
+
+Every AnalyticsService output is then computed with np.bincount over
+combined indices, i.e. 2-D histograms of (student, status), (day, status)
+and (class, status), instead of accumulating dicts row by row. Memory is
+about 8 bytes per record plus the current chunk. The latest scan per student
+comes from a separate GROUP BY query.
+
+Used by AnalyticsService when ANALYTICS_ENGINE=numpy.
+"""
+
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import case, func
+
+from app.models.attendance import AttendanceRecord, Student
+from app.models.classes import Class as ClassModel
+from app.services.analytics_service import (
+    RECENT_WINDOW_DAYS,
+    TREND_GRANULARITIES,
+    AnalyticsService,
+    bucket_start,
+)
+from app.services.pattern_engine import StatusMatrix, daily_code
+
+# Status codes of the normalized (lower-case) statuses
+PRESENT, ABSENT, TARDY, LATE, EXCUSED, OTHER = range(6)
+STATUS_CODES = {"present": PRESENT, "absent": ABSENT, "tardy": TARDY, "late": LATE, "excused": EXCUSED}
+N_CODES = 6
+# pattern_engine daily code of each status code
+DAILY_CODES = np.array(
+    [daily_code(status) for status in ("present", "absent", "tardy", "late", "excused", None)],
+    dtype=np.int8,
+)
+
+IN_RANGE = 1
+RECENT = 2
+
+
+def status_code(status: Optional[str]) -> int:
+    """int8 status code of a stored status"""
+    return STATUS_CODES.get((status or "unknown").lower(), OTHER)
+
+
+def histogram2d(rows: np.ndarray, cols: np.ndarray, n_rows: int, n_cols: int) -> np.ndarray:
+    """Counts of (row, col) pairs as an (n_rows, n_cols) matrix"""
+    flat = rows.astype(np.int64) * n_cols + cols
+    return np.bincount(flat, minlength=n_rows * n_cols).reshape(n_rows, n_cols)
+
+
+def status_counts(counts: np.ndarray) -> Dict[str, int]:
+    """Per-status counts (as used by the AnalyticsService builders) from code counts"""
+    return {
+        "present": int(counts[PRESENT]),
+        "absent": int(counts[ABSENT]),
+        "tardy": int(counts[TARDY]),
+        "late": int(counts[LATE]),
+        "excused": int(counts[EXCUSED]),
+        "other": int(counts[OTHER]),
+    }
+
+
+class ColumnarDataset:
+    """Attendance events of one report range as compact parallel arrays"""
+
+    def __init__(self, base_day: date):
+        self.base_day = base_day
+        self.student_ids: List[str] = []
+        self._student_index: Dict[str, int] = {}
+        self._status_cache: Dict[Optional[str], int] = {}
+        self._day_cache: Dict = {}
+        self._chunks: List[Tuple[np.ndarray, ...]] = []
+        # Latest in-range scan per student, aggregated by the database
+        self.last_scans: Dict[str, datetime] = {}
+
+        self.student = np.empty(0, dtype=np.int32)
+        self.day = np.empty(0, dtype=np.int16)
+        self.status = np.empty(0, dtype=np.int8)
+        self.flags = np.empty(0, dtype=np.int8)
+
+    def __len__(self) -> int:
+        return len(self.student)
+
+    @property
+    def n_students(self) -> int:
+        return len(self.student_ids)
+
+    @property
+    def n_days(self) -> int:
+        return int(self.day.max()) + 1 if len(self.day) else 0
+
+    def add_chunk(
+        self,
+        student_ids: Sequence[str],
+        days: Sequence,
+        statuses: Sequence[Optional[str]],
+        flags: Sequence[int],
+    ):
+        """
+        Append one chunk of records.
+
+        Values repeat heavily (students, days, statuses), so each distinct
+        value is converted once and records are mapped through dict lookups;
+        no per-record date or datetime objects are converted.
+
+        Args:
+            student_ids: Student ID per record
+            days: School-local date per record (date or ISO string)
+            statuses: Stored status per record
+            flags: IN_RANGE / RECENT bits per record
+        """
+        n = len(student_ids)
+        if n == 0:
+            return
+
+        # Register values not seen before; the per-record mapping below then
+        # runs entirely in C (map over dict.__getitem__)
+        students = self._student_index
+        for student_id in set(student_ids).difference(students):
+            students[student_id] = len(self.student_ids)
+            self.student_ids.append(student_id)
+
+        status_codes = self._status_cache
+        for status in set(statuses).difference(status_codes):
+            status_codes[status] = status_code(status)
+
+        day_indexes = self._day_cache
+        base = self.base_day.toordinal()
+        for day in set(days).difference(day_indexes):
+            value = day if isinstance(day, date) else date.fromisoformat(str(day))
+            day_indexes[day] = value.toordinal() - base
+
+        self._chunks.append((
+            np.fromiter(map(students.__getitem__, student_ids), dtype=np.int32, count=n),
+            np.fromiter(map(day_indexes.__getitem__, days), dtype=np.int16, count=n),
+            np.fromiter(map(status_codes.__getitem__, statuses), dtype=np.int8, count=n),
+            np.fromiter(flags, dtype=np.int8, count=n),
+        ))
+
+    def finalize(self) -> "ColumnarDataset":
+        """Concatenate the loaded chunks into the final arrays"""
+        if self._chunks:
+            columns = [self.student, self.day, self.status, self.flags]
+            self.student, self.day, self.status, self.flags = (
+                np.concatenate([column] + [chunk[i] for chunk in self._chunks])
+                for i, column in enumerate(columns)
+            )
+            self._chunks = []
+        return self
+
+    def mask(self, flag: int) -> np.ndarray:
+        return (self.flags & flag) != 0
+
+
+class ColumnarReport:
+    """
+    Every AnalyticsService report section computed from one ColumnarDataset.
+
+    Mirrors ReportContext, so the comprehensive endpoint and the per-section
+    methods work the same with either engine.
+    """
+
+    def __init__(
+        self,
+        service: AnalyticsService,
+        start_date: datetime,
+        end_date: datetime,
+        class_id: Optional[str] = None,
+        chunk_size: int = 50000,
+        dataset: Optional[ColumnarDataset] = None,
+        roster: Optional[List[Tuple[str, str, str, Optional[str]]]] = None,
+        classes: Optional[List[Tuple[str, str]]] = None,
+    ):
+        """
+        Args:
+            service: AnalyticsService providing the database session and builders
+            chunk_size: Records fetched per chunk when loading
+            dataset, roster, classes: Preloaded data (loaded from the
+                database when omitted); roster rows are
+                (student_id, first_name, last_name, class_id) and classes
+                rows are (class_id, name)
+        """
+        self.service = service
+        self.start_date = start_date
+        self.end_date = end_date
+        self.class_id = class_id
+        self.chunk_size = chunk_size
+        self._dataset = dataset
+        self._roster = roster
+        self._classes = classes
+        self._sections: Dict[str, Dict] = {}
+        self._student_matrices: Optional[Tuple[np.ndarray, np.ndarray]] = None
+        self._student_rows: Optional[List[Dict]] = None
+        self._status_matrix: Optional[StatusMatrix] = None
+
+    # =========================================================================
+    # LOADING
+    # =========================================================================
+
+    @property
+    def recent_start(self) -> datetime:
+        return self.end_date - timedelta(days=RECENT_WINDOW_DAYS)
+
+    @property
+    def dataset(self) -> ColumnarDataset:
+        if self._dataset is None:
+            self._dataset = self._load_dataset()
+        return self._dataset
+
+    def _load_dataset(self) -> ColumnarDataset:
+        service = self.service
+        load_start = min(self.start_date, self.recent_start)
+        # A day of margin keeps day indexes non-negative in any timezone
+        dataset = ColumnarDataset(base_day=(load_start - timedelta(days=1)).date())
+
+        flags = (
+            case((AttendanceRecord.scan_time >= self.start_date, IN_RANGE), else_=0)
+            + case((AttendanceRecord.scan_time >= self.recent_start, RECENT), else_=0)
+        )
+        query = service._records_in_range(
+            service.db.query(
+                AttendanceRecord.student_id,
+                service._local_day(),
+                AttendanceRecord.status,
+                flags,
+            ),
+            load_start, self.end_date, self.class_id,
+        )
+        result = service.db.execute(query.statement, execution_options={"yield_per": self.chunk_size})
+        for partition in result.partitions():
+            dataset.add_chunk(*zip(*partition))
+
+        last_scans = service._records_in_range(
+            service.db.query(AttendanceRecord.student_id, func.max(AttendanceRecord.scan_time)),
+            self.start_date, self.end_date, self.class_id,
+        ).group_by(AttendanceRecord.student_id)
+        dataset.last_scans = dict(last_scans.all())
+        return dataset.finalize()
+
+    @property
+    def roster(self) -> Dict[str, Tuple[str, str, Optional[str]]]:
+        """student_id -> (first_name, last_name, class_id)"""
+        if self._roster is None:
+            query = self.service.db.query(Student.id, Student.first_name, Student.last_name, Student.class_id)
+            if self.class_id:
+                query = query.filter(Student.class_id == self.class_id)
+            self._roster = query.all()
+        if not isinstance(self._roster, dict):
+            self._roster = {row[0]: tuple(row[1:]) for row in self._roster}
+        return self._roster
+
+    @property
+    def classes(self) -> List[Tuple[str, str]]:
+        if self._classes is None:
+            self._classes = self.service.db.query(ClassModel.id, ClassModel.name).order_by(ClassModel.id).all()
+        return self._classes
+
+    # =========================================================================
+    # HISTOGRAMS
+    # =========================================================================
+
+    def _section(self, name: str, build) -> Dict:
+        if name not in self._sections:
+            self._sections[name] = build()
+        return self._sections[name]
+
+    def student_matrices(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(students x status) counts for the range and for the recent window"""
+        if self._student_matrices is None:
+            data = self.dataset
+            in_range, recent = data.mask(IN_RANGE), data.mask(RECENT)
+            self._student_matrices = (
+                histogram2d(data.student[in_range], data.status[in_range], data.n_students, N_CODES),
+                histogram2d(data.student[recent], data.status[recent], data.n_students, N_CODES),
+            )
+        return self._student_matrices
+
+    def student_rows(self) -> List[Dict]:
+        """Per-student counts in the shape of AnalyticsService._performance_counts_*"""
+        if self._student_rows is not None:
+            return self._student_rows
+
+        data = self.dataset
+        in_range, recent = self.student_matrices()
+        roster = self.roster
+
+        # Only students with records in the report range get a summary
+        seen = np.flatnonzero(in_range.sum(axis=1))
+        counts, recent_counts = in_range[seen], recent[seen]
+        columns = zip(
+            seen.tolist(),
+            counts[:, PRESENT].tolist(),
+            counts[:, ABSENT].tolist(),
+            (counts[:, TARDY] + counts[:, LATE]).tolist(),
+            counts[:, EXCUSED].tolist(),
+            recent_counts.sum(axis=1).tolist(),
+            recent_counts[:, PRESENT].tolist(),
+            recent_counts[:, ABSENT].tolist(),
+        )
+
+        rows = []
+        for i, present, absent, tardy, excused, recent_total, recent_present, recent_absences in columns:
+            student_id = data.student_ids[i]
+            student = roster.get(student_id)
+            rows.append({
+                "student_id": student_id or "unknown",
+                "student_name": f"{student[0]} {student[1]}" if student else "Unknown",
+                "present_days": present,
+                "absent_days": absent,
+                "tardy_days": tardy,
+                "excused_days": excused,
+                "last_attendance_date": data.last_scans.get(student_id),
+                "recent_total": recent_total,
+                "recent_present": recent_present,
+                "recent_absences": recent_absences,
+            })
+        self._student_rows = rows
+        return rows
+
+    # =========================================================================
+    # SECTIONS
+    # =========================================================================
+
+    def get_attendance_stats(self) -> Dict:
+        def build():
+            in_range, _ = self.student_matrices()
+            if self.class_id:
+                total_students = len(self.roster)
+            else:
+                seen = in_range.sum(axis=1) > 0
+                roster = self.roster
+                total_students = sum(
+                    1 for i in np.flatnonzero(seen) if self.dataset.student_ids[i] in roster
+                )
+            return self.service._build_stats(
+                status_counts(in_range.sum(axis=0)), total_students, self.start_date, self.end_date
+            )
+
+        return self._section("stats", build)
+
+    def get_student_summaries(self) -> Dict:
+        return self._section("summaries", lambda: self.service._build_student_summaries(
+            self.student_rows(), self.start_date, self.end_date
+        ))
+
+    def get_daily_trends(self, granularity: str = "day") -> Dict:
+        if granularity not in TREND_GRANULARITIES:
+            raise ValueError(f"Unknown trend granularity: {granularity}")
+
+        def build():
+            data = self.dataset
+            in_range = data.mask(IN_RANGE)
+            by_day = histogram2d(data.day[in_range], data.status[in_range], data.n_days, N_CODES)
+
+            bucket_counts: Dict[date, Dict[str, int]] = {}
+            for day_index in np.flatnonzero(by_day.sum(axis=1)):
+                bucket = bucket_start(data.base_day + timedelta(days=int(day_index)), granularity)
+                counts = status_counts(by_day[day_index])
+                merged = bucket_counts.setdefault(bucket, {})
+                for status, count in counts.items():
+                    merged[status] = merged.get(status, 0) + count
+            return self.service._build_trends(bucket_counts, self.start_date, self.end_date, granularity)
+
+        return self._section(f"trends:{granularity}", build)
+
+    def get_performance_report(self) -> Dict:
+        return self._section("performance", lambda: self.service._build_performance_report(
+            self.student_rows(), self.start_date, self.end_date
+        ))
+
+    def get_class_comparisons(self) -> Dict:
+        """Cross-class comparison; only meaningful without a class filter"""
+        def build():
+            data = self.dataset
+            classes = self.classes
+            class_index = {class_id: i for i, (class_id, _) in enumerate(classes)}
+
+            # Class of each student index (len(classes) = no class / unknown)
+            no_class = len(classes)
+            student_class = np.array(
+                [class_index.get((self.roster.get(student_id) or (None, None, None))[2], no_class)
+                 for student_id in data.student_ids],
+                dtype=np.int32,
+            )
+            roster_sizes = np.bincount(
+                np.array([class_index.get(class_id, no_class) for _, _, class_id in self.roster.values()],
+                         dtype=np.int64),
+                minlength=no_class + 1,
+            )
+
+            in_range = data.mask(IN_RANGE)
+            by_class = histogram2d(
+                student_class[data.student[in_range]], data.status[in_range], no_class + 1, N_CODES
+            )
+
+            rows = [
+                {
+                    "class_id": class_id,
+                    "class_name": name,
+                    "student_count": int(roster_sizes[i]),
+                    "status_counts": status_counts(by_class[i]) if by_class[i].any() else {},
+                }
+                for i, (class_id, name) in enumerate(classes)
+            ]
+            return self.service._build_class_comparisons(rows, self.start_date, self.end_date)
+
+        return self._section("comparisons", build)
+
+    def status_matrix(self) -> StatusMatrix:
+        """Students x school days matrix of the range's daily statuses"""
+        if self._status_matrix is None:
+            data = self.dataset
+            in_range = data.mask(IN_RANGE)
+            self._status_matrix = StatusMatrix.build(
+                data.student_ids,
+                data.student[in_range],
+                data.day[in_range].astype(np.int64) + data.base_day.toordinal(),
+                DAILY_CODES[data.status[in_range]],
+            )
+        return self._status_matrix
+
+    def detect_patterns(self) -> Dict:
+        return self._section("patterns", lambda: self.service._build_patterns(
+            self.get_attendance_stats(), self.get_student_summaries(), self.start_date, self.end_date,
+            matrix=self.status_matrix(),
+        ))
@@ -0,0 +1,176 @@
+"""
+Priority-aware scheduler for CPU-bound CV work.
+
+Live attendance scans, enrollment and bulk/background jobs share one pool of
+worker threads through three queues:
+
+- interactive: attendance scans a teacher is waiting on
+- enrollment:  face enrollment captures
+- batch:       bulk work such as gallery bundle builds
+
+Workers pick the next job with smooth weighted round robin over the non-empty
+queues, so interactive work gets most of the CPU without starving the others.
+Jobs are never interrupted, so interactive jobs preempt batch work only at
+job boundaries. Batch work may never occupy every worker, which keeps a
+worker free for the next scan.
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+
+@dataclass
+class CVJob:
+    queue: str
+    fn: Callable[[], Any]
+    future: Future = field(default_factory=Future)
+    enqueued_at: float = field(default_factory=time.perf_counter)
+
+
+class CVScheduler:
+    """Weighted fair dispatch of CV jobs over a fixed worker pool"""
+
+    QUEUES = ("interactive", "enrollment", "batch")
+    DEFAULT_WEIGHTS = {"interactive": 8, "enrollment": 3, "batch": 1}
+
+    def __init__(
+        self,
+        workers: int = 2,
+        weights: Optional[Dict[str, int]] = None,
+        max_concurrency: Optional[Dict[str, int]] = None,
+    ):
+        self.workers = max(1, workers)
+        self.weights = dict(weights or self.DEFAULT_WEIGHTS)
+        self.max_concurrency = {queue: self.workers for queue in self.QUEUES}
+        if self.workers > 1:
+            self.max_concurrency["batch"] = self.workers - 1
+        self.max_concurrency.update(max_concurrency or {})
+
+        self._queues: Dict[str, deque] = {queue: deque() for queue in self.QUEUES}
+        self._running: Dict[str, int] = {queue: 0 for queue in self.QUEUES}
+        self._credit: Dict[str, int] = {queue: 0 for queue in self.QUEUES}
+        self._cond = threading.Condition()
+        self._threads: List[threading.Thread] = []
+        self._shutdown = False
+
+        metrics.register_collector(self._collect_metrics)
+
+    # =========================================================================
+    # SUBMISSION
+    # =========================================================================
+
+    def submit(self, queue: str, fn: Callable, *args, **kwargs) -> Future:
+        """Queue a job and return a concurrent.futures.Future for its result"""
+        if queue not in self._queues:
+            raise ValueError(f"Unknown CV queue: {queue}")
+
+        job = CVJob(queue=queue, fn=lambda: fn(*args, **kwargs))
+        with self._cond:
+            if self._shutdown:
+                raise RuntimeError("CV scheduler is shut down")
+            self._ensure_workers()
+            self._queues[queue].append(job)
+            self._cond.notify()
+        metrics.inc("cv_scheduler_submitted_total", queue=queue)
+        return job.future
+
+    async def run(self, queue: str, fn: Callable, *args, **kwargs) -> Any:
+        """Submit a job and await its result; cancelling the await drops a queued job"""
+        return await asyncio.wrap_future(self.submit(queue, fn, *args, **kwargs))
+
+    def executor(self, queue: str) -> Callable[[Callable], Any]:
+        """Adapter for Deadline.run(executor=...)"""
+        def run_on_queue(call: Callable):
+            return asyncio.wrap_future(self.submit(queue, call))
+        return run_on_queue
+
+    def queue_depths(self) -> Dict[str, int]:
+        with self._cond:
+            return {queue: len(jobs) for queue, jobs in self._queues.items()}
+
+    def shutdown(self, wait: bool = False):
+        """Stop workers after the jobs already running; queued jobs are cancelled"""
+        with self._cond:
+            self._shutdown = True
+            for jobs in self._queues.values():
+                while jobs:
+                    jobs.popleft().future.cancel()
+            self._cond.notify_all()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+    # =========================================================================
+    # DISPATCH
+    # =========================================================================
+
+    def _ensure_workers(self):
+        if self._threads:
+            return
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f"cv-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _next_job(self) -> Optional[CVJob]:
+        """Smooth weighted round robin over queues that may run another job"""
+        while True:
+            eligible = [
+                queue for queue in self.QUEUES
+                if self._queues[queue] and self._running[queue] < self.max_concurrency[queue]
+            ]
+            if not eligible:
+                return None
+
+            total = 0
+            for queue in eligible:
+                self._credit[queue] += self.weights[queue]
+                total += self.weights[queue]
+            chosen = max(eligible, key=lambda queue: self._credit[queue])
+            self._credit[chosen] -= total
+
+            job = self._queues[chosen].popleft()
+            # Skip jobs whose caller gave up (e.g. scan deadline) before they started
+            if job.future.set_running_or_notify_cancel():
+                return job
+            metrics.inc("cv_scheduler_cancelled_total", queue=chosen)
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                job = self._next_job()
+                while job is None and not self._shutdown:
+                    self._cond.wait()
+                    job = self._next_job()
+                if job is None:
+                    return
+                self._running[job.queue] += 1
+
+            started = time.perf_counter()
+            metrics.observe("cv_scheduler_wait_seconds", started - job.enqueued_at, queue=job.queue)
+            try:
+                job.future.set_result(job.fn())
+            except BaseException as e:
+                job.future.set_exception(e)
+            finally:
+                metrics.observe("cv_scheduler_run_seconds", time.perf_counter() - started, queue=job.queue)
+                with self._cond:
+                    self._running[job.queue] -= 1
+                    self._cond.notify_all()
+
+    def _collect_metrics(self):
+        with self._cond:
+            for queue in self.QUEUES:
+                metrics.set("cv_scheduler_queue_depth", len(self._queues[queue]), queue=queue)
+                metrics.set("cv_scheduler_running", self._running[queue], queue=queue)
+
+
+cv_scheduler = CVScheduler(workers=settings.CV_SCHEDULER_WORKERS)
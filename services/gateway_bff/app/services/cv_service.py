@@ -3,14 +3,19 @@ import numpy as np
 from typing import List, Optional, Tuple, Dict
 from sqlalchemy.orm import Session
 import pickle
+import threading
 from datetime import datetime
 import base64
 from io import BytesIO
 from PIL import Image
 import mediapipe as mp
 
+from sqlalchemy import func
+
 from app.models.attendance import Student, FaceTemplate, AttendanceRecord
 from app.core.config import settings
+from app.services.gallery_index import GalleryIndex
+from app.utils.embeddings import decode_embedding
 
 class CVService:
     """Computer Vision Service for face detection, embedding extraction, and matching"""
@@ -22,6 +27,8 @@ class CVService:
             model_selection=1,  # 1 = full range, 0 = short range
             min_detection_confidence=0.5
         )
+        # MediaPipe graphs are not safe for concurrent use across worker threads
+        self._detector_lock = threading.Lock()
         
         # Fallback cascade classifier
         self.face_cascade = cv2.CascadeClassifier(
@@ -30,12 +37,20 @@ class CVService:
         
         self.confidence_threshold = getattr(settings, 'FACE_RECOGNITION_THRESHOLD', 0.6)
         self.embedding_dim = 128
+        
+        # Gallery index, rebuilt whenever the stored templates change
+        self.gallery_mode = getattr(settings, 'GALLERY_INDEX_MODE', 'float32')
+        self._gallery_index: Optional[GalleryIndex] = None
+        self._gallery_state = None
+        # Scans match from several CV workers; one of them rebuilds at a time
+        self._gallery_lock = threading.Lock()
     
     def detect_faces(self, image: np.ndarray) -> List[Dict]:
         """Detect faces in image using MediaPipe"""
         # Convert BGR to RGB for MediaPipe
         image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-        results = self.face_detector.process(image_rgb)
+        with self._detector_lock:
+            results = self.face_detector.process(image_rgb)
         
         detected_faces = []
         if results.detections:
@@ -139,33 +154,53 @@ class CVService:
         return features
     
     def match_student(self, embedding: np.ndarray, db: Session) -> Optional[Dict]:
-        """Match face embedding against stored templates with temporal smoothing"""
-        templates = db.query(FaceTemplate).all()
+        """Match face embedding against stored templates"""
+        index = self.get_gallery_index(db)
+        if len(index) == 0:
+            return None
         
-        if not templates:
+        match = index.search(embedding, threshold=self.confidence_threshold)
+        if match is None:
             return None
         
-        best_match = None
-        best_confidence = 0.0
+        return {
+            "student_id": match["student_id"],
+            "confidence": match["confidence"]
+        }
+    
+    def get_gallery_index(self, db: Session) -> GalleryIndex:
+        """Get the in-memory gallery index, rebuilding it if templates changed"""
+        state = db.query(
+            func.count(FaceTemplate.id),
+            func.max(FaceTemplate.id),
+            func.max(FaceTemplate.updated_at),
+        ).one()
+        state = tuple(state)
         
-        for template in templates:
-            try:
-                stored_embedding = pickle.loads(
-                    template.embedding_data.encode('latin1')
-                )
-            except Exception:
+        with self._gallery_lock:
+            if self._gallery_index is None or state != self._gallery_state:
+                self._gallery_index = self._build_gallery_index(db)
+                self._gallery_state = state
+            return self._gallery_index
+    
+    def _build_gallery_index(self, db: Session) -> GalleryIndex:
+        student_ids = []
+        template_ids = []
+        embeddings = []
+        for template in db.query(FaceTemplate).order_by(FaceTemplate.id).all():
+            stored_embedding = decode_embedding(template.embedding_data)
+            if stored_embedding is None or stored_embedding.shape[0] != self.embedding_dim:
                 continue
-            
-            similarity = self._cosine_similarity(embedding, stored_embedding)
-            
-            if similarity > self.confidence_threshold and similarity > best_confidence:
-                best_confidence = similarity
-                best_match = {
-                    "student_id": template.student_id,
-                    "confidence": float(similarity)
-                }
+            student_ids.append(template.student_id)
+            template_ids.append(template.id)
+            embeddings.append(stored_embedding)
         
-        return best_match
+        return GalleryIndex(
+            student_ids,
+            np.vstack(embeddings) if embeddings else np.zeros((0, self.embedding_dim), dtype=np.float32),
+            mode=self.gallery_mode,
+            template_ids=template_ids,
+        )
     
     def store_face_template(
         self, 
@@ -0,0 +1,185 @@
+"""
+Near-duplicate face detection across all enrolled templates.
+
+Mis-enrollments (twins, a photo of the wrong child, duplicate Student rows
+from repeated roster imports) show up as pairs of templates that belong to
+different students but are more similar than the recognition threshold.
+
+All-pairs similarity is computed with blocked matrix multiplication so only
+a (block_size x block_size) similarity tile is materialized at a time.
+"""
+
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.attendance import FaceTemplate, Student
+from app.utils.embeddings import decode_embedding, normalize_rows
+
+
+def find_similar_pairs(
+    embeddings: np.ndarray,
+    student_ids: Sequence[str],
+    threshold: float,
+    block_size: int = 2048,
+    query_rows: Optional[np.ndarray] = None,
+) -> List[tuple]:
+    """
+    Find row pairs from different students with cosine similarity above threshold.
+
+    Args:
+        embeddings: (n, dim) template matrix
+        student_ids: Student ID for each row
+        threshold: Minimum cosine similarity to report
+        block_size: Rows per similarity tile
+        query_rows: Optional row indices to compare against everything
+            (incremental mode); by default every pair is compared once
+
+    Returns:
+        List of (row_a, row_b, similarity) with row_a < row_b
+    """
+    matrix = normalize_rows(embeddings)
+    n = matrix.shape[0]
+    # Integer codes make the same-student mask a cheap vectorized compare
+    _, codes = np.unique(np.asarray(student_ids), return_inverse=True)
+
+    if query_rows is None:
+        query_rows = np.arange(n)
+        upper_only = True
+    else:
+        query_rows = np.unique(np.asarray(query_rows, dtype=np.int64))
+        upper_only = False
+    is_query = np.zeros(n, dtype=bool)
+    is_query[query_rows] = True
+
+    pairs = []
+    for q_start in range(0, len(query_rows), block_size):
+        rows_a = query_rows[q_start:q_start + block_size]
+        block_a = matrix[rows_a]
+
+        # In full mode each pair is visited from its lower-indexed row only
+        col_start = int(rows_a[0]) if upper_only else 0
+        for c_start in range(col_start, n, block_size):
+            c_stop = min(c_start + block_size, n)
+            rows_b = np.arange(c_start, c_stop)
+
+            tile = block_a @ matrix[c_start:c_stop].T
+            mask = tile > threshold
+            mask &= codes[rows_a][:, None] != codes[rows_b][None, :]
+            if upper_only:
+                mask &= rows_a[:, None] < rows_b[None, :]
+            else:
+                # Pairs of two query rows are kept only once
+                mask &= ~(is_query[rows_b][None, :] & (rows_b[None, :] <= rows_a[:, None]))
+
+            for i, j in zip(*np.nonzero(mask)):
+                a, b = int(rows_a[i]), int(rows_b[j])
+                pairs.append((min(a, b), max(a, b), float(tile[i, j])))
+
+    pairs.sort(key=lambda pair: pair[2], reverse=True)
+    return pairs
+
+
+class DuplicateFaceDetector:
+    """Admin job that reports templates of different students that look alike"""
+
+    def __init__(
+        self,
+        db: Session,
+        threshold: Optional[float] = None,
+        block_size: int = 2048,
+        embedding_dim: int = 128,
+    ):
+        self.db = db
+        self.threshold = threshold if threshold is not None else settings.FACE_RECOGNITION_THRESHOLD
+        self.block_size = block_size
+        self.embedding_dim = embedding_dim
+
+    def run(
+        self,
+        since_template_id: Optional[int] = None,
+        since: Optional[datetime] = None,
+    ) -> Dict:
+        """
+        Scan the gallery for near-duplicate templates.
+
+        Args:
+            since_template_id: Only compare templates with a larger ID
+                (newly enrolled) against the whole gallery
+            since: Only compare templates updated after this time
+
+        Returns:
+            Dictionary with the suspicious pairs and a watermark for the next
+            incremental run
+        """
+        template_ids = []
+        student_ids = []
+        updated = []
+        embeddings = []
+        for template in self.db.query(FaceTemplate).order_by(FaceTemplate.id).yield_per(1000):
+            embedding = decode_embedding(template.embedding_data)
+            if embedding is None or embedding.shape[0] != self.embedding_dim:
+                continue
+            template_ids.append(template.id)
+            student_ids.append(template.student_id)
+            updated.append(template.updated_at)
+            embeddings.append(embedding)
+
+        if not embeddings:
+            return {"pairs": [], "templates_scanned": 0, "new_templates": 0, "max_template_id": since_template_id}
+
+        query_rows = None
+        incremental = since_template_id is not None or since is not None
+        if incremental:
+            query_rows = np.array([
+                i for i, (template_id, updated_at) in enumerate(zip(template_ids, updated))
+                if (since_template_id is not None and template_id > since_template_id)
+                or (since is not None and updated_at is not None and updated_at > since)
+            ], dtype=np.int64)
+
+        if query_rows is not None and len(query_rows) == 0:
+            pairs = []
+        else:
+            pairs = find_similar_pairs(
+                np.vstack(embeddings),
+                student_ids,
+                self.threshold,
+                block_size=self.block_size,
+                query_rows=query_rows,
+            )
+
+        involved = {student_ids[a] for a, _, _ in pairs} | {student_ids[b] for _, b, _ in pairs}
+        students = {
+            s.id: s for s in self.db.query(Student).filter(Student.id.in_(involved)).all()
+        } if involved else {}
+
+        def describe(row: int) -> Dict:
+            student = students.get(student_ids[row])
+            return {
+                "template_id": template_ids[row],
+                "student_id": student_ids[row],
+                "student_name": f"{student.first_name} {student.last_name}" if student else "Unknown",
+                "class_id": student.class_id if student else None,
+            }
+
+        report = []
+        for a, b, similarity in pairs:
+            first, second = describe(a), describe(b)
+            report.append({
+                "similarity": round(similarity, 4),
+                "template_a": first,
+                "template_b": second,
+                # Same name under two IDs usually means a duplicate roster import
+                "same_name": first["student_name"].lower() == second["student_name"].lower(),
+            })
+
+        return {
+            "pairs": report,
+            "threshold": self.threshold,
+            "templates_scanned": len(template_ids),
+            "new_templates": len(query_rows) if query_rows is not None else len(template_ids),
+            "max_template_id": max(template_ids),
+        }
@@ -0,0 +1,189 @@
+"""
+In-memory face gallery index with float32, float16 and int8 storage modes.
+
+Rows are L2-normalized so cosine similarity is a dot product:
+
+- float32: reference mode, BLAS matrix-vector product
+- float16: half the memory, products accumulated in float32
+- int8:    a quarter of the memory; rows and the query are quantized with a
+           per-vector scale, dot products are accumulated in int32 and
+           rescaled by (row_scale * query_scale)
+"""
+
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.utils.embeddings import normalize_rows, quantize_float16, quantize_int8
+
+
+class GalleryIndex:
+    """Matrix of enrolled face templates supporting batched similarity search"""
+
+    MODES = ("float32", "float16", "int8")
+
+    def __init__(
+        self,
+        student_ids: Sequence[str],
+        embeddings: np.ndarray,
+        mode: str = "float32",
+        template_ids: Optional[Sequence[int]] = None,
+    ):
+        if mode not in self.MODES:
+            raise ValueError(f"Unsupported gallery index mode: {mode}")
+
+        self.mode = mode
+        self.student_ids: List[str] = list(student_ids)
+        self.template_ids: List[int] = list(template_ids) if template_ids is not None else []
+
+        if self.student_ids:
+            matrix = normalize_rows(np.atleast_2d(np.asarray(embeddings, dtype=np.float32)))
+        else:
+            matrix = np.zeros((0, 0), dtype=np.float32)
+        self.dim = matrix.shape[1]
+        self._scales: Optional[np.ndarray] = None
+
+        if mode == "float32":
+            self._matrix = np.ascontiguousarray(matrix)
+        elif mode == "float16":
+            self._matrix = np.ascontiguousarray(quantize_float16(matrix))
+        else:
+            self._matrix, self._scales = quantize_int8(matrix)
+
+    def __len__(self) -> int:
+        return len(self.student_ids)
+
+    @property
+    def memory_bytes(self) -> int:
+        """Bytes used by the stored matrix (and int8 scales)"""
+        size = self._matrix.nbytes
+        if self._scales is not None:
+            size += self._scales.nbytes
+        return size
+
+    def similarities(self, queries: np.ndarray) -> np.ndarray:
+        """
+        Cosine similarity of each query against every gallery row.
+
+        Args:
+            queries: (dim,) or (n, dim) float embeddings
+
+        Returns:
+            (n, rows) float32 similarity matrix
+        """
+        queries = normalize_rows(np.atleast_2d(np.asarray(queries, dtype=np.float32)))
+        if len(self) == 0:
+            return np.zeros((queries.shape[0], 0), dtype=np.float32)
+
+        if self.mode == "float32":
+            return queries @ self._matrix.T
+
+        if self.mode == "float16":
+            return np.matmul(
+                quantize_float16(queries), self._matrix.T, dtype=np.float32
+            )
+
+        query_q, query_scales = quantize_int8(queries)
+        dots = np.matmul(query_q, self._matrix.T, dtype=np.int32)
+        return dots.astype(np.float32) * query_scales[:, None] * self._scales[None, :]
+
+    def search(self, query: np.ndarray, threshold: float = 0.0) -> Optional[Dict]:
+        """
+        Find the best matching template for one embedding.
+
+        Returns:
+            {"student_id", "confidence", "template_id"} or None if nothing
+            scores above the threshold
+        """
+        if len(self) == 0:
+            return None
+
+        scores = self.similarities(query)[0]
+        best = int(np.argmax(scores))
+        confidence = float(np.clip(scores[best], -1.0, 1.0))
+        if confidence <= threshold:
+            return None
+
+        return {
+            "student_id": self.student_ids[best],
+            "confidence": confidence,
+            "template_id": self.template_ids[best] if self.template_ids else None,
+        }
+
+
+def evaluate_modes(
+    student_ids: Sequence[str],
+    embeddings: np.ndarray,
+    modes: Sequence[str] = ("float16", "int8"),
+    noise: float = 0.0,
+    chunk_size: int = 1024,
+    seed: int = 0,
+) -> Dict[str, Dict]:
+    """
+    Compare quantized index modes against float32 on a set of templates.
+
+    Every template is used as a query (optionally perturbed with Gaussian
+    noise) against the rest of the gallery (leave-one-out). Queries are
+    processed in chunks so memory stays bounded.
+
+    Returns:
+        Per-mode dictionary with top-1 template and student agreement with
+        float32, mean/max absolute similarity error and memory footprint
+    """
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    reference = GalleryIndex(student_ids, embeddings, mode="float32")
+    candidates = {mode: GalleryIndex(student_ids, embeddings, mode=mode) for mode in modes}
+
+    queries = normalize_rows(embeddings)
+    if noise > 0:
+        rng = np.random.default_rng(seed)
+        queries = normalize_rows(queries + rng.normal(0.0, noise, queries.shape).astype(np.float32))
+
+    students = np.asarray(student_ids)
+    totals = {
+        mode: {"template_agree": 0, "student_agree": 0, "abs_error_sum": 0.0, "max_abs_error": 0.0}
+        for mode in modes
+    }
+
+    n = len(reference)
+    for start in range(0, n, chunk_size):
+        stop = min(start + chunk_size, n)
+        rows = np.arange(start, stop)
+
+        ref_scores = reference.similarities(queries[start:stop])
+        ref_scores[rows - start, rows] = -np.inf
+        ref_top = np.argmax(ref_scores, axis=1)
+        ref_scores[rows - start, rows] = 0.0
+
+        for mode, index in candidates.items():
+            scores = index.similarities(queries[start:stop])
+            error = np.abs(scores - ref_scores)
+            error[rows - start, rows] = 0.0
+            scores[rows - start, rows] = -np.inf
+            top = np.argmax(scores, axis=1)
+
+            total = totals[mode]
+            total["template_agree"] += int(np.sum(top == ref_top))
+            total["student_agree"] += int(np.sum(students[top] == students[ref_top]))
+            total["abs_error_sum"] += float(error.sum())
+            total["max_abs_error"] = max(total["max_abs_error"], float(error.max(initial=0.0)))
+
+    pairs = max(n * (n - 1), 1)
+    results = {
+        "float32": {
+            "top1_template_agreement": 1.0,
+            "top1_student_agreement": 1.0,
+            "mean_abs_similarity_error": 0.0,
+            "max_abs_similarity_error": 0.0,
+            "memory_bytes": reference.memory_bytes,
+        }
+    }
+    for mode, total in totals.items():
+        results[mode] = {
+            "top1_template_agreement": total["template_agree"] / n if n else 1.0,
+            "top1_student_agreement": total["student_agree"] / n if n else 1.0,
+            "mean_abs_similarity_error": total["abs_error_sum"] / pairs,
+            "max_abs_similarity_error": total["max_abs_error"],
+            "memory_bytes": candidates[mode].memory_bytes,
+        }
+    return results
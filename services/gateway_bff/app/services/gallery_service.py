@@ -0,0 +1,257 @@
+"""
+Class gallery bundles for on-device matching.
+
+A bundle is a compact binary snapshot of every face template in a class so the
+teacher app can match faces locally with one download per class.
+
+Bundle layout (all integers little-endian):
+
+    b"CTGB"                 magic
+    uint8                   bundle format version (1)
+    uint32                  header length in bytes
+    header                  UTF-8 JSON (class_id, version, base_version, dtype,
+                            dim, rows, student_ids, template_ids,
+                            enrolled_student_ids, removed_template_ids)
+    float32[rows]           per-row scales (int8 bundles only)
+    dtype[rows * dim]       row-major embedding matrix
+
+`student_ids` and `template_ids` are aligned with the matrix rows. A delta
+bundle (`base_version` > 0) carries every template of the students whose
+templates changed or were deleted since `base_version`; clients drop the
+rows in `removed_template_ids`, replace all rows of the students in
+`student_ids` and drop any student that is not in `enrolled_student_ids`.
+
+Deleted templates are recorded in face_template_tombstones by a Session
+hook, so deletions advance the gallery version like updates do. The same hook
+handles a student moving to another class: their templates are tombstoned
+under the old class and touched, so both galleries advance and the new class's
+deltas carry the student.
+"""
+
+import hashlib
+import json
+import struct
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import event, func, inspect, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.models.attendance import FaceTemplate, FaceTemplateTombstone, Student
+from app.utils.embeddings import decode_embedding, quantize_float16, quantize_int8
+
+BUNDLE_MAGIC = b"CTGB"
+BUNDLE_FORMAT_VERSION = 1
+
+
+def version_from_datetime(value: Optional[datetime]) -> int:
+    """Gallery versions are template update (or deletion) times in epoch microseconds"""
+    if value is None:
+        return 0
+    delta = value.replace(tzinfo=timezone.utc) - datetime(1970, 1, 1, tzinfo=timezone.utc)
+    return delta // timedelta(microseconds=1)
+
+
+def datetime_from_version(version: int) -> datetime:
+    """Inverse of version_from_datetime (naive UTC, like the model columns)"""
+    return datetime(1970, 1, 1) + timedelta(microseconds=version)
+
+
+class GalleryService:
+    """Builds versioned gallery bundles for a class"""
+
+    SUPPORTED_DTYPES = ("float16", "int8")
+
+    def __init__(self, db: Session, embedding_dim: int = 128):
+        self.db = db
+        self.embedding_dim = embedding_dim
+
+    def get_gallery_state(self, class_id: str) -> Dict:
+        """
+        Get the current version of a class gallery without loading embeddings.
+
+        Returns:
+            Dictionary with version, template fingerprint and enrolled students
+        """
+        latest = self.db.query(func.max(FaceTemplateTombstone.deleted_at)).filter(
+            FaceTemplateTombstone.class_id == class_id
+        ).scalar()
+        rows = self.db.query(
+            FaceTemplate.id,
+            FaceTemplate.student_id,
+            FaceTemplate.updated_at,
+        ).join(Student, Student.id == FaceTemplate.student_id).filter(
+            Student.class_id == class_id
+        ).order_by(FaceTemplate.id).all()
+
+        fingerprint = hashlib.sha1()
+        for template_id, student_id, updated_at in rows:
+            fingerprint.update(f"{template_id}:{student_id}:{updated_at}|".encode())
+            if updated_at and (latest is None or updated_at > latest):
+                latest = updated_at
+
+        return {
+            "version": version_from_datetime(latest),
+            "fingerprint": fingerprint.hexdigest(),
+            "template_count": len(rows),
+            "enrolled_student_ids": sorted({row.student_id for row in rows}),
+        }
+
+    def compute_etag(
+        self,
+        class_id: str,
+        state: Dict,
+        dtype: str,
+        since: Optional[int] = None,
+    ) -> str:
+        """Strong ETag for a bundle request"""
+        key = f"{class_id}:{state['fingerprint']}:{dtype}:{since or 0}:{BUNDLE_FORMAT_VERSION}"
+        return '"' + hashlib.sha1(key.encode()).hexdigest() + '"'
+
+    def build_bundle(
+        self,
+        class_id: str,
+        dtype: str = "float16",
+        since: Optional[int] = None,
+        state: Optional[Dict] = None,
+    ) -> bytes:
+        """
+        Build a full or delta gallery bundle.
+
+        Args:
+            class_id: Class whose gallery to export
+            dtype: 'float16' or 'int8'
+            since: Optional gallery version; only students changed since then are included
+            state: Optional precomputed result of get_gallery_state
+
+        Returns:
+            Bundle bytes (see module docstring for the layout)
+        """
+        if dtype not in self.SUPPORTED_DTYPES:
+            raise ValueError(f"Unsupported bundle dtype: {dtype}")
+
+        if state is None:
+            state = self.get_gallery_state(class_id)
+
+        query = self.db.query(FaceTemplate).join(
+            Student, Student.id == FaceTemplate.student_id
+        ).filter(Student.class_id == class_id)
+        removed_template_ids: List[int] = []
+        if since:
+            changed_since = datetime_from_version(since)
+            removed = self.db.query(
+                FaceTemplateTombstone.template_id, FaceTemplateTombstone.student_id
+            ).filter(
+                FaceTemplateTombstone.class_id == class_id,
+                FaceTemplateTombstone.deleted_at > changed_since,
+            ).all()
+            removed_template_ids = sorted({template_id for template_id, _ in removed})
+            # Whole students, so a client replacing their rows keeps none stale
+            updated = select(FaceTemplate.student_id).where(FaceTemplate.updated_at > changed_since)
+            query = query.filter(
+                FaceTemplate.student_id.in_(updated)
+                | FaceTemplate.student_id.in_({student_id for _, student_id in removed})
+            )
+        templates = query.order_by(FaceTemplate.id).all()
+
+        student_ids: List[str] = []
+        template_ids: List[int] = []
+        embeddings = []
+        for template in templates:
+            embedding = decode_embedding(template.embedding_data)
+            if embedding is None or embedding.shape[0] != self.embedding_dim:
+                continue
+            student_ids.append(template.student_id)
+            template_ids.append(template.id)
+            embeddings.append(embedding)
+
+        matrix = (
+            np.vstack(embeddings) if embeddings
+            else np.zeros((0, self.embedding_dim), dtype=np.float32)
+        )
+
+        header = {
+            "class_id": class_id,
+            "version": state["version"],
+            "base_version": since or 0,
+            "dtype": dtype,
+            "dim": self.embedding_dim,
+            "rows": len(student_ids),
+            "student_ids": student_ids,
+            "template_ids": template_ids,
+            "enrolled_student_ids": state["enrolled_student_ids"],
+            "removed_template_ids": removed_template_ids,
+        }
+        header_bytes = json.dumps(header, separators=(",", ":")).encode("utf-8")
+
+        parts = [
+            BUNDLE_MAGIC,
+            struct.pack("<BI", BUNDLE_FORMAT_VERSION, len(header_bytes)),
+            header_bytes,
+        ]
+        if dtype == "int8":
+            quantized, scales = quantize_int8(matrix)
+            parts.append(scales.astype("<f4").tobytes())
+            parts.append(quantized.tobytes())
+        else:
+            parts.append(quantize_float16(matrix).astype("<f2").tobytes())
+
+        return b"".join(parts)
+
+
+# =============================================================================
+# DELETION TRACKING
+# =============================================================================
+
+def _after_flush(session: Session, flush_context):
+    """Record tombstones for deleted templates and for students who changed class"""
+    deleted = [obj for obj in session.deleted if isinstance(obj, FaceTemplate)]
+    moved = {}
+    for obj in session.dirty:
+        if isinstance(obj, Student):
+            history = inspect(obj).attrs["class_id"].history
+            if history.has_changes() and history.deleted:
+                moved[obj.id] = history.deleted[0]
+    if not (deleted or moved):
+        return
+
+    connection = session.connection()
+    deleted_at = datetime.utcnow()
+    tombstones = []
+    if deleted:
+        class_ids = dict(connection.execute(
+            select(Student.id, Student.class_id).where(Student.id.in_({template.student_id for template in deleted}))
+        ).all())
+        tombstones += [
+            {
+                "template_id": template.id,
+                "student_id": template.student_id,
+                "class_id": class_ids.get(template.student_id),
+                "deleted_at": deleted_at,
+            }
+            for template in deleted
+        ]
+    if moved:
+        # The old class drops the student's rows, the new class picks them up
+        # as changed templates in its next delta
+        templates = connection.execute(
+            select(FaceTemplate.id, FaceTemplate.student_id).where(FaceTemplate.student_id.in_(moved))
+        ).all()
+        tombstones += [
+            {
+                "template_id": template_id,
+                "student_id": student_id,
+                "class_id": moved[student_id],
+                "deleted_at": deleted_at,
+            }
+            for template_id, student_id in templates
+        ]
+        connection.execute(
+            update(FaceTemplate).where(FaceTemplate.student_id.in_(moved)).values(updated_at=deleted_at)
+        )
+    if tombstones:
+        connection.execute(insert(FaceTemplateTombstone), tombstones)
+
+
+event.listen(Session, "after_flush", _after_flush)
@@ -0,0 +1,252 @@
+"""
+Attendance insights for a class, computed from aggregates.
+
+The class's attendance is read as one row per (student, school day) with the
+number of scans and whether the student attended, either from
+attendance_daily_rollup (with ANALYTICS_ENGINE=rollup, for ranges on whole
+local days such as the default window) or from a GROUP BY over
+attendance_records. The response therefore
+costs roster x school days, not the number of scans the class accumulated.
+
+From the students x days attendance matrix it derives the class rate, the
+distribution of per-student rates (percentiles), the students whose
+attendance improved or declined most between the two halves of the range,
+and the patterns those numbers show.
+"""
+
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+
+from app.models.attendance import AttendanceDailyRollup, AttendanceRecord, Student
+from app.services.analytics_service import (
+    AnalyticsService,
+    normalized_status,
+    school_day_start,
+    sql_literal,
+    to_school_date,
+)
+
+# Statuses that do not count as attending
+NOT_ATTENDED = ("absent", "excused")
+PERCENTILES = (10, 25, 50, 75, 90)
+TOP_STUDENTS = 3
+# School days needed before the halves of the range are compared
+MIN_TREND_DAYS = 4
+TREND_THRESHOLD = 5.0  # Percentage points
+
+
+class InsightService:
+    """Class-level attendance insights"""
+
+    def __init__(self, db: Session, engine: Optional[str] = None):
+        self.db = db
+        self.analytics = AnalyticsService(db, engine=engine)
+
+    def get_attendance_insights(self, class_id: str, start_date: datetime, end_date: datetime) -> Dict:
+        """
+        Compute attendance insights for a class.
+
+        Returns:
+            Dictionary in the shape of AttendanceInsightResponse
+        """
+        roster = self.db.query(
+            Student.id, Student.first_name, Student.last_name
+        ).filter(Student.class_id == class_id).order_by(Student.id).all()
+        student_index = {student_id: i for i, (student_id, _, _) in enumerate(roster)}
+
+        rows = [
+            row for row in self._student_days(class_id, start_date, end_date)
+            if row[0] in student_index
+        ]
+        days = sorted({day for _, day, _, _ in rows})
+        day_index = {day: i for i, day in enumerate(days)}
+
+        attended = np.zeros((len(roster), len(days)), dtype=bool)
+        total_scans = 0
+        for student_id, day, attended_scans, scans in rows:
+            attended[student_index[student_id], day_index[day]] |= attended_scans > 0
+            total_scans += scans
+
+        n_students, school_days = attended.shape
+        attendance_rate = float(attended.mean() * 100) if attended.size else 0.0
+        rates = attended.mean(axis=1) * 100 if school_days else np.zeros(n_students)
+
+        distribution = None
+        if n_students and school_days:
+            values = np.percentile(rates, PERCENTILES)
+            distribution = {
+                "min": round(float(rates.min()), 2),
+                "p10": round(float(values[0]), 2),
+                "p25": round(float(values[1]), 2),
+                "median": round(float(values[2]), 2),
+                "p75": round(float(values[3]), 2),
+                "p90": round(float(values[4]), 2),
+                "max": round(float(rates.max()), 2),
+                "mean": round(float(rates.mean()), 2),
+            }
+
+        improved, declined, class_change = [], [], None
+        if n_students and school_days >= MIN_TREND_DAYS:
+            half = school_days // 2
+            first_half = attended[:, :half].mean(axis=1) * 100
+            second_half = attended[:, half:].mean(axis=1) * 100
+            change = second_half - first_half
+            class_change = float(attended[:, half:].mean() * 100 - attended[:, :half].mean() * 100)
+
+            def trend(i: int) -> Dict:
+                student_id, first_name, last_name = roster[i]
+                return {
+                    "student_id": student_id,
+                    "student_name": f"{first_name} {last_name}",
+                    "first_half_rate": round(float(first_half[i]), 2),
+                    "second_half_rate": round(float(second_half[i]), 2),
+                    "change": round(float(change[i]), 2),
+                }
+
+            order = np.argsort(-change, kind="stable")
+            improved = [trend(i) for i in order[:TOP_STUDENTS].tolist() if change[i] > 0]
+            order = np.argsort(change, kind="stable")
+            declined = [trend(i) for i in order[:TOP_STUDENTS].tolist() if change[i] < 0]
+
+        return {
+            "total_students": n_students,
+            "attendance_rate": round(attendance_rate, 2),
+            "total_scans": total_scans,
+            "date_range_days": (end_date - start_date).days or 1,
+            "school_days": school_days,
+            "distribution": distribution,
+            "most_improved": improved,
+            "most_declined": declined,
+            "patterns": self._patterns(attendance_rate, school_days, distribution, class_change),
+        }
+
+    # =========================================================================
+    # QUERIES
+    # =========================================================================
+
+    def _student_days(
+        self,
+        class_id: str,
+        start_date: datetime,
+        end_date: datetime,
+    ) -> List[Tuple[str, date, int, int]]:
+        """(student_id, local day, attended scans, scans) per student and school day"""
+        first_day, last_day = to_school_date(start_date), to_school_date(end_date)
+        # The rollup is only backfilled where the rollup engine is in use
+        use_rollup = (
+            self.analytics.engine == "rollup"
+            and school_day_start(first_day) == start_date
+            and school_day_start(last_day) == end_date
+        )
+        if use_rollup:
+            rollup = AttendanceDailyRollup
+            query = self.db.query(
+                rollup.student_id,
+                rollup.day,
+                func.sum(case((rollup.status.notin_(NOT_ATTENDED), rollup.count), else_=0)),
+                func.sum(rollup.count),
+            ).join(
+                Student, Student.id == rollup.student_id
+            ).filter(
+                Student.class_id == class_id,
+                rollup.day >= first_day,
+                # The range ends at the midnight that starts last_day
+                rollup.day < last_day,
+            ).group_by(rollup.student_id, rollup.day)
+        else:
+            day = self.analytics._local_day()
+            attended = case(
+                (normalized_status().notin_([sql_literal(status) for status in NOT_ATTENDED]), 1),
+                else_=0,
+            )
+            query = self.db.query(
+                AttendanceRecord.student_id,
+                day,
+                func.sum(attended),
+                func.count(AttendanceRecord.id),
+            ).join(
+                Student, Student.id == AttendanceRecord.student_id
+            ).filter(
+                Student.class_id == class_id,
+                AttendanceRecord.scan_time >= start_date,
+                AttendanceRecord.scan_time <= end_date,
+            ).group_by(AttendanceRecord.student_id, day)
+
+        return [
+            (
+                student_id,
+                day_value if isinstance(day_value, date) else date.fromisoformat(str(day_value)),
+                int(attended_scans or 0),
+                int(scans or 0),
+            )
+            for student_id, day_value, attended_scans, scans in query.all()
+        ]
+
+    # =========================================================================
+    # PATTERNS
+    # =========================================================================
+
+    def _patterns(
+        self,
+        attendance_rate: float,
+        school_days: int,
+        distribution: Optional[Dict],
+        class_change: Optional[float],
+    ) -> List[Dict]:
+        """InsightPattern dicts; confidence grows with the school days observed"""
+        if not school_days or distribution is None:
+            return [{
+                "type": "no_data",
+                "description": "No attendance recorded in this period",
+                "confidence": 1.0,
+                "explanation": "Insights appear once attendance scans are recorded for the class.",
+            }]
+
+        confidence = round(min(0.95, 0.5 + school_days / 40), 2)
+        patterns = []
+
+        if attendance_rate >= 95:
+            patterns.append({
+                "type": "high_engagement",
+                "description": f"Students attended {attendance_rate:.1f}% of school days",
+                "confidence": confidence,
+                "explanation": "Attendance is consistently high across the class.",
+            })
+        elif distribution["p10"] < 80:
+            patterns.append({
+                "type": "low_attendance_tail",
+                "description": f"The lowest 10% of students attend {distribution['p10']:.1f}% of school days or less",
+                "confidence": confidence,
+                "explanation": "A small group of students accounts for most missed days; targeted outreach is likely to help.",
+            })
+
+        spread = distribution["p90"] - distribution["p10"]
+        if spread >= 30:
+            patterns.append({
+                "type": "uneven_attendance",
+                "description": f"Attendance rates vary by {spread:.1f} points between the 10th and 90th percentile",
+                "confidence": confidence,
+                "explanation": "Attendance differs widely between students rather than dipping for the whole class.",
+            })
+
+        if class_change is not None and abs(class_change) >= TREND_THRESHOLD:
+            direction = "improving" if class_change > 0 else "declining"
+            patterns.append({
+                "type": direction,
+                "description": f"Class attendance is {direction}: {class_change:+.1f} points in the second half of the period",
+                "confidence": confidence,
+                "explanation": "Compares the share of school days attended in the two halves of the range.",
+            })
+
+        if not patterns:
+            patterns.append({
+                "type": "stable",
+                "description": f"Students attended {attendance_rate:.1f}% of school days",
+                "confidence": confidence,
+                "explanation": "No notable change or spread in attendance during this period.",
+            })
+        return patterns
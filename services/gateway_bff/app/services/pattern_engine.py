@@ -0,0 +1,239 @@
+"""
+Vectorized attendance pattern engine.
+
+A report range is turned into one students x school-days matrix of daily
+statuses, and every pattern is found for the whole roster at once:
+
+- absence streaks:       run-length encoding of each row's absence mask
+- Monday/Friday clusters: absences reduced per weekday (one matrix product)
+- declining attendance:  least-squares slope of every row in one product
+
+A school day is a weekday on which the scope has at least one record, so
+weekends, holidays and closures never count as absences. A school day
+without any record for a student counts as absent.
+
+Used by ReportContext and ColumnarReport for detect_patterns.
+"""
+
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Daily status codes; a day with several records takes the highest code
+NO_RECORD, ABSENT, EXCUSED, TARDY, PRESENT = range(5)
+
+STREAK_MIN_DAYS = 3  # Consecutive school days absent
+CLUSTER_MIN_ABSENCES = 2  # Monday + Friday absences
+CLUSTER_RATIO = 2.0  # Monday/Friday absence rate vs the midweek rate
+DECLINE_MIN_DAYS = 10  # School days needed for a trend
+DECLINE_THRESHOLD = 0.25  # Drop of the fitted attendance rate over the range
+
+
+def daily_code(status: Optional[str]) -> int:
+    """Daily code of a stored status; scans without a known status count as present"""
+    status = (status or "unknown").lower()
+    if status == "absent":
+        return ABSENT
+    if status == "excused":
+        return EXCUSED
+    if status in ("tardy", "late"):
+        return TARDY
+    return PRESENT
+
+
+class StatusMatrix:
+    """Daily status codes of every student (rows) on every school day (columns)"""
+
+    def __init__(self, student_ids: List[str], days: List[date], codes: np.ndarray):
+        self.student_ids = student_ids
+        self.days = days
+        self.codes = codes
+        self.weekdays = np.array([day.weekday() for day in days], dtype=np.int8)
+
+    @classmethod
+    def build(
+        cls,
+        student_ids: Sequence[str],
+        student: np.ndarray,
+        day_ordinals: np.ndarray,
+        codes: np.ndarray,
+    ) -> "StatusMatrix":
+        """
+        Build the matrix from per-record arrays.
+
+        Args:
+            student_ids: Student ID per student index
+            student: Student index per record
+            day_ordinals: School-local date.toordinal() per record
+            codes: daily_code per record
+
+        Only students with at least one record get a row, sorted by ID.
+        """
+        seen = np.flatnonzero(np.bincount(student, minlength=len(student_ids)))
+        # Rows in student ID order, whatever order the records came in
+        seen = seen[np.argsort(np.array(student_ids, dtype=object)[seen], kind="stable")]
+        row = np.full(len(student_ids), -1, dtype=np.int64)
+        row[seen] = np.arange(len(seen))
+
+        # Days span a short range, so bincount replaces a sort-based unique
+        day_ordinals = np.asarray(day_ordinals, dtype=np.int64)
+        first = int(day_ordinals.min()) if len(day_ordinals) else 0
+        offset = day_ordinals - first
+        has_records = np.bincount(offset) > 0 if len(offset) else np.zeros(0, dtype=bool)
+        ordinals = np.flatnonzero(has_records) + first
+        column = (np.cumsum(has_records) - 1)[offset]
+        # date(1, 1, 1) has ordinal 1 and is a Monday
+        school = (ordinals - 1) % 7 < 5
+        school_column = np.cumsum(school) - 1
+        on_school_day = school[column]
+
+        matrix = np.zeros((len(seen), int(school.sum())), dtype=np.int8)
+        cells = (
+            row[student[on_school_day]] * matrix.shape[1]
+            + school_column[column[on_school_day]]
+        )
+        codes = np.asarray(codes, dtype=np.int8)[on_school_day]
+        flat = matrix.reshape(-1)
+        # Ascending assignment leaves each cell with its highest code
+        for code in (ABSENT, EXCUSED, TARDY, PRESENT):
+            flat[cells[codes == code]] = code
+
+        return cls(
+            [student_ids[i] for i in seen.tolist()],
+            [date.fromordinal(int(ordinal)) for ordinal in ordinals[school]],
+            matrix,
+        )
+
+    @classmethod
+    def from_records(cls, records: Iterable[Tuple[str, date, Optional[str]]]) -> "StatusMatrix":
+        """Build the matrix from (student_id, local day, stored status) tuples"""
+        index: Dict[str, int] = {}
+        students, ordinals, codes = [], [], []
+        for student_id, day, status in records:
+            students.append(index.setdefault(student_id, len(index)))
+            ordinals.append(day.toordinal())
+            codes.append(daily_code(status))
+        return cls.build(
+            list(index),
+            np.array(students, dtype=np.int64),
+            np.array(ordinals, dtype=np.int64),
+            np.array(codes, dtype=np.int8),
+        )
+
+    @property
+    def n_students(self) -> int:
+        return self.codes.shape[0]
+
+    @property
+    def n_days(self) -> int:
+        return self.codes.shape[1]
+
+    def absent(self) -> np.ndarray:
+        """Unexcused absence mask (absent or no record)"""
+        return self.codes <= ABSENT
+
+    # =========================================================================
+    # MEASURES
+    # =========================================================================
+
+    def absence_runs(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(longest, ongoing) consecutive school days absent per student"""
+        n, d = self.codes.shape
+        padded = np.zeros((n, d + 2), dtype=np.int8)
+        padded[:, 1:-1] = self.absent()
+        edges = np.diff(padded, axis=1)
+        # Row-major order pairs every run start with its end
+        rows, starts = np.nonzero(edges == 1)
+        _, ends = np.nonzero(edges == -1)
+        lengths = ends - starts
+
+        longest = np.zeros(n, dtype=np.int64)
+        np.maximum.at(longest, rows, lengths)
+        ongoing = np.zeros(n, dtype=np.int64)
+        last = ends == d
+        ongoing[rows[last]] = lengths[last]
+        return longest, ongoing
+
+    def weekday_absences(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(students x Monday..Friday) absence counts and school days per weekday"""
+        weekday_columns = (self.weekdays[:, None] == np.arange(5)).astype(np.int32)
+        return self.absent().astype(np.int32) @ weekday_columns, weekday_columns.sum(axis=0)
+
+    def attendance_slopes(self) -> np.ndarray:
+        """Least-squares slope of daily attendance (1 attended, 0 absent) per student, per school day"""
+        d = self.n_days
+        if d < 2:
+            return np.zeros(self.n_students)
+        x = np.arange(d, dtype=np.float64) - (d - 1) / 2
+        # x sums to zero, so the intercept drops out of the slope
+        return (~self.absent()).astype(np.float64) @ x / (x @ x)
+
+    # =========================================================================
+    # PATTERNS
+    # =========================================================================
+
+    def find_patterns(self) -> Tuple[List[Dict], List[str]]:
+        """Per-student patterns as AttendancePattern dicts, plus recommendations"""
+        patterns: List[Dict] = []
+        recommendations: List[str] = []
+        if self.n_students == 0 or self.n_days == 0:
+            return patterns, recommendations
+
+        student_ids = np.array(self.student_ids, dtype=object)
+
+        longest, ongoing = self.absence_runs()
+        streak = np.flatnonzero(longest >= STREAK_MIN_DAYS)
+        if len(streak):
+            streak = streak[np.argsort(-longest[streak], kind="stable")]
+            n_ongoing = int((ongoing[streak] >= STREAK_MIN_DAYS).sum())
+            patterns.append({
+                "pattern_type": "absence_streak",
+                "description": (
+                    f"{len(streak)} students absent {STREAK_MIN_DAYS}+ school days in a row "
+                    f"(longest {int(longest[streak[0]])} days, {n_ongoing} ongoing)"
+                ),
+                "severity": "high" if n_ongoing else "medium",
+                "affected_students": student_ids[streak].tolist(),
+            })
+            recommendations.append("Contact families of students with consecutive absences")
+
+        absences, school_days = self.weekday_absences()
+        edge_absences = absences[:, 0] + absences[:, 4]
+        edge_days = school_days[0] + school_days[4]
+        midweek_days = school_days[1:4].sum()
+        if edge_days and midweek_days:
+            edge_rate = edge_absences / edge_days
+            midweek_rate = absences[:, 1:4].sum(axis=1) / midweek_days
+            cluster = np.flatnonzero(
+                (edge_absences >= CLUSTER_MIN_ABSENCES) & (edge_rate >= CLUSTER_RATIO * midweek_rate)
+            )
+            if len(cluster):
+                patterns.append({
+                    "pattern_type": "monday_friday_absences",
+                    "description": (
+                        f"{len(cluster)} students miss Mondays and Fridays at least "
+                        f"{CLUSTER_RATIO:g}x as often as midweek days"
+                    ),
+                    "severity": "medium",
+                    "affected_students": student_ids[cluster].tolist(),
+                })
+                recommendations.append("Check in with students who regularly miss Mondays and Fridays")
+
+        if self.n_days >= DECLINE_MIN_DAYS:
+            change = self.attendance_slopes() * (self.n_days - 1)
+            declining = np.flatnonzero(change <= -DECLINE_THRESHOLD)
+            if len(declining):
+                declining = declining[np.argsort(change[declining], kind="stable")]
+                patterns.append({
+                    "pattern_type": "declining",
+                    "description": (
+                        f"{len(declining)} students with attendance declining by "
+                        f"{DECLINE_THRESHOLD * 100:.0f}+ points over the period"
+                    ),
+                    "severity": "medium",
+                    "affected_students": student_ids[declining].tolist(),
+                })
+                recommendations.append("Follow up early with students whose attendance is declining")
+
+        return patterns, recommendations
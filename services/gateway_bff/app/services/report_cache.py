@@ -0,0 +1,417 @@
+"""
+Report result cache with write-driven invalidation.
+
+Cached reports are keyed by (endpoint, class_id, date range, parameters,
+data version) and stored in Redis, with a small in-process LRU in front.
+
+Data versions are Redis counters, one per class plus a global one for
+reports across all classes. Session hooks collect the classes touched by
+attendance, roster (Student) and Class writes and bump their versions after
+the transaction commits, so a cached report is never served once its data
+changed; old entries are simply never read again and expire. A commit on the
+event loop (AsyncSession) hands the bump to the threadpool, so its reports
+may be served for the duration of that Redis round trip.
+
+The version is read before a report is computed, so a report computed while
+a write commits is stored under the old version and never served. Without
+Redis the cache is bypassed: in-process versions alone would let other
+workers serve stale reports.
+
+Identical concurrent requests are coalesced (single flight), see
+get_or_compute_async. The Redis client is synchronous: the async path runs
+its Redis round trips in the threadpool so they never block the event loop.
+"""
+
+import asyncio
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Iterable, Optional, Set, Tuple
+
+import redis
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import event, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, redis_client
+from app.core.metrics import metrics
+from app.core.singleflight import SingleFlight
+from app.models.attendance import AttendanceRecord, Student
+from app.models.classes import Class as ClassModel
+
+ALL_CLASSES = "*"
+
+
+class ReportCache:
+    """Two-level (process memory + Redis) cache for computed reports"""
+
+    KEY_PREFIX = "report_cache"
+    # After a Redis error the cache is bypassed for this long
+    RETRY_AFTER_SECONDS = 30.0
+    LOCK_POLL_SECONDS = 0.05
+
+    def __init__(
+        self,
+        client,
+        ttl: int = 3600,
+        l1_size: int = 256,
+        enabled: bool = True,
+        lock_enabled: bool = False,
+        lock_ttl: float = 30.0,
+    ):
+        self.client = client
+        self.ttl = ttl
+        self.l1_size = l1_size
+        self.enabled = enabled
+        self.lock_enabled = lock_enabled
+        self.lock_ttl = lock_ttl
+        self._flight = SingleFlight("report_cache")
+        self._l1: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._redis_down_until = 0.0
+
+    # =========================================================================
+    # VERSIONS
+    # =========================================================================
+
+    def _version_key(self, scope: str) -> str:
+        return f"{self.KEY_PREFIX}:version:{scope}"
+
+    def version(self, class_id: Optional[str] = None) -> Optional[int]:
+        """Current data version of a class (or of all classes); None without Redis"""
+        value = self._redis("get", self._version_key(class_id or ALL_CLASSES))
+        if value is False:
+            return None
+        return int(value or 0)
+
+    def bump(self, class_ids: Iterable[Optional[str]]):
+        """Invalidate reports of the given classes and every cross-class report"""
+        if time.monotonic() < self._redis_down_until:
+            return
+        scopes = {class_id for class_id in class_ids if class_id} | {ALL_CLASSES}
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            for scope in scopes:
+                pipe.incr(self._version_key(scope))
+            pipe.execute()
+        except redis.RedisError as e:
+            self._mark_down(e)
+            return
+        metrics.inc("report_cache_invalidations_total", value=len(scopes))
+
+    # =========================================================================
+    # LOOKUP
+    # =========================================================================
+
+    def make_key(
+        self,
+        endpoint: str,
+        class_id: Optional[str],
+        start_date: datetime,
+        end_date: datetime,
+        version: int,
+        **params,
+    ) -> str:
+        """Cache key; the range is normalized to full ISO timestamps"""
+        parts = [
+            self.KEY_PREFIX,
+            endpoint,
+            class_id or ALL_CLASSES,
+            start_date.isoformat(timespec="microseconds"),
+            end_date.isoformat(timespec="microseconds"),
+        ]
+        parts += [f"{name}={params[name]}" for name in sorted(params)]
+        parts.append(f"v{version}")
+        return ":".join(parts)
+
+    def get_or_compute(
+        self,
+        endpoint: str,
+        class_id: Optional[str],
+        start_date: datetime,
+        end_date: datetime,
+        compute: Callable[[], Any],
+        **params,
+    ) -> Any:
+        """
+        Return the cached report or compute, store and return it.
+
+        Args:
+            endpoint: Report name used in the key and in metrics
+            class_id: Class filter (None for reports across all classes)
+            compute: Callable building the report (a dict or Pydantic model)
+            **params: Extra parameters that change the result
+
+        Returns:
+            JSON-compatible report (validated again by the response model)
+        """
+        return self.fetch(endpoint, class_id, start_date, end_date, compute, **params)[0]
+
+    def fetch(
+        self,
+        endpoint: str,
+        class_id: Optional[str],
+        start_date: datetime,
+        end_date: datetime,
+        compute: Callable[[], Any],
+        ttl: Optional[int] = None,
+        **params,
+    ) -> Tuple[Any, str]:
+        """get_or_compute returning (result, source); `ttl` overrides the Redis TTL"""
+        started = time.perf_counter()
+        version = self.version(class_id) if self.enabled else None
+        if version is None:
+            result = jsonable_encoder(compute())
+            self._observe(endpoint, "bypass", started)
+            return result, "bypass"
+
+        key = self.make_key(endpoint, class_id, start_date, end_date, version, **params)
+        result, source = self._lookup(key)
+        if source is None:
+            result = jsonable_encoder(compute())
+            self._store(key, result, ttl)
+            source = "miss"
+        self._observe(endpoint, source, started)
+        return result, source
+
+    async def get_or_compute_async(
+        self,
+        endpoint: str,
+        class_id: Optional[str],
+        start_date: datetime,
+        end_date: datetime,
+        compute: Callable[[AsyncSession], Awaitable[Any]],
+        **params,
+    ) -> Any:
+        """
+        Async get_or_compute for request handlers.
+
+        `compute` is a coroutine function awaited with an AsyncSession the
+        computation opens for itself (see async_analytics): concurrent
+        requests for the same key share one computation, within this worker
+        through SingleFlight and, with REPORT_CACHE_LOCK_ENABLED, across
+        workers through a Redis lock (waiters poll for the leader's cached
+        result). The shared computation outlives the request that started
+        it, so it must never use a request's session.
+        """
+        started = time.perf_counter()
+        version = await run_in_threadpool(self.version, class_id) if self.enabled else None
+        key = self.make_key(
+            endpoint, class_id, start_date, end_date,
+            version if version is not None else "bypass", **params,
+        )
+
+        if version is not None:
+            result, source = await self._lookup_async(key)
+            if source is not None:
+                self._observe(endpoint, source, started)
+                return result
+
+        async def compute_shared():
+            return await self._compute_shared(key, compute, store=version is not None, endpoint=endpoint)
+
+        (result, source), shared = await self._flight.do(key, compute_shared, endpoint=endpoint, scope="process")
+        self._observe(endpoint, "coalesced" if shared else source, started)
+        return result
+
+    def clear_local(self):
+        with self._lock:
+            self._l1.clear()
+
+    # =========================================================================
+    # INTERNALS
+    # =========================================================================
+
+    def _lookup(self, key: str) -> Tuple[Any, Optional[str]]:
+        """(result, "l1" or "redis") on a hit, (None, None) on a miss"""
+        result = self._l1_get(key)
+        if result is not None:
+            return result, "l1"
+
+        raw = self._redis("get", key)
+        if raw:
+            result = json.loads(raw)
+            self._l1_put(key, result)
+            return result, "redis"
+        return None, None
+
+    async def _lookup_async(self, key: str) -> Tuple[Any, Optional[str]]:
+        result = self._l1_get(key)
+        if result is not None:
+            return result, "l1"
+        return await run_in_threadpool(self._lookup, key)
+
+    def _store(self, key: str, result: Any, ttl: Optional[int] = None):
+        self._redis("set", key, json.dumps(result), ex=ttl or self.ttl)
+        self._l1_put(key, result)
+
+    async def _compute_shared(
+        self,
+        key: str,
+        compute: Callable[[AsyncSession], Awaitable[Any]],
+        store: bool,
+        endpoint: str,
+    ) -> Tuple[Any, str]:
+        """Compute a report once across workers; returns (result, source)"""
+        if not store:
+            return jsonable_encoder(await self._run(compute)), "bypass"
+
+        lock_key = f"{key}:lock"
+        token = uuid.uuid4().hex
+        acquired = False
+        if self.lock_enabled:
+            # True: we lead; None: another worker leads; False: Redis unavailable
+            acquired = await self._redis_async("set", lock_key, token, nx=True, px=int(self.lock_ttl * 1000))
+            if acquired is None:
+                result = await self._wait_for_leader(key, lock_key)
+                if result is not None:
+                    metrics.inc("report_cache_coalesced_total", endpoint=endpoint, scope="redis")
+                    return result, "coalesced"
+
+        try:
+            result = jsonable_encoder(await self._run(compute))
+            await run_in_threadpool(self._store, key, result)
+        finally:
+            if acquired is True and await self._redis_async("get", lock_key) == token.encode():
+                await self._redis_async("delete", lock_key)
+        return result, "miss"
+
+    @staticmethod
+    async def _run(compute: Callable[[AsyncSession], Awaitable[Any]]) -> Any:
+        async with AsyncSessionLocal() as session:
+            return await compute(session)
+
+    async def _wait_for_leader(self, key: str, lock_key: str) -> Optional[Any]:
+        """Poll for the result another worker is computing (None if it gave up)"""
+        deadline = time.monotonic() + self.lock_ttl
+        while time.monotonic() < deadline:
+            await asyncio.sleep(self.LOCK_POLL_SECONDS)
+            result, source = await self._lookup_async(key)
+            if source is not None:
+                return result
+            if not await self._redis_async("exists", lock_key):
+                # Leader finished without storing (error) or Redis went away
+                return (await self._lookup_async(key))[0]
+        return None
+
+    def _l1_get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._l1.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._l1[key]
+                return None
+            self._l1.move_to_end(key)
+            return value
+
+    def _l1_put(self, key: str, value: Any):
+        if self.l1_size <= 0:
+            return
+        with self._lock:
+            self._l1[key] = (time.monotonic() + self.ttl, value)
+            self._l1.move_to_end(key)
+            while len(self._l1) > self.l1_size:
+                self._l1.popitem(last=False)
+
+    def _redis(self, command: str, *args, **kwargs):
+        """Run a Redis command; returns False when Redis is unavailable"""
+        if time.monotonic() < self._redis_down_until:
+            return False
+        try:
+            return getattr(self.client, command)(*args, **kwargs)
+        except redis.RedisError as e:
+            self._mark_down(e)
+            return False
+
+    async def _redis_async(self, command: str, *args, **kwargs):
+        """_redis from the event loop (the command runs in the threadpool)"""
+        if time.monotonic() < self._redis_down_until:
+            return False
+        return await run_in_threadpool(self._redis, command, *args, **kwargs)
+
+    def _mark_down(self, error: Exception):
+        if time.monotonic() >= self._redis_down_until:
+            print(f"⚠️ Report cache: Redis unavailable, bypassing cache ({error})")
+        self._redis_down_until = time.monotonic() + self.RETRY_AFTER_SECONDS
+        metrics.inc("report_cache_errors_total")
+
+    def _observe(self, endpoint: str, source: str, started: float):
+        """
+        source: l1 / redis (hits), miss (computed and stored), coalesced
+        (shared another request's computation), bypass (no cache)
+        """
+        metrics.inc("report_cache_requests_total", endpoint=endpoint, source=source)
+        metrics.observe("report_cache_seconds", time.perf_counter() - started, endpoint=endpoint, source=source)
+
+
+report_cache = ReportCache(
+    redis_client,
+    ttl=settings.REPORT_CACHE_TTL,
+    l1_size=settings.REPORT_CACHE_L1_SIZE,
+    enabled=settings.REPORT_CACHE_ENABLED,
+    lock_enabled=settings.REPORT_CACHE_LOCK_ENABLED,
+    lock_ttl=settings.REPORT_CACHE_LOCK_TTL,
+)
+
+
+# =============================================================================
+# WRITE TRACKING
+# =============================================================================
+
+def _history_values(obj, attr: str) -> Set:
+    history = inspect(obj).attrs[attr].history
+    return {value for value in (*history.deleted, *history.unchanged, *history.added) if value is not None}
+
+
+def _after_flush(session: Session, flush_context):
+    """Remember which classes this transaction's writes touch"""
+    touched: Set[str] = session.info.setdefault("report_cache_classes", set())
+    student_ids: Set[str] = set()
+
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, AttendanceRecord):
+            student_ids |= _history_values(obj, "student_id")
+        elif isinstance(obj, Student):
+            touched |= _history_values(obj, "class_id")
+        elif isinstance(obj, ClassModel):
+            touched |= _history_values(obj, "id")
+        else:
+            continue
+        # Cross-class reports change with any write
+        touched.add(ALL_CLASSES)
+
+    if student_ids:
+        touched.update(session.connection().execute(
+            select(Student.class_id).where(Student.id.in_(student_ids))
+        ).scalars())
+
+
+def _after_commit(session: Session):
+    touched = session.info.pop("report_cache_classes", None)
+    if not touched:
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        # Scripts, the threadpool and background jobs
+        report_cache.bump(touched)
+        return
+    # AsyncSession commits run on the event loop: keep Redis off it
+    loop.run_in_executor(None, report_cache.bump, touched)
+
+
+def _after_rollback(session: Session):
+    session.info.pop("report_cache_classes", None)
+
+
+event.listen(Session, "after_flush", _after_flush)
+event.listen(Session, "after_commit", _after_commit)
+event.listen(Session, "after_rollback", _after_rollback)
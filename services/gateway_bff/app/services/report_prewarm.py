@@ -0,0 +1,227 @@
+"""
+Nightly report pre-warm.
+
+Without it the first dashboard view of the day pays the cold computation cost
+for every class. prewarm_reports() computes the standard report bundle
+(stats, student summaries, daily trends, performance) for the last 7, 30 and
+90 school days of every active class and stores it in the report cache, under
+the keys the report endpoints use for their `days` windows.
+
+Each (class, window) is one job on a bounded thread pool with its own
+session, and builds its bundle from one shared ReportContext. Sections that
+are already cached for the current data version are not recomputed.
+
+run_prewarm_schedule() runs the job every night at REPORT_PREWARM_HOUR
+(school time) from the API process; a Redis key makes sure only one worker
+runs it per day. prewarm_reports.py runs it on demand or from cron.
+"""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional
+from zoneinfo import ZoneInfo
+
+import redis
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.database import SessionLocal, redis_client
+from app.core.metrics import metrics
+from app.models.classes import Class as ClassModel
+from app.schemas.reports import (
+    AttendanceStatsResponse,
+    DailyTrendResponse,
+    PerformanceReportResponse,
+    StudentAttendanceSummaryResponse,
+)
+from app.services.analytics_service import AnalyticsService, school_day_window, to_school_date
+from app.services.report_cache import report_cache
+
+PREWARM_WINDOWS_DAYS = (7, 30, 90)
+
+# (cache endpoint, key params, response model, ReportContext section), matching
+# the report endpoints' default parameters
+SECTIONS = (
+    ("stats", {}, AttendanceStatsResponse, lambda report: report.get_attendance_stats()),
+    ("student_summaries", {}, StudentAttendanceSummaryResponse, lambda report: report.get_student_summaries()),
+    ("daily_trends", {"granularity": "day"}, DailyTrendResponse, lambda report: report.get_daily_trends()),
+    ("performance", {}, PerformanceReportResponse, lambda report: report.get_performance_report()),
+)
+
+RUN_KEY_PREFIX = "report_prewarm:run"
+
+
+def _warm(class_id: str, days: int, today: date) -> Dict:
+    """Compute and cache one class's bundle for one window"""
+    start, end = school_day_window(days, today)
+    job = {"class_id": class_id, "days": days, "sources": {}, "error": None}
+    began = time.perf_counter()
+    db = SessionLocal()
+    try:
+        report = AnalyticsService(db).report_context(start, end, class_id)
+        for endpoint, params, model, section in SECTIONS:
+            _, job["sources"][endpoint] = report_cache.fetch(
+                endpoint, class_id, start, end,
+                lambda: model(**section(report)),
+                ttl=settings.REPORT_PREWARM_TTL,
+                **params,
+            )
+    except Exception as e:
+        job["error"] = f"{type(e).__name__}: {e}"
+    finally:
+        db.close()
+    job["seconds"] = time.perf_counter() - began
+    return job
+
+
+def _active_classes(class_ids: Optional[Iterable[str]] = None) -> List[str]:
+    db = SessionLocal()
+    try:
+        query = db.query(ClassModel.id).filter(ClassModel.is_active.is_(True))
+        if class_ids:
+            query = query.filter(ClassModel.id.in_(list(class_ids)))
+        return [class_id for class_id, in query.order_by(ClassModel.id)]
+    finally:
+        db.close()
+
+
+def prewarm_reports(
+    windows: Iterable[int] = PREWARM_WINDOWS_DAYS,
+    workers: Optional[int] = None,
+    class_ids: Optional[Iterable[str]] = None,
+    today: Optional[date] = None,
+) -> Dict:
+    """
+    Pre-compute the report bundle of every active class into the report cache.
+
+    Args:
+        windows: Window lengths in school days
+        workers: Concurrent jobs (default: REPORT_PREWARM_WORKERS)
+        class_ids: Only warm these classes
+        today: Last school day of every window (default: today)
+
+    Returns:
+        Coverage and timing report (also printed)
+    """
+    windows = list(windows)
+    if report_cache.version() is None:
+        print("⚠️ Report pre-warm skipped: report cache unavailable")
+        metrics.inc("report_prewarm_runs_total", result="skipped")
+        return {"skipped": True}
+
+    today = today or to_school_date(datetime.utcnow())
+    started = time.perf_counter()
+    classes = _active_classes(class_ids)
+    jobs = [(class_id, days) for days in windows for class_id in classes]
+
+    with ThreadPoolExecutor(
+        max_workers=max(1, workers or settings.REPORT_PREWARM_WORKERS),
+        thread_name_prefix="report-prewarm",
+    ) as pool:
+        results = list(pool.map(lambda job: _warm(*job, today), jobs))
+
+    summary = _summarize(results, classes, windows, time.perf_counter() - started)
+    _log(summary)
+
+    metrics.inc("report_prewarm_runs_total", result="failed" if summary["failed_jobs"] else "ok")
+    metrics.set("report_prewarm_coverage_percent", summary["coverage_percent"])
+    metrics.set("report_prewarm_last_run_seconds", summary["seconds"])
+    for job in results:
+        metrics.observe("report_prewarm_job_seconds", job["seconds"], days=job["days"])
+    return summary
+
+
+def _summarize(results: List[Dict], classes: List[str], windows: List[int], elapsed: float) -> Dict:
+    expected = len(classes) * len(windows) * len(SECTIONS)
+    computed = sum(source == "miss" for job in results for source in job["sources"].values())
+    cached = sum(source in ("l1", "redis") for job in results for source in job["sources"].values())
+    job_seconds = sorted(job["seconds"] for job in results)
+
+    by_window = {}
+    for days in windows:
+        jobs = [job for job in results if job["days"] == days]
+        by_window[days] = {
+            "jobs": len(jobs),
+            "failed": sum(job["error"] is not None for job in jobs),
+            "seconds": round(sum(job["seconds"] for job in jobs), 3),
+            "max_seconds": round(max((job["seconds"] for job in jobs), default=0.0), 3),
+        }
+
+    return {
+        "skipped": False,
+        "classes": len(classes),
+        "windows": windows,
+        "jobs": len(results),
+        "failed_jobs": sum(job["error"] is not None for job in results),
+        "sections": expected,
+        "computed": computed,
+        "already_cached": cached,
+        "coverage_percent": round(100.0 * (computed + cached) / expected, 1) if expected else 100.0,
+        "seconds": round(elapsed, 3),
+        "job_p50_seconds": round(job_seconds[len(job_seconds) // 2], 3) if job_seconds else 0.0,
+        "job_max_seconds": round(job_seconds[-1], 3) if job_seconds else 0.0,
+        "by_window": by_window,
+        "slowest": [
+            {"class_id": job["class_id"], "days": job["days"], "seconds": round(job["seconds"], 3)}
+            for job in sorted(results, key=lambda job: job["seconds"], reverse=True)[:3]
+        ],
+        "errors": [
+            {"class_id": job["class_id"], "days": job["days"], "error": job["error"]}
+            for job in results if job["error"]
+        ],
+    }
+
+
+def _log(summary: Dict):
+    print(
+        f"🔥 Report pre-warm: {summary['classes']} classes x {len(summary['windows'])} windows, "
+        f"{summary['computed'] + summary['already_cached']}/{summary['sections']} sections cached "
+        f"({summary['coverage_percent']}%, {summary['computed']} computed, "
+        f"{summary['already_cached']} already cached) in {summary['seconds']:.1f}s"
+    )
+    for days, window in summary["by_window"].items():
+        print(f"   {days:>3}d: {window['jobs']} jobs, {window['seconds']:.1f}s total, "
+              f"slowest {window['max_seconds']:.2f}s, {window['failed']} failed")
+    for job in summary["slowest"]:
+        print(f"   slow: class {job['class_id']} {job['days']}d {job['seconds']:.2f}s")
+    for job in summary["errors"]:
+        print(f"   ❌ class {job['class_id']} {job['days']}d: {job['error']}")
+
+
+# =============================================================================
+# SCHEDULING
+# =============================================================================
+
+def seconds_until_next_run(now: Optional[datetime] = None) -> float:
+    """Seconds from `now` (aware, default: current time) to the next REPORT_PREWARM_HOUR"""
+    tz = ZoneInfo(settings.SCHOOL_TIMEZONE)
+    now = (now or datetime.now(timezone.utc)).astimezone(tz)
+    run_day = now.date()
+    if now.hour >= settings.REPORT_PREWARM_HOUR:
+        run_day += timedelta(days=1)
+    run_at = datetime(run_day.year, run_day.month, run_day.day, settings.REPORT_PREWARM_HOUR, tzinfo=tz)
+    return (run_at.astimezone(timezone.utc) - now.astimezone(timezone.utc)).total_seconds()
+
+
+def _claim_run(today: date) -> bool:
+    """Only the first API worker to claim a school day runs that day's pre-warm"""
+    try:
+        return bool(redis_client.set(f"{RUN_KEY_PREFIX}:{today.isoformat()}", "1", nx=True, ex=86400))
+    except redis.RedisError:
+        # The report cache is unavailable too, prewarm_reports would skip
+        return False
+
+
+async def run_prewarm_schedule():
+    """Run prewarm_reports every night at REPORT_PREWARM_HOUR school time"""
+    while True:
+        await asyncio.sleep(seconds_until_next_run())
+        if not _claim_run(to_school_date(datetime.utcnow())):
+            continue
+        try:
+            await run_in_threadpool(prewarm_reports)
+        except Exception as e:
+            print(f"❌ Report pre-warm failed: {e}")
+            metrics.inc("report_prewarm_runs_total", result="error")
@@ -0,0 +1,55 @@
+"""Helpers for encoding, decoding and quantizing face embeddings"""
+
+import pickle
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+def decode_embedding(embedding_data: str) -> Optional[np.ndarray]:
+    """Decode a pickled embedding as stored in FaceTemplate.embedding_data"""
+    try:
+        embedding = pickle.loads(embedding_data.encode('latin1'))
+    except Exception:
+        return None
+    return np.asarray(embedding, dtype=np.float32).flatten()
+
+
+def encode_embedding(embedding: np.ndarray) -> str:
+    """Encode an embedding for storage in FaceTemplate.embedding_data"""
+    return pickle.dumps(embedding).decode('latin1')
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """L2-normalize each row, leaving all-zero rows untouched"""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms < 1e-6] = 1.0
+    return matrix / norms
+
+
+def quantize_float16(matrix: np.ndarray) -> np.ndarray:
+    """Cast an embedding matrix to float16"""
+    return np.asarray(matrix, dtype=np.float32).astype(np.float16)
+
+
+def quantize_int8(matrix: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Symmetric per-vector int8 quantization.
+
+    Each row is scaled so its largest absolute component maps to 127.
+
+    Returns:
+        (int8 matrix, float32 scale per row) such that row ~= q * scale
+    """
+    matrix = np.atleast_2d(np.asarray(matrix, dtype=np.float32))
+    max_abs = np.max(np.abs(matrix), axis=1) if matrix.size else np.zeros(len(matrix))
+    scales = (max_abs / 127.0).astype(np.float32)
+    safe_scales = np.where(scales > 0, scales, 1.0).astype(np.float32)
+    quantized = np.clip(np.rint(matrix / safe_scales[:, None]), -127, 127).astype(np.int8)
+    return quantized, scales
+
+
+def dequantize_int8(quantized: np.ndarray, scales: np.ndarray) -> np.ndarray:
+    """Inverse of quantize_int8"""
+    return quantized.astype(np.float32) * np.asarray(scales, dtype=np.float32)[:, None]
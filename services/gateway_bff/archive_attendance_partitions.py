@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Archive past school years of attendance_records (PostgreSQL).
+
+Exports every monthly partition that ends before the cutoff to
+<dir>/<partition>.csv.gz, then detaches and drops it. The current school year
+stays attached, so its reports keep partition pruning.
+
+attendance_daily_rollup keeps the counts of archived days; afterwards,
+rebuild it only for retained days (backfill_attendance_rollup.py --since).
+"""
+
+import argparse
+from datetime import date
+
+from app.services.attendance_partitions import (
+    archive_partitions,
+    ensure_partitions,
+    restore_partition,
+    school_year_start,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--before", type=date.fromisoformat, default=None,
+                        help="Archive months ending on or before this date (default: start of the school year)")
+    parser.add_argument("--dir", default=None,
+                        help="Output directory (default: ATTENDANCE_ARCHIVE_DIR)")
+    parser.add_argument("--keep-tables", action="store_true",
+                        help="Detach the partitions but keep them as standalone tables")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Only list the partitions that would be archived")
+    parser.add_argument("--restore", metavar="FILE", default=None,
+                        help="Load an archived .csv.gz file back into attendance_records instead")
+    args = parser.parse_args()
+
+    if args.restore:
+        rows = restore_partition(args.restore)
+        print(f"Restored {rows} attendance records from {args.restore}")
+        return
+
+    created = ensure_partitions()
+    if created:
+        print(f"Created {len(created)} upcoming partitions")
+
+    before = args.before or school_year_start()
+    archived = archive_partitions(before=before, directory=args.dir,
+                                  keep_tables=args.keep_tables, dry_run=args.dry_run)
+    for entry in archived:
+        rows = "" if entry["rows"] is None else f" ({entry['rows']} records)"
+        print(f"{'Would archive' if args.dry_run else 'Archived'} {entry['month']}{rows} -> {entry['file']}")
+    print(f"{len(archived)} partitions ending on or before {before} "
+          f"{'to archive' if args.dry_run else 'archived'}")
+
+
+if __name__ == "__main__":
+    main()
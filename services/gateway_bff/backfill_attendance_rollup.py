@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""Rebuild attendance_daily_rollup from attendance_records"""
+
+import argparse
+import time
+from datetime import date
+
+import app.models  # noqa: F401  (registers every table with Base)
+from app.core.database import Base, SessionLocal, engine
+from app.services.attendance_rollup import rebuild_rollup
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--since", type=date.fromisoformat, default=None,
+                        help="Only rebuild days on or after this local date (YYYY-MM-DD)")
+    parser.add_argument("--chunk-size", type=int, default=5000,
+                        help="Rows fetched and inserted per batch")
+    args = parser.parse_args()
+
+    # Creates the rollup table on databases that predate it
+    Base.metadata.create_all(bind=engine)
+
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        result = rebuild_rollup(db, since=args.since, chunk_size=args.chunk_size)
+        db.commit()
+        elapsed = time.perf_counter() - started
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    scope = f"since {args.since}" if args.since else "all days"
+    print(f"Rolled up {result['records']} records into {result['rows']} rows ({scope}) in {elapsed:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
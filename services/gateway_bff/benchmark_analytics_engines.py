@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""Benchmark the columnar NumPy analytics engine against per-row dict loops"""
+
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Dict
+
+import numpy as np
+
+from app.services.analytics_service import RECENT_WINDOW_DAYS, AnalyticsService
+from app.services.columnar_analytics import IN_RANGE, RECENT, ColumnarDataset, ColumnarReport
+
+STATUSES = np.array(["present"] * 16 + ["absent", "absent", "tardy", "late", "excused", None], dtype=object)
+
+
+def synthetic_chunks(records: int, students: int, days: int, chunk_size: int,
+                     start: datetime, end: datetime, seed: int):
+    """
+    Yield chunks of random attendance shaped like each engine's query results.
+
+    Each chunk holds student_ids, days, statuses, flags (IN_RANGE/RECENT bits,
+    computed by the database for the columnar engine), scan_times as datetime
+    objects (per-row engine) and, for the stand-in of the columnar engine's
+    MAX(scan_time) query, roster indexes with int64 epoch microseconds.
+    """
+    rng = np.random.default_rng(seed)
+    student_ids = np.array([f"s{i:06d}" for i in range(students)], dtype=object)
+    for offset in range(0, records, chunk_size):
+        n = min(chunk_size, records - offset)
+        student = rng.integers(0, students, n)
+        seconds = rng.integers(0, days * 86400, n)
+        scans = (np.datetime64(start, "s") + seconds.astype("timedelta64[s]")).astype("datetime64[us]")
+        flags = (
+            (scans >= np.datetime64(start, "us")) * IN_RANGE
+            + (scans >= np.datetime64(end - timedelta(days=RECENT_WINDOW_DAYS), "us")) * RECENT
+        )
+        yield (
+            student_ids[student].tolist(),
+            scans.astype("datetime64[D]").tolist(),
+            STATUSES[rng.integers(0, len(STATUSES), n)].tolist(),
+            flags.tolist(),
+            scans.tolist(),
+            (student, scans.astype(np.int64)),
+        )
+
+
+def per_row_sections(service: AnalyticsService, chunks, roster, start: datetime, end: datetime) -> Dict:
+    """Stats, summaries, trends and performance with the row engine's dict accumulation"""
+    recent_start = end - timedelta(days=RECENT_WINDOW_DAYS)
+    status_counts: Dict[str, int] = {}
+    students: Dict[str, Dict] = {}
+    day_counts: Dict = {}
+
+    for student_ids, days, statuses, _, scan_times, _ in chunks:
+        for student_id, day, raw_status, scan_time in zip(student_ids, days, statuses, scan_times):
+            status = (raw_status or "unknown").lower()
+            data = students.get(student_id)
+            if data is None:
+                first, last, _ = roster[student_id]
+                data = students[student_id] = {
+                    "student_id": student_id, "student_name": f"{first} {last}",
+                    "present_days": 0, "absent_days": 0, "tardy_days": 0, "excused_days": 0,
+                    "last_attendance_date": None, "recent_total": 0, "recent_present": 0,
+                    "recent_absences": 0, "in_range": 0,
+                }
+            if scan_time >= recent_start:
+                data["recent_total"] += 1
+                if status == "present":
+                    data["recent_present"] += 1
+                if raw_status == "absent":
+                    data["recent_absences"] += 1
+            if scan_time < start:
+                continue
+
+            status_counts[status] = status_counts.get(status, 0) + 1
+            counts = day_counts.setdefault(day, {})
+            counts[status] = counts.get(status, 0) + 1
+            data["in_range"] += 1
+            if status == "present":
+                data["present_days"] += 1
+            elif status == "absent":
+                data["absent_days"] += 1
+            elif status in ["tardy", "late"]:
+                data["tardy_days"] += 1
+            elif status == "excused":
+                data["excused_days"] += 1
+            if data["last_attendance_date"] is None or scan_time > data["last_attendance_date"]:
+                data["last_attendance_date"] = scan_time
+
+    rows = [row for row in students.values() if row["in_range"]]
+    return {
+        "stats": service._build_stats(status_counts, len(rows), start, end),
+        "summaries": service._build_student_summaries(rows, start, end),
+        "trends": service._build_trends(day_counts, start, end),
+        "performance": service._build_performance_report(rows, start, end),
+    }
+
+
+def columnar_sections(service: AnalyticsService, chunks, roster, classes, start: datetime, end: datetime) -> Dict:
+    recent_start = end - timedelta(days=RECENT_WINDOW_DAYS)
+    dataset = ColumnarDataset(base_day=(min(start, recent_start) - timedelta(days=1)).date())
+    # Stands in for the database's MAX(scan_time) GROUP BY student_id
+    last_scan = np.full(len(roster), np.iinfo(np.int64).min, dtype=np.int64)
+    for student_ids, days, statuses, flags, _, (student, scans_us) in chunks:
+        dataset.add_chunk(student_ids, days, statuses, flags)
+        in_range = (np.asarray(flags, dtype=np.int8) & IN_RANGE) != 0
+        np.maximum.at(last_scan, student[in_range], scans_us[in_range])
+    dataset.finalize()
+    dataset.last_scans = {
+        student_id: np.datetime64(int(last_scan[i]), "us").astype(datetime)
+        for i, student_id in enumerate(roster)
+        if last_scan[i] != np.iinfo(np.int64).min
+    }
+
+    report = ColumnarReport(service, start, end, dataset=dataset, roster=roster, classes=classes)
+    return {
+        "stats": report.get_attendance_stats(),
+        "summaries": report.get_student_summaries(),
+        "trends": report.get_daily_trends(),
+        "performance": report.get_performance_report(),
+        "comparisons": report.get_class_comparisons(),
+        "patterns": report.detect_patterns(),
+    }
+
+
+def run(records: int, args) -> None:
+    start = datetime(2025, 9, 1)
+    end = start + timedelta(days=args.days)
+    rnd = random.Random(args.seed)
+    roster = {
+        f"s{i:06d}": (f"First{i}", f"Last{rnd.randint(0, 9999):04d}", f"class{i % args.classes:03d}")
+        for i in range(args.students)
+    }
+    classes = [(f"class{i:03d}", f"Class {i}") for i in range(args.classes)]
+    service = AnalyticsService(db=None, engine="numpy")
+
+    results = {}
+    timings = {}
+    for name, compute in (
+        ("per-row", lambda chunks: per_row_sections(service, chunks, roster, start, end)),
+        ("columnar", lambda chunks: columnar_sections(service, chunks, roster, classes, start, end)),
+    ):
+        # Chunks are generated lazily; generation time is measured and excluded
+        generation = 0.0
+
+        def generate():
+            nonlocal generation
+            source = synthetic_chunks(records, args.students, args.days, args.chunk_size,
+                                      start, end, args.seed)
+            while True:
+                began = time.perf_counter()
+                chunk = next(source, None)
+                generation += time.perf_counter() - began
+                if chunk is None:
+                    return
+                yield chunk
+
+        began = time.perf_counter()
+        results[name] = compute(generate())
+        timings[name] = time.perf_counter() - began - generation
+
+    for section in ("stats", "summaries", "trends", "performance"):
+        assert results["per-row"][section] == results["columnar"][section], f"{section} differs"
+
+    speedup = timings["per-row"] / timings["columnar"] if timings["columnar"] else float("inf")
+    print(f"{records:>11,} records: per-row {timings['per-row']:7.2f}s   "
+          f"columnar {timings['columnar']:7.2f}s   speedup {speedup:5.1f}x   (outputs identical)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--records", type=int, nargs="+", default=[1_000_000, 10_000_000])
+    parser.add_argument("--students", type=int, default=5000)
+    parser.add_argument("--classes", type=int, default=200)
+    parser.add_argument("--days", type=int, default=180)
+    parser.add_argument("--chunk-size", type=int, default=200_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{args.students} students, {args.classes} classes, {args.days} days; "
+          f"times exclude synthetic data generation")
+    for records in args.records:
+        run(records, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Benchmark request throughput under mixed load: sync vs async sessions.
+
+Serves the same mix of statements - roster pages, student record pages,
+class summary aggregates and attendance writes - from async handlers in two
+ways and drives them with concurrent in-process requests on one event loop,
+like a single uvicorn worker:
+
+  sync:  a SessionLocal session from create_engine (the former get_db);
+         every query blocks the event loop, so requests run one at a time
+  async: an AsyncSession from create_async_engine (get_async_db); requests
+         interleave while their queries wait on the database
+
+On PostgreSQL the data lives in a scratch schema that is dropped afterwards.
+Without --database-url it runs on a temporary SQLite file; a local file has
+no network round trip to overlap, so pass --latency-ms to model one (a
+blocking sleep per query with the sync driver, an awaited one with the
+async driver).
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import create_engine, func, insert, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core.database import Base, async_database_url
+import app.models  # noqa: F401
+from app.models.attendance import AttendanceRecord, Student
+from app.models.classes import Class as ClassModel
+
+SCHEMA = "benchmark_db_concurrency"
+BASE_TIME = datetime(2026, 1, 5, 8, 0)
+MODES = ("sync", "async")
+# Request mix: operation -> weight
+MIX = {
+    "students_page": 4,
+    "records_page": 3,
+    "class_summary": 2,
+    "record_write": 1,
+}
+
+
+def statement(operation: str, rnd: random.Random, classes: int, students: int, days: int):
+    """(statement, is_write) for one request of `operation` on random ids"""
+    class_id = f"c{rnd.randrange(classes):04d}"
+    student_id = f"{class_id}s{rnd.randrange(students):03d}"
+    if operation == "students_page":
+        return select(Student).where(Student.class_id == class_id).order_by(
+            Student.last_name, Student.id
+        ).limit(100), False
+    if operation == "records_page":
+        return select(AttendanceRecord).where(
+            AttendanceRecord.student_id == student_id,
+            AttendanceRecord.scan_time >= BASE_TIME + timedelta(days=days - 30),
+        ).order_by(AttendanceRecord.scan_time.desc(), AttendanceRecord.id.desc()).limit(100), False
+    if operation == "class_summary":
+        day = BASE_TIME.replace(hour=0) + timedelta(days=rnd.randrange(days))
+        return select(
+            Student.id, func.count(AttendanceRecord.id), func.max(AttendanceRecord.scan_time)
+        ).outerjoin(
+            AttendanceRecord,
+            (AttendanceRecord.student_id == Student.id)
+            & (AttendanceRecord.scan_time >= day)
+            & (AttendanceRecord.scan_time < day + timedelta(days=1)),
+        ).where(Student.class_id == class_id).group_by(Student.id), False
+    return insert(AttendanceRecord).values(
+        student_id=student_id, teacher_id="benchmark", confidence=1.0, status="present",
+        scan_time=BASE_TIME + timedelta(days=days, minutes=rnd.randrange(480)),
+    ), True
+
+
+def build_app(sync_sessions: sessionmaker, async_sessions: async_sessionmaker, args) -> FastAPI:
+    app = FastAPI()
+    rnd = random.Random(args.seed)
+    latency = args.latency_ms / 1000
+
+    def get_sync_db():
+        db = sync_sessions()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    async def get_async_db():
+        async with async_sessions() as db:
+            yield db
+
+    @app.get("/sync/{operation}")
+    async def sync_operation(operation: str, db: Session = Depends(get_sync_db)):
+        query, is_write = statement(operation, rnd, args.classes, args.students, args.days)
+        if latency:
+            time.sleep(latency)
+        result = db.execute(query)
+        if is_write:
+            db.commit()
+            return {"rows": 1}
+        return {"rows": len(result.all())}
+
+    @app.get("/async/{operation}")
+    async def async_operation(operation: str, db: AsyncSession = Depends(get_async_db)):
+        query, is_write = statement(operation, rnd, args.classes, args.students, args.days)
+        if latency:
+            await asyncio.sleep(latency)
+        result = await db.execute(query)
+        if is_write:
+            await db.commit()
+            return {"rows": 1}
+        return {"rows": len(result.all())}
+
+    return app
+
+
+def seed(engine, args):
+    Base.metadata.create_all(bind=engine)
+    rnd = random.Random(args.seed)
+    with engine.begin() as connection:
+        connection.execute(insert(ClassModel), [
+            {"id": f"c{c:04d}", "name": f"Class {c}", "grade_level": "3", "teacher_id": f"t{c % 50:03d}"}
+            for c in range(args.classes)
+        ])
+        roster = [
+            {"id": f"c{c:04d}s{s:03d}", "first_name": f"First{s}", "last_name": f"Last{s}", "class_id": f"c{c:04d}"}
+            for c in range(args.classes) for s in range(args.students)
+        ]
+        connection.execute(insert(Student), roster)
+        for day in range(args.days):
+            connection.execute(insert(AttendanceRecord), [
+                {
+                    "student_id": student["id"], "teacher_id": "t", "confidence": 0.9,
+                    "status": rnd.choice(("present", "present", "present", "absent", "tardy")),
+                    "scan_time": BASE_TIME + timedelta(days=day, minutes=rnd.randrange(480)),
+                }
+                for student in roster
+            ])
+        if connection.dialect.name == "postgresql":
+            connection.execute(text("ANALYZE"))
+
+
+async def run_load(app: FastAPI, mode: str, operations: List[str], concurrency: int) -> Dict:
+    pending = list(operations)
+    latencies = []
+
+    async def worker(client: httpx.AsyncClient):
+        while pending:
+            operation = pending.pop()
+            started = time.perf_counter()
+            response = await client.get(f"/{mode}/{operation}")
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - started)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "mode": mode,
+        "requests": len(latencies),
+        "seconds": round(elapsed, 3),
+        "requests_per_second": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 2),
+        "max_ms": round(latencies[-1] * 1000, 2),
+    }
+
+
+async def benchmark(args) -> List[Dict]:
+    url = args.database_url
+    scratch = None
+    if url is None:
+        scratch = tempfile.mkdtemp(prefix="benchmark_db_concurrency_")
+        url = f"sqlite:///{os.path.join(scratch, 'benchmark.db')}"
+
+    postgresql = url.startswith("postgresql")
+    sync_args, async_args = {}, {}
+    if postgresql:
+        sync_args = {"options": f"-csearch_path={SCHEMA}"}
+        async_args = {"server_settings": {"search_path": SCHEMA}}
+        with create_engine(url).begin() as connection:
+            connection.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+
+    # One connection per request in flight for both modes. With the default
+    # pool the sync mode stalls: blocked handlers wait for a connection while
+    # the sessions holding them can only be closed by the blocked event loop.
+    pool = {"pool_size": args.concurrency, "max_overflow": 0}
+    engine = create_engine(url, connect_args=sync_args, **pool)
+    # aiosqlite does not pool: every session opens its own connection
+    async_pool = pool if postgresql else {}
+    async_engine = create_async_engine(async_database_url(url), connect_args=async_args, **async_pool)
+    try:
+        started = time.perf_counter()
+        seed(engine, args)
+        print(f"Seeded {args.classes * args.students} students, "
+              f"{args.classes * args.students * args.days} attendance records "
+              f"on {engine.dialect.name} in {time.perf_counter() - started:.1f}s")
+
+        app = build_app(
+            sessionmaker(bind=engine, autoflush=False),
+            async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False),
+            args,
+        )
+        rnd = random.Random(args.seed)
+        operations = rnd.choices(list(MIX), weights=list(MIX.values()), k=args.requests)
+        results = []
+        for mode in MODES:
+            # Warm up the pool and the statement caches
+            await run_load(app, mode, operations[:args.concurrency], args.concurrency)
+            results.append(await run_load(app, mode, operations, args.concurrency))
+        return results
+    finally:
+        await async_engine.dispose()
+        engine.dispose()
+        if postgresql:
+            with create_engine(url).begin() as connection:
+                connection.execute(text(f"DROP SCHEMA {SCHEMA} CASCADE"))
+        if scratch:
+            os.remove(os.path.join(scratch, "benchmark.db"))
+            os.rmdir(scratch)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=None,
+                        help="PostgreSQL URL to benchmark against (default: a temporary SQLite file)")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32, help="Requests in flight")
+    parser.add_argument("--latency-ms", type=float, default=0.0,
+                        help="Simulated network round trip per query")
+    parser.add_argument("--classes", type=int, default=40)
+    parser.add_argument("--students", type=int, default=25, help="Students per class")
+    parser.add_argument("--days", type=int, default=30, help="Days of attendance per student")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="Also print the results as JSON")
+    args = parser.parse_args()
+
+    results = asyncio.run(benchmark(args))
+
+    mix = ", ".join(f"{operation} {weight}" for operation, weight in MIX.items())
+    print(f"{args.requests} requests, {args.concurrency} in flight, "
+          f"{args.latency_ms:g} ms simulated latency, mix: {mix}")
+    print(f"{'mode':<6} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}")
+    for result in results:
+        print(f"{result['mode']:<6} {result['requests_per_second']:>9.1f} {result['p50_ms']:>9.2f} "
+              f"{result['p95_ms']:>9.2f} {result['max_ms']:>9.2f}")
+    before, after = results
+    print(f"async / sync throughput: {after['requests_per_second'] / before['requests_per_second']:.2f}x")
+    if args.json:
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
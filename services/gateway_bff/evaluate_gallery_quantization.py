@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""Compare float16/int8 gallery index modes against float32 on stored templates"""
+
+import argparse
+
+import numpy as np
+
+from app.core.database import SessionLocal
+from app.models.attendance import FaceTemplate
+from app.services.gallery_index import GalleryIndex, evaluate_modes
+from app.utils.embeddings import decode_embedding
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--noise", type=float, default=0.0,
+                        help="Std-dev of Gaussian noise added to each query (simulates a new capture)")
+    parser.add_argument("--chunk-size", type=int, default=1024,
+                        help="Queries scored per block")
+    parser.add_argument("--dim", type=int, default=128,
+                        help="Embedding dimension; templates of any other length are skipped")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        student_ids = []
+        embeddings = []
+        for template in db.query(FaceTemplate).order_by(FaceTemplate.id).yield_per(1000):
+            embedding = decode_embedding(template.embedding_data)
+            if embedding is None or embedding.shape[0] != args.dim:
+                continue
+            student_ids.append(template.student_id)
+            embeddings.append(embedding)
+    finally:
+        db.close()
+
+    if len(embeddings) < 2:
+        print("Need at least two stored templates to evaluate.")
+        return
+
+    print(f"Evaluating {len(embeddings)} templates (noise={args.noise})...")
+    results = evaluate_modes(
+        student_ids,
+        np.vstack(embeddings),
+        modes=[mode for mode in GalleryIndex.MODES if mode != "float32"],
+        noise=args.noise,
+        chunk_size=args.chunk_size,
+    )
+
+    print(f"{'mode':<8} {'top1 tmpl':>10} {'top1 stud':>10} {'mean |err|':>11} {'max |err|':>10} {'memory':>10}")
+    for mode, r in results.items():
+        print(
+            f"{mode:<8} {r['top1_template_agreement']:>10.4f} {r['top1_student_agreement']:>10.4f} "
+            f"{r['mean_abs_similarity_error']:>11.6f} {r['max_abs_similarity_error']:>10.6f} "
+            f"{r['memory_bytes'] / 1024:>8.1f}KB"
+        )
+
+
+if __name__ == "__main__":
+    main()
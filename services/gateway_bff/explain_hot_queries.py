@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Check that the hot queries use their indexes.
+
+Builds a synthetic dataset in a scratch schema on PostgreSQL, runs
+EXPLAIN (ANALYZE, BUFFERS) for every hot query and fails (exit 1) when a
+plan reads one of the query's tables with a sequential scan. Everything runs
+in one transaction that is rolled back, so the target database is left as
+it was.
+
+The tables and indexes come from the models, which declare the same indexes
+as the alembic revisions. Keep the dataset large enough that an index is
+the right plan: on a handful of rows PostgreSQL rightly prefers a
+sequential scan.
+"""
+
+import argparse
+import json
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Tuple
+
+from sqlalchemy import create_engine, func, select, text
+
+from app.core.config import settings
+from app.core.database import Base
+import app.models  # noqa: F401
+from app.models.attendance import AttendanceRecord, FaceTemplate, Student
+from app.models.classes import Class as ClassModel
+from app.models.consent_audit import ConsentRecord
+
+SCHEMA = "explain_hot_queries"
+BASE_TIME = datetime(2026, 1, 5, 8, 0)
+CONSENT_TYPES = ("face_template", "evidence_capture", "location_tracking")
+SEEDED_TABLES = ("classes", "students", "attendance_records", "face_templates", "consent_records")
+
+SEED = (
+    """
+    INSERT INTO classes (id, name, grade_level, teacher_id, is_active, created_at, updated_at)
+    SELECT 'c' || lpad(c::text, 5, '0'), 'Class ' || c, '3',
+           't' || lpad((c % :teachers)::text, 5, '0'), c % 10 <> 0, now(), now()
+    FROM generate_series(1, :classes) AS c
+    """,
+    """
+    INSERT INTO students (id, first_name, last_name, class_id, is_active, enrollment_date)
+    SELECT 'c' || lpad(c::text, 5, '0') || 's' || lpad(s::text, 3, '0'),
+           'First' || s, 'Last' || s, 'c' || lpad(c::text, 5, '0'), true, now()
+    FROM generate_series(1, :classes) AS c, generate_series(1, :students) AS s
+    """,
+    # One scan per student and day, at a random minute of the school day
+    """
+    INSERT INTO attendance_records (student_id, teacher_id, scan_time, confidence, status)
+    SELECT st.id, 't', :base + make_interval(days => d, mins => (random() * 480)::int),
+           0.9, (ARRAY['present', 'present', 'present', 'present', 'tardy', 'absent'])[1 + (random() * 5)::int]
+    FROM students AS st, generate_series(0, :days - 1) AS d
+    """,
+    """
+    INSERT INTO face_templates (student_id, embedding_data, created_at, updated_at)
+    SELECT st.id, 'x', now(), now()
+    FROM students AS st, generate_series(1, 3)
+    """,
+    """
+    INSERT INTO consent_records (student_id, parent_email, consent_type, granted, granted_at)
+    SELECT st.id, 'parent@example.com', t, true, :base + make_interval(days => v)
+    FROM students AS st, unnest(CAST(:consent_types AS text[])) AS t, generate_series(0, 1) AS v
+    """,
+)
+
+
+def hot_queries(classes: int, days: int) -> List[Tuple[str, object, Tuple[str, ...]]]:
+    """(name, statement, tables that must not be sequentially scanned)"""
+    class_id = f"c{classes // 2:05d}"
+    student_id = f"{class_id}s001"
+    day_start = BASE_TIME.replace(hour=0) + timedelta(days=days // 2)
+    day_end = day_start + timedelta(days=1)
+    last_day = BASE_TIME.replace(hour=0) + timedelta(days=days)
+
+    return [
+        (
+            "records_in_day_range",
+            select(AttendanceRecord.student_id, func.count(AttendanceRecord.id))
+            .where(AttendanceRecord.scan_time >= day_start, AttendanceRecord.scan_time < day_end)
+            .group_by(AttendanceRecord.student_id),
+            ("attendance_records",),
+        ),
+        (
+            "student_records_last_30_days",
+            select(AttendanceRecord)
+            .where(
+                AttendanceRecord.student_id == student_id,
+                AttendanceRecord.scan_time >= last_day - timedelta(days=30),
+            )
+            .order_by(AttendanceRecord.scan_time.desc()),
+            ("attendance_records",),
+        ),
+        (
+            "student_records_page",
+            select(AttendanceRecord)
+            .where(
+                AttendanceRecord.student_id == student_id,
+                AttendanceRecord.scan_time >= BASE_TIME.replace(hour=0),
+                AttendanceRecord.scan_time <= day_start,
+                (AttendanceRecord.scan_time < day_start) | (AttendanceRecord.id < 1000),
+            )
+            .order_by(AttendanceRecord.scan_time.desc(), AttendanceRecord.id.desc())
+            .limit(101),
+            ("attendance_records",),
+        ),
+        (
+            "students_page",
+            select(Student)
+            .where(Student.last_name >= "Last1", (Student.last_name > "Last1") | (Student.id > class_id))
+            .order_by(Student.last_name, Student.id)
+            .limit(101),
+            ("students",),
+        ),
+        (
+            "class_roster",
+            select(Student).where(Student.class_id == class_id),
+            ("students",),
+        ),
+        (
+            "class_summary_for_day",
+            select(Student.id, func.count(AttendanceRecord.id), func.max(AttendanceRecord.scan_time))
+            .outerjoin(
+                AttendanceRecord,
+                (AttendanceRecord.student_id == Student.id)
+                & (AttendanceRecord.scan_time >= day_start)
+                & (AttendanceRecord.scan_time < day_end),
+            )
+            .where(Student.class_id == class_id)
+            .group_by(Student.id),
+            ("students", "attendance_records"),
+        ),
+        (
+            "student_face_templates",
+            select(FaceTemplate).where(FaceTemplate.student_id == student_id),
+            ("face_templates",),
+        ),
+        (
+            "latest_consent",
+            select(ConsentRecord)
+            .where(ConsentRecord.student_id == student_id, ConsentRecord.consent_type == CONSENT_TYPES[0])
+            .order_by(ConsentRecord.granted_at.desc())
+            .limit(1),
+            ("consent_records",),
+        ),
+        (
+            "teacher_active_classes",
+            select(ClassModel).where(ClassModel.teacher_id == "t00001", ClassModel.is_active == True),
+            ("classes",),
+        ),
+    ]
+
+
+def plan_nodes(plan: Dict) -> Iterable[Dict]:
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from plan_nodes(child)
+
+
+def explain(connection, statement) -> Dict:
+    compiled = statement.compile(dialect=connection.dialect)
+    result = connection.exec_driver_sql(
+        "EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + compiled.string, compiled.params
+    ).scalar()
+    if isinstance(result, str):
+        result = json.loads(result)
+    return result[0]
+
+
+def check(connection, classes: int, days: int) -> List[Dict]:
+    results = []
+    for name, statement, tables in hot_queries(classes, days):
+        explained = explain(connection, statement)
+        plan = explained["Plan"]
+        nodes = list(plan_nodes(plan))
+        seq_scans = sorted({
+            node["Relation Name"] for node in nodes
+            if node["Node Type"] == "Seq Scan" and node.get("Relation Name") in tables
+        })
+        results.append({
+            "query": name,
+            "ok": not seq_scans,
+            "seq_scans": seq_scans,
+            "scans": [
+                f"{node['Node Type']} {node.get('Index Name') or node.get('Relation Name')}"
+                for node in nodes if "Scan" in node["Node Type"]
+            ],
+            "execution_ms": round(explained["Execution Time"], 3),
+            "shared_hit_blocks": plan.get("Shared Hit Blocks", 0),
+            "shared_read_blocks": plan.get("Shared Read Blocks", 0),
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=settings.DATABASE_URL, help="PostgreSQL URL (default: DATABASE_URL)")
+    parser.add_argument("--classes", type=int, default=1000)
+    parser.add_argument("--students", type=int, default=25, help="Students per class")
+    parser.add_argument("--days", type=int, default=60, help="Days of attendance per student")
+    parser.add_argument("--json", action="store_true", help="Also print the results as JSON")
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    if engine.dialect.name != "postgresql":
+        raise SystemExit("EXPLAIN (ANALYZE, BUFFERS) needs PostgreSQL")
+
+    with engine.connect() as connection:
+        transaction = connection.begin()
+        try:
+            connection.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+            connection.execute(text(f"SET LOCAL search_path TO {SCHEMA}"))
+            Base.metadata.create_all(bind=connection)
+
+            started = time.perf_counter()
+            params = {
+                "classes": args.classes,
+                "students": args.students,
+                "teachers": max(1, args.classes // 4),
+                "days": args.days,
+                "base": BASE_TIME,
+                "consent_types": list(CONSENT_TYPES),
+            }
+            for statement in SEED:
+                connection.execute(text(statement), params)
+            connection.execute(text(f"ANALYZE {', '.join(SEEDED_TABLES)}"))
+            records = args.classes * args.students * args.days
+            print(f"Seeded {args.classes * args.students} students, {records} attendance records "
+                  f"in {time.perf_counter() - started:.1f}s")
+
+            results = check(connection, args.classes, args.days)
+        finally:
+            transaction.rollback()
+
+    for result in results:
+        status = "✅" if result["ok"] else "❌"
+        print(f"{status} {result['query']}: {result['execution_ms']:.2f} ms, "
+              f"buffers hit={result['shared_hit_blocks']} read={result['shared_read_blocks']}")
+        print(f"   {', '.join(result['scans'])}")
+        if not result["ok"]:
+            print(f"   sequential scan on {', '.join(result['seq_scans'])}")
+    if args.json:
+        print(json.dumps(results, indent=2))
+
+    failed = [result["query"] for result in results if not result["ok"]]
+    if failed:
+        print(f"❌ {len(failed)} hot queries regressed to a sequential scan: {', '.join(failed)}")
+        raise SystemExit(1)
+    print(f"✅ All {len(results)} hot queries use an index")
+
+
+if __name__ == "__main__":
+    main()
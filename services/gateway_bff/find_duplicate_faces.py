@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""Report face templates of different students that are suspiciously similar"""
+
+import argparse
+import json
+import time
+
+from app.core.database import SessionLocal
+from app.services.duplicate_detection import DuplicateFaceDetector
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--threshold", type=float, default=None,
+                        help="Similarity threshold (default: FACE_RECOGNITION_THRESHOLD)")
+    parser.add_argument("--since-id", type=int, default=None,
+                        help="Only check templates with a larger ID (use the previous run's watermark)")
+    parser.add_argument("--block-size", type=int, default=2048,
+                        help="Rows per similarity tile; bounds peak memory")
+    parser.add_argument("--dim", type=int, default=128,
+                        help="Embedding dimension; templates of any other length are skipped")
+    parser.add_argument("--json", action="store_true", help="Print the full report as JSON")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        detector = DuplicateFaceDetector(
+            db, threshold=args.threshold, block_size=args.block_size, embedding_dim=args.dim
+        )
+        started = time.perf_counter()
+        result = detector.run(since_template_id=args.since_id)
+        elapsed = time.perf_counter() - started
+    finally:
+        db.close()
+
+    if args.json:
+        print(json.dumps(result, indent=2, default=str))
+        return
+
+    print(f"Scanned {result['templates_scanned']} templates "
+          f"({result['new_templates']} new) in {elapsed:.1f}s")
+    print(f"Pairs above {result.get('threshold')}: {len(result['pairs'])}")
+    for pair in result["pairs"]:
+        a, b = pair["template_a"], pair["template_b"]
+        flag = " [same name]" if pair["same_name"] else ""
+        print(f"  {pair['similarity']:.4f}  {a['student_name']} ({a['student_id']}, class {a['class_id']})"
+              f"  <->  {b['student_name']} ({b['student_id']}, class {b['class_id']}){flag}")
+    print(f"Next incremental run: --since-id {result['max_template_id']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,19 +2,31 @@ from fastapi import FastAPI, Depends, HTTPException, WebSocket, WebSocketDisconn
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer
 import uvicorn
+import asyncio
 import os
 from dotenv import load_dotenv
 from contextlib import asynccontextmanager
+from typing import Optional
 
 from app.core.config import settings
-from app.core.database import init_db
+from app.core.database import close_db, init_db
 from app.api.v1 import auth, attendance, rotations, evidence, insights, messaging, consent_audit, enrollment, classes, reports
-from app.core.websocket import ConnectionManager
+from app.api.v1.auth import teacher_id_from_token
+from app.core.websocket import manager
+from app.core.metrics import metrics
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.services.cv_scheduler import cv_scheduler
+from app.services.report_prewarm import run_prewarm_schedule
 # Import all models to register them with SQLAlchemy Base
 from app.models import (
-    Student, AttendanceRecord, FaceTemplate, Rotation, RotationStudent,
-    EvidenceMedia, Teacher, ConsentAudit, Class
+    Student, AttendanceRecord, AttendanceDailyRollup, StudentAttendanceRisk, FaceTemplate, FaceTemplateTombstone,
+    Rotation, RotationStudent, EvidenceMedia, Teacher, ConsentAudit, Class
 )
+# Rolls the at-risk index to the current window (its write hooks, like the
+# rollup and report cache ones, are registered by app.models)
+from app.services.attendance_risk import run_window_roll_schedule
+# Creates the monthly attendance_records partitions ahead of time (PostgreSQL)
+from app.services.attendance_partitions import run_partition_schedule
 
 load_dotenv()
 
@@ -22,9 +34,17 @@ load_dotenv()
 async def lifespan(app: FastAPI):
     # Startup
     await init_db()
+    prewarm_task = asyncio.create_task(run_prewarm_schedule()) if settings.REPORT_PREWARM_ENABLED else None
+    risk_roll_task = asyncio.create_task(run_window_roll_schedule())
+    partition_task = asyncio.create_task(run_partition_schedule())
     yield
     # Shutdown
-    pass
+    if prewarm_task:
+        prewarm_task.cancel()
+    risk_roll_task.cancel()
+    partition_task.cancel()
+    cv_scheduler.shutdown()
+    await close_db()
 
 app = FastAPI(
     title="My AI CoTeacher API",
@@ -40,11 +60,9 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
-# WebSocket connection manager
-manager = ConnectionManager()
-
 # Include routers
 app.include_router(auth.router, prefix="/api/v1/auth", tags=["auth"])
 app.include_router(attendance.router, prefix="/api/v1/attendance", tags=["attendance"])
@@ -65,15 +83,22 @@ async def root():
 async def health_check():
     return {"status": "healthy", "version": "1.0.0"}
 
+@app.get("/metrics")
+async def get_metrics():
+    return metrics.snapshot()
+
 @app.websocket("/ws")
-async def websocket_endpoint(websocket: WebSocket):
-    await manager.connect(websocket)
+async def websocket_endpoint(websocket: WebSocket, token: Optional[str] = None):
+    # With a valid access token the connection also receives the teacher's
+    # notifications (e.g. at-risk alerts)
+    user_id = teacher_id_from_token(token) if token else None
+    await manager.connect(websocket, user_id)
     try:
         while True:
             data = await websocket.receive_text()
             await manager.broadcast(data)
     except WebSocketDisconnect:
-        manager.disconnect(websocket)
+        manager.disconnect(websocket, user_id)
 
 if __name__ == "__main__":
     uvicorn.run(
@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+"""Pre-compute the standard report bundle of every active class into the report cache"""
+
+import argparse
+import json
+
+from app.services.report_prewarm import PREWARM_WINDOWS_DAYS, prewarm_reports
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--days", type=int, nargs="+", default=list(PREWARM_WINDOWS_DAYS),
+                        help="Window lengths in school days")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Concurrent jobs (default: REPORT_PREWARM_WORKERS)")
+    parser.add_argument("--class-id", action="append", dest="class_ids", default=None,
+                        help="Only warm this class (repeatable)")
+    parser.add_argument("--json", action="store_true",
+                        help="Also print the coverage and timing report as JSON")
+    args = parser.parse_args()
+
+    summary = prewarm_reports(windows=args.days, workers=args.workers, class_ids=args.class_ids)
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    if summary.get("failed_jobs"):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
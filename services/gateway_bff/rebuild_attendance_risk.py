@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""Recompute the at-risk index (student_attendance_risk) for the current window"""
+
+import argparse
+import time
+
+import app.models  # noqa: F401  (registers every table with Base)
+from app.core.config import settings
+from app.core.database import Base, SessionLocal, engine
+from app.services.attendance_risk import roll_window
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--student-id", action="append", dest="student_ids", default=None,
+                        help="Only recompute this student (repeatable)")
+    args = parser.parse_args()
+
+    # Creates the index table on databases that predate it
+    Base.metadata.create_all(bind=engine)
+
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        result = roll_window(db, student_ids=args.student_ids)
+        db.commit()
+        elapsed = time.perf_counter() - started
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    print(f"Indexed {result['students']} students over the last {settings.AT_RISK_WINDOW_DAYS} school days: "
+          f"{result['at_risk']} at risk, {result['crossings']} changed, in {elapsed:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Shared test fixtures.
+
+The tests run on a temporary SQLite database: DATABASE_URL is set before
+any app module is imported, so app.core.database builds its engines on it.
+Run from services/gateway_bff with `python -m pytest`.
+"""
+
+import os
+import random
+import shutil
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import List
+
+import pytest
+from sqlalchemy import event
+
+SCRATCH = tempfile.mkdtemp(prefix="gateway_bff_tests_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(SCRATCH, 'test.db')}"
+os.environ["SCHOOL_TIMEZONE"] = "UTC"
+os.environ["REPORT_CACHE_ENABLED"] = "false"
+
+from app.core.database import Base, SessionLocal, engine  # noqa: E402
+from app.models import AttendanceRecord, Class, Student  # noqa: E402
+
+CLASSES = 3
+STUDENTS_PER_CLASS = 8
+DAYS = 40
+FIRST_DAY = datetime(2026, 1, 1)
+# Stored statuses as they come from scanners, imports and manual entry
+STATUSES = [
+    "present", "present", "present", "present", "present", "Present", "PRESENT",
+    "absent", "absent", "Absent", "ABSENT",
+    "tardy", "late", "Late", "excused", "Excused",
+    None, "", "unknown", "sick",
+]
+
+
+def seed(session, rnd: random.Random):
+    for c in range(CLASSES):
+        session.add(Class(id=f"c{c}", name=f"Class {c}", grade_level="3", teacher_id=f"t{c}"))
+        for s in range(STUDENTS_PER_CLASS):
+            session.add(Student(id=f"c{c}s{s}", first_name=f"First{s}", last_name=f"Last{c}{s:02d}", class_id=f"c{c}"))
+    # On the roster without any attendance
+    session.add(Student(id="c0new", first_name="New", last_name="Student", class_id="c0"))
+    session.flush()
+
+    for c in range(CLASSES):
+        for s in range(STUDENTS_PER_CLASS):
+            for day in range(DAYS):
+                if rnd.random() < 0.15:
+                    continue
+                # Every fourth student is mostly absent (at-risk, patterns)
+                status = rnd.choice(["absent", "Absent", "present"]) if s % 4 == 0 else rnd.choice(STATUSES)
+                session.add(AttendanceRecord(
+                    student_id=f"c{c}s{s}", teacher_id=f"t{c}", confidence=0.9, status=status,
+                    scan_time=FIRST_DAY + timedelta(days=day, minutes=rnd.randint(0, 600)),
+                ))
+    session.commit()
+
+
+@contextmanager
+def count_queries():
+    """Collects the SQL statements executed inside the block"""
+    statements: List[str] = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+@pytest.fixture(scope="session")
+def db():
+    """Session on the seeded database (read-only for the tests)"""
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    seed(session, random.Random(0))
+    yield session
+    session.close()
+    engine.dispose()
+    shutil.rmtree(SCRATCH, ignore_errors=True)
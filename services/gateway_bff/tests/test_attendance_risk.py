@@ -0,0 +1,20 @@
+"""The at-risk index never fails the attendance write it is derived from"""
+
+from sqlalchemy import select
+
+from app.core.database import engine
+from app.services.attendance_risk import _apply, current_window, risk_table
+
+
+def test_first_write_over_a_concurrent_insert(db):
+    window_start = current_window()[0]
+    with engine.connect() as connection:
+        transaction = connection.begin()
+        try:
+            _apply(connection, {"c2s1": ("c2", 4, 4)}, {}, window_start)
+            # A second "first write" that did not see the row yet
+            _apply(connection, {"c2s1": ("c2", 5, 1)}, {}, window_start)
+            row = connection.execute(select(risk_table).where(risk_table.c.student_id == "c2s1")).one()
+            assert (row.total_records, row.present_records, row.at_risk) == (5, 1, True)
+        finally:
+            transaction.rollback()
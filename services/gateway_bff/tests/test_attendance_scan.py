@@ -0,0 +1,44 @@
+"""Attendance scans stay within their deadline while the gallery index builds"""
+
+import time
+
+import cv2
+import numpy as np
+from fastapi.testclient import TestClient
+
+import main
+from app.api.v1 import attendance
+from app.core.config import settings
+
+BUILD_SECONDS = 1.0
+
+
+def test_gallery_index_build_is_bounded_by_the_deadline(db, monkeypatch):
+    service = attendance.cv_service
+    build = service._build_gallery_index
+
+    def slow_build(session):
+        time.sleep(BUILD_SECONDS)
+        return build(session)
+
+    face = {"image": np.zeros((10, 10, 3), np.uint8), "box": (0, 0, 1, 1), "confidence": 0.9}
+    monkeypatch.setattr(settings, "ATTENDANCE_SCAN_TIMEOUT", 0.3)
+    monkeypatch.setattr(service, "detect_faces", lambda image: [face])
+    monkeypatch.setattr(service, "extract_embedding", lambda face_data: np.ones(128, np.float32))
+    monkeypatch.setattr(service, "_build_gallery_index", slow_build)
+    monkeypatch.setattr(service, "_gallery_index", None)
+
+    image = cv2.imencode(".jpg", np.zeros((64, 64, 3), np.uint8))[1].tobytes()
+    started = time.perf_counter()
+    response = TestClient(main.app).post(
+        "/api/v1/attendance/scan",
+        data={"teacher_id": "t"},
+        files={"image_data": ("scan.jpg", image, "image/jpeg")},
+    )
+    assert time.perf_counter() - started < BUILD_SECONDS
+    assert response.status_code == 200
+    assert response.json()["partial"] is True
+    assert response.json()["timed_out_stage"] == "match"
+    # Let the abandoned build finish before the fixtures are torn down
+    with service._gallery_lock:
+        pass
@@ -0,0 +1,39 @@
+"""The duplicate scan skips templates it cannot stack with the gallery"""
+
+import numpy as np
+import pytest
+
+from app.models import Class, FaceTemplate, Student
+from app.services.duplicate_detection import DuplicateFaceDetector
+from app.utils.embeddings import encode_embedding
+
+CLASS_ID = "duplicates"
+STUDENT_IDS = ["d0", "d1", "d2"]
+
+
+@pytest.fixture
+def templates(db):
+    """Two look-alike students and one template of the wrong dimension"""
+    rng = np.random.default_rng(1)
+    face = rng.standard_normal(128).astype(np.float32)
+    face /= np.linalg.norm(face)
+    db.add(Class(id=CLASS_ID, name="Duplicates", grade_level="3", teacher_id="t"))
+    for student_id in STUDENT_IDS:
+        db.add(Student(id=student_id, first_name="D", last_name=student_id, class_id=CLASS_ID))
+    db.add(FaceTemplate(student_id="d0", embedding_data=encode_embedding(face)))
+    db.add(FaceTemplate(student_id="d1", embedding_data=encode_embedding(face)))
+    db.add(FaceTemplate(student_id="d2", embedding_data=encode_embedding(face[:64])))
+    db.commit()
+    yield
+    db.query(FaceTemplate).filter(FaceTemplate.student_id.in_(STUDENT_IDS)).delete()
+    db.query(Student).filter(Student.class_id == CLASS_ID).delete()
+    db.query(Class).filter(Class.id == CLASS_ID).delete()
+    db.commit()
+
+
+def test_wrong_dimension_templates_are_skipped(db, templates):
+    result = DuplicateFaceDetector(db, threshold=0.9).run()
+    assert result["templates_scanned"] == 2
+    assert [
+        (pair["template_a"]["student_id"], pair["template_b"]["student_id"]) for pair in result["pairs"]
+    ] == [("d0", "d1")]
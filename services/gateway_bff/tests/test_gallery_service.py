@@ -0,0 +1,119 @@
+"""Gallery delta bundles carry whole students and report deleted templates"""
+
+import json
+import struct
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from app.core.metrics import metrics
+from app.models import Class, FaceTemplate, FaceTemplateTombstone, Student
+from app.services.gallery_service import GalleryService
+from app.utils.embeddings import encode_embedding
+
+CLASS_ID = "gallery"
+
+
+def header(bundle: bytes) -> dict:
+    _, length = struct.unpack("<BI", bundle[4:9])
+    return json.loads(bundle[9:9 + length])
+
+
+@pytest.fixture
+def gallery(db):
+    """Three students with two templates each, removed again afterwards"""
+    rng = np.random.default_rng(0)
+    updated_at = datetime.utcnow() - timedelta(hours=1)
+    db.add(Class(id=CLASS_ID, name="Gallery", grade_level="3", teacher_id="t"))
+    for s in range(3):
+        db.add(Student(id=f"g{s}", first_name="G", last_name=str(s), class_id=CLASS_ID))
+        for _ in range(2):
+            embedding = rng.standard_normal(128).astype(np.float32)
+            db.add(FaceTemplate(
+                student_id=f"g{s}", embedding_data=encode_embedding(embedding / np.linalg.norm(embedding)),
+                created_at=updated_at, updated_at=updated_at,
+            ))
+    db.commit()
+    yield GalleryService(db)
+    db.query(FaceTemplateTombstone).filter(FaceTemplateTombstone.student_id.in_(["g0", "g1", "g2"])).delete()
+    db.query(FaceTemplate).filter(FaceTemplate.student_id.in_(["g0", "g1", "g2"])).delete()
+    db.query(Student).filter(Student.class_id == CLASS_ID).delete()
+    db.query(Class).filter(Class.id == CLASS_ID).delete()
+    db.commit()
+
+
+def templates_of(db, student_id: str):
+    return db.query(FaceTemplate).filter(FaceTemplate.student_id == student_id).order_by(FaceTemplate.id).all()
+
+
+def test_delta_carries_every_template_of_a_changed_student(db, gallery):
+    base = gallery.get_gallery_state(CLASS_ID)["version"]
+    assert header(gallery.build_bundle(CLASS_ID, since=base))["rows"] == 0
+
+    first, second = templates_of(db, "g1")
+    first.updated_at = datetime.utcnow()
+    db.commit()
+
+    delta = header(gallery.build_bundle(CLASS_ID, since=base))
+    assert delta["template_ids"] == [first.id, second.id]
+    assert delta["student_ids"] == ["g1", "g1"]
+    assert delta["removed_template_ids"] == []
+
+
+def test_deletions_advance_the_version(db, gallery):
+    base = gallery.get_gallery_state(CLASS_ID)["version"]
+    kept, deleted = templates_of(db, "g0")
+    gone = templates_of(db, "g2")
+    db.delete(deleted)
+    for template in gone:
+        db.delete(template)
+    db.commit()
+
+    state = gallery.get_gallery_state(CLASS_ID)
+    assert state["version"] > base
+    assert state["enrolled_student_ids"] == ["g0", "g1"]
+
+    delta = header(gallery.build_bundle(CLASS_ID, since=base, state=state))
+    assert delta["removed_template_ids"] == sorted([deleted.id] + [template.id for template in gone])
+    assert delta["template_ids"] == [kept.id]
+    assert delta["enrolled_student_ids"] == ["g0", "g1"]
+
+    assert header(gallery.build_bundle(CLASS_ID, since=state["version"]))["removed_template_ids"] == []
+
+
+def test_class_transfer_moves_the_student_between_deltas(db, gallery):
+    old_base = gallery.get_gallery_state(CLASS_ID)["version"]
+    new_base = gallery.get_gallery_state("c0")["version"]
+    moved = [template.id for template in templates_of(db, "g2")]
+    student = db.get(Student, "g2")
+    try:
+        student.class_id = "c0"
+        db.commit()
+
+        old_delta = header(gallery.build_bundle(CLASS_ID, since=old_base))
+        assert old_delta["version"] > old_base
+        assert old_delta["removed_template_ids"] == moved
+        assert "g2" not in old_delta["enrolled_student_ids"]
+
+        new_delta = header(gallery.build_bundle("c0", since=new_base))
+        assert new_delta["version"] > new_base
+        assert new_delta["template_ids"] == moved
+        assert new_delta["student_ids"] == ["g2", "g2"]
+    finally:
+        student.class_id = CLASS_ID
+        db.commit()
+
+
+def test_bundle_endpoint_builds_on_the_batch_queue(db, gallery):
+    def submitted():
+        counters = metrics.snapshot()["counters"].get("cv_scheduler_submitted_total", [])
+        return sum(entry["value"] for entry in counters if entry["labels"] == {"queue": "batch"})
+
+    before = submitted()
+    response = TestClient(main.app).get(f"/api/v1/enrollment/gallery/{CLASS_ID}/bundle")
+    assert response.status_code == 200
+    assert header(response.content)["rows"] == 6
+    assert submitted() == before + 1
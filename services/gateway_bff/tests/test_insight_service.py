@@ -0,0 +1,27 @@
+"""Insights read the rollup only with the rollup engine, with the same result"""
+
+from datetime import datetime
+
+import pytest
+
+from app.services.insight_service import InsightService
+
+from conftest import count_queries
+
+# Whole school days (SCHOOL_TIMEZONE is UTC in the tests)
+START, END = datetime(2026, 1, 5), datetime(2026, 2, 3)
+
+
+@pytest.mark.parametrize("class_id", ["c0", "c1"])
+def test_rollup_matches_raw_records(db, class_id):
+    from_records = InsightService(db, engine="sql").get_attendance_insights(class_id, START, END)
+    from_rollup = InsightService(db, engine="rollup").get_attendance_insights(class_id, START, END)
+    assert from_records["total_scans"] > 0
+    assert from_rollup == from_records
+
+
+def test_default_engine_reads_raw_records(db):
+    # An existing database may have an empty (never backfilled) rollup
+    with count_queries() as statements:
+        InsightService(db, engine="sql").get_attendance_insights("c0", START, END)
+    assert not any("attendance_daily_rollup" in statement for statement in statements)
@@ -0,0 +1,71 @@
+"""Report cache invalidation never blocks writes on Redis"""
+
+import asyncio
+import threading
+import time
+
+from app.core.database import AsyncSessionLocal, SessionLocal
+from app.models import Class
+from app.services.report_cache import report_cache
+
+REDIS_SECONDS = 0.5
+
+
+class SlowRedis:
+    """Pipelines that take REDIS_SECONDS, like an unreachable server"""
+
+    def __init__(self):
+        self.bumps = []
+        self.done = threading.Event()
+
+    def pipeline(self, transaction=False):
+        return self
+
+    def incr(self, key):
+        pass
+
+    def execute(self):
+        time.sleep(REDIS_SECONDS)
+        self.bumps.append(threading.current_thread())
+        self.done.set()
+
+
+def remove_class(class_id: str):
+    session = SessionLocal()
+    session.query(Class).filter(Class.id == class_id).delete()
+    session.commit()
+    session.close()
+
+
+def test_commit_skips_bump_while_redis_is_down(monkeypatch):
+    client = SlowRedis()
+    monkeypatch.setattr(report_cache, "client", client)
+    monkeypatch.setattr(report_cache, "_redis_down_until", time.monotonic() + 60)
+
+    session = SessionLocal()
+    session.add(Class(id="cache-down", name="Cache", grade_level="3", teacher_id="t"))
+    started = time.perf_counter()
+    session.commit()
+    assert time.perf_counter() - started < REDIS_SECONDS / 2
+    session.close()
+    remove_class("cache-down")
+    assert client.bumps == []
+
+
+def test_async_commit_bumps_off_the_event_loop(monkeypatch):
+    client = SlowRedis()
+    monkeypatch.setattr(report_cache, "client", client)
+    monkeypatch.setattr(report_cache, "_redis_down_until", 0.0)
+
+    async def write():
+        async with AsyncSessionLocal() as session:
+            session.add(Class(id="cache-async", name="Cache", grade_level="3", teacher_id="t"))
+            started = time.perf_counter()
+            await session.commit()
+            return time.perf_counter() - started
+
+    assert asyncio.run(write()) < REDIS_SECONDS / 2
+    assert client.done.wait(5)
+    assert client.bumps[0] is not threading.main_thread()
+    monkeypatch.setattr(report_cache, "_redis_down_until", time.monotonic() + 60)
+    remove_class("cache-async")
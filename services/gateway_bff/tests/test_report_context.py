@@ -0,0 +1,61 @@
+"""The comprehensive report reads its shared dataset with a fixed number of queries"""
+
+from datetime import datetime
+
+import pytest
+
+from app.services.analytics_service import AnalyticsService
+
+from conftest import CLASSES, STUDENTS_PER_CLASS, count_queries
+
+START, END = datetime(2026, 1, 5), datetime(2026, 2, 3)
+# Statements per comprehensive report, whatever the number of students
+MAX_QUERIES = {"sql": 2, "rows": 3, "rollup": 2, "numpy": 4}
+
+
+def comprehensive(report, class_id):
+    """The sections reports.get_comprehensive_report builds"""
+    sections = [
+        report.get_attendance_stats(),
+        report.get_student_summaries(),
+        report.get_daily_trends(),
+        report.get_performance_report(),
+        report.detect_patterns(),
+    ]
+    if class_id is None:
+        sections.append(report.get_class_comparisons())
+    return sections
+
+
+@pytest.mark.parametrize("class_id", [None, "c1"])
+@pytest.mark.parametrize("engine_name", AnalyticsService.ENGINES)
+def test_comprehensive_report_query_count(db, engine_name, class_id):
+    service = AnalyticsService(db, engine=engine_name)
+    with count_queries() as statements:
+        comprehensive(service.report_context(START, END, class_id), class_id)
+    assert 1 <= len(statements) <= MAX_QUERIES[engine_name], statements
+
+
+@pytest.mark.parametrize("engine_name", ["sql", "rows"])
+def test_report_context_matches_sections(db, engine_name):
+    service = AnalyticsService(db, engine=engine_name)
+    report = service.report_context(START, END)
+    assert report.get_attendance_stats() == service.get_attendance_stats(START, END)
+    assert report.get_student_summaries() == service.get_student_summaries(START, END)
+    assert report.get_daily_trends() == service.get_daily_trends(START, END)
+    assert report.get_performance_report() == service.get_performance_report(START, END)
+    assert report.get_class_comparisons() == service.get_class_comparisons(START, END)
+    assert report.detect_patterns() == service.detect_patterns(START, END)
+
+
+def test_rows_sections_query_per_student(db):
+    """The per-section rows path this replaces grows with the roster"""
+    service = AnalyticsService(db, engine="rows")
+    with count_queries() as statements:
+        service.get_attendance_stats(START, END)
+        service.get_student_summaries(START, END)
+        service.get_daily_trends(START, END)
+        service.get_performance_report(START, END)
+        service.get_class_comparisons(START, END)
+        service.detect_patterns(START, END)
+    assert len(statements) > 2 * CLASSES * STUDENTS_PER_CLASS